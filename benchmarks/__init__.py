@@ -0,0 +1,38 @@
+"""Performance benchmarks for the EcoFlow BLE library"""
+
+import sys
+from pathlib import Path
+from types import ModuleType
+
+ROOT = Path(__file__).parents[1]
+
+
+def install_package_stub():
+    """
+    Make eflib importable without Home Assistant
+
+    Same as tests/eflib/conftest.py - the integration package needs Home Assistant, so
+    its __init__ is replaced with an empty package.
+    """
+    if "custom_components.ef_ble" in sys.modules:
+        return
+
+    custom_components = ModuleType("custom_components")
+    custom_components.__path__ = []
+    ef_ble = ModuleType("custom_components.ef_ble")
+    ef_ble.__path__ = [str(ROOT / "custom_components" / "ef_ble")]
+    custom_components.ef_ble = ef_ble  # pyright: ignore[reportAttributeAccessIssue]
+    sys.modules["custom_components"] = custom_components
+    sys.modules["custom_components.ef_ble"] = ef_ble
+
+
+def manufacturer_data(serial_number: str, encrypt_type: int) -> bytes:
+    """Manufacturer data advertised by device, as parsed by `_ScanRecordV2`"""
+    # capability flags at offset 22
+    capability_flags = 0b1 | (encrypt_type << 3)
+    return (
+        b"\x05"
+        + serial_number.encode().ljust(16, b"\x00")[:16]
+        + bytes(5)
+        + bytes([capability_flags])
+    )
@@ -0,0 +1,390 @@
+"""
+Decode throughput and memory of every device module, checked against stored baselines
+
+Each device module gets a packet corpus - packets captured in the `packet_sequence`
+fixture of its test module in `tests/eflib` if there is one, otherwise heartbeats from
+a `HeartbeatGenerator` with a fixed seed. The corpus is decoded by a fresh device the
+way notifications are once reassembled and decrypted: `packet_parse`, `data_parse`
+and a callback registered for every field. For each module the benchmark reports:
+
+- frames per second, best of several runs over the repeated corpus
+- peak memory traced by `tracemalloc` while decoding the corpus once
+- memory blocks still allocated after decoding the corpus once more, which should
+  stay flat once the device has seen all of its packets
+
+Throughput is only comparable between runs on the same machine. The stored baseline
+is meant for a quick check on the machine it was written on; to measure a change,
+store results of both versions with `--output` and compare them with `--compare`.
+Regressions beyond `--threshold` are reported and the script exits with non-zero
+status, as it does for modules missing from the baseline. Results of a module whose
+corpus changed are not compared.
+
+Usage::
+
+    python -m benchmarks.decode                       # check against baseline
+    python -m benchmarks.decode --update              # store results as baseline
+    python -m benchmarks.decode river3 --output new.json
+    python -m benchmarks.decode --compare old.json new.json
+"""
+
+import argparse
+import ast
+import asyncio
+import gc
+import hashlib
+import json
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from . import ROOT, install_package_stub
+
+install_package_stub()
+
+from custom_components.ef_ble.eflib.devicebase import DeviceBase  # noqa: E402
+from custom_components.ef_ble.eflib.devices import (  # noqa: E402
+    SN_PREFIXES,
+    module_name_for,
+)
+
+from .generators import (  # noqa: E402
+    HeartbeatGenerator,
+    NullConnection,
+    create_device,
+    serial_number_for,
+)
+from .replay import device_serial_number, fixture_return  # noqa: E402
+
+BASELINE_FILE = Path(__file__).with_name("decode_baseline.json")
+TESTS_DIR = ROOT / "tests" / "eflib"
+
+# packets generated for modules without captured packets
+GENERATED_PACKETS = 100
+GENERATOR_SEED = 1
+
+# memory blocks allocated by the interpreter itself between two measurements, e.g.
+# for interned strings or method caches, are not reported as retained by decoding
+RETAINED_BLOCKS_SLACK = 64
+
+# metrics compared against baseline, with whether higher values are better
+METRICS = {
+    "frames_per_second": True,
+    "peak_bytes": False,
+    "retained_blocks": False,
+}
+
+
+@dataclass
+class Corpus:
+    """
+    Packets decoded by device of a single module
+
+    Parameters
+    ----------
+    model
+        Name of the device module, one of `SN_PREFIXES`
+    serial_number
+        Serial number the device is created with
+    packets
+        Packets as received by `packet_parse`
+    source
+        Test module the packets were captured in, or `generated`
+    """
+
+    model: str
+    serial_number: str
+    packets: list[bytes]
+    source: str
+
+    @property
+    def digest(self) -> str:
+        """Short hash of the packets, results of different corpora are not compared"""
+        sha = hashlib.sha256()
+        for packet in self.packets:
+            sha.update(packet)
+        return sha.hexdigest()[:16]
+
+
+def captured_corpora() -> dict[str, Corpus]:
+    """Return corpora of packets captured in test modules, by device module"""
+    corpora = {}
+    for path in sorted(TESTS_DIR.glob("test_*.py")):
+        tree = ast.parse(path.read_text(), filename=str(path))
+        try:
+            serial_number = device_serial_number(tree)
+            payloads = fixture_return(tree, "packet_sequence")
+        except ValueError:
+            continue
+
+        model = module_name_for(serial_number.encode())
+        if model in SN_PREFIXES and model not in corpora:
+            corpora[model] = Corpus(
+                model,
+                serial_number,
+                [bytes.fromhex(payload) for payload in payloads],
+                str(path.relative_to(ROOT)),
+            )
+    return corpora
+
+
+async def generated_corpus(model: str) -> Corpus:
+    """Return corpus of heartbeats generated for model with a fixed seed"""
+    generator = await HeartbeatGenerator.create(model, seed=GENERATOR_SEED)
+    packets = [next(generator).toBytes() for _ in range(GENERATED_PACKETS)]
+    return Corpus(model, serial_number_for(model), packets, "generated")
+
+
+@dataclass
+class DecodeStats:
+    """Result of decoding corpus of a single module"""
+
+    corpus: Corpus
+    frames: int = 0
+    processed: int = 0
+    callbacks: int = 0
+    errors: int = 0
+    elapsed: float = 0.0
+    peak_bytes: int = 0
+    retained_blocks: int = 0
+
+    @property
+    def frames_per_second(self) -> float:
+        return self.frames / self.elapsed if self.elapsed else 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "corpus": self.corpus.digest,
+            "source": self.corpus.source,
+            "packets": len(self.corpus.packets),
+            "frames": self.frames,
+            "processed": self.processed,
+            "callbacks": self.callbacks,
+            "errors": self.errors,
+            "frames_per_second": round(self.frames_per_second, 1),
+            "peak_bytes": self.peak_bytes,
+            "retained_blocks": self.retained_blocks,
+        }
+
+
+class DecodeBenchmark:
+    """
+    Decodes corpus with a newly created device
+
+    Writes the device makes in response are dropped, packets are not throttled and
+    every field change runs its callbacks.
+
+    Parameters
+    ----------
+    corpus
+        Packets to decode
+    """
+
+    def __init__(self, corpus: Corpus) -> None:
+        self._corpus = corpus
+        self.stats = DecodeStats(corpus)
+        self._device = self._create_device()
+
+    def _create_device(self) -> DeviceBase:
+        device = create_device(self._corpus.serial_number)
+        device.with_update_period(0)
+        device._conn = NullConnection()  # pyright: ignore[reportAttributeAccessIssue]
+
+        # stand-in for Home Assistant entities, one callback for every field
+        def _entity_callback():
+            self.stats.callbacks += 1
+
+        for prop in device._fields:
+            device.register_callback(_entity_callback, prop.public_name)
+        return device
+
+    async def decode(self):
+        """Decode every packet of the corpus once"""
+        device = self._device
+        stats = self.stats
+        for data in self._corpus.packets:
+            try:
+                packet = await device.packet_parse(data)
+                stats.processed += bool(await device.data_parse(packet))
+            except Exception:  # noqa: BLE001
+                stats.errors += 1
+            stats.frames += 1
+
+    async def run(self, repeat: int = 20, runs: int = 5) -> DecodeStats:
+        """
+        Measure decoding of the corpus and return collected stats
+
+        Parameters
+        ----------
+        repeat, optional
+            Number of times the corpus is decoded in a single timed run
+        runs, optional
+            Number of timed runs, the fastest one is reported
+        """
+        stats = self.stats
+
+        # first pass fills fields of the device and caches of eflib
+        await self.decode()
+
+        gc.collect()
+        blocks = sys.getallocatedblocks()
+        await self.decode()
+        gc.collect()
+        stats.retained_blocks = max(sys.getallocatedblocks() - blocks, 0)
+
+        tracemalloc.start()
+        try:
+            start_bytes = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            await self.decode()
+            stats.peak_bytes = tracemalloc.get_traced_memory()[1] - start_bytes
+        finally:
+            tracemalloc.stop()
+
+        best = None
+        for _ in range(runs):
+            # counters of the last run are reported, they match its time
+            stats.frames = stats.processed = stats.callbacks = stats.errors = 0
+            start = time.perf_counter()
+            for _ in range(repeat):
+                await self.decode()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+
+        stats.elapsed = best or 0.0
+        return stats
+
+
+async def measure(models: list[str], repeat: int, runs: int) -> dict[str, DecodeStats]:
+    """Return decode stats of each model"""
+    captured = captured_corpora()
+    results = {}
+    for model in models:
+        corpus = captured.get(model) or await generated_corpus(model)
+        results[model] = await DecodeBenchmark(corpus).run(repeat=repeat, runs=runs)
+    return results
+
+
+def compare(
+    results: dict[str, dict[str, Any]],
+    baseline: dict[str, dict[str, Any]],
+    threshold: float,
+) -> list[str]:
+    """Return descriptions of metrics that regressed beyond threshold"""
+    regressions = []
+    for model, result in results.items():
+        base = baseline.get(model)
+        if base is None or base["corpus"] != result["corpus"]:
+            continue
+
+        for metric, higher_is_better in METRICS.items():
+            current, previous = result[metric], base[metric]
+            if higher_is_better:
+                regressed = current < previous * (1 - threshold)
+            else:
+                limit = previous * (1 + threshold)
+                if metric == "retained_blocks":
+                    limit += RETAINED_BLOCKS_SLACK
+                regressed = current > limit
+            if regressed:
+                regressions.append(f"{model}: {metric} {previous} -> {current}")
+    return regressions
+
+
+def _print_results(
+    results: dict[str, dict[str, Any]], baseline: dict[str, dict[str, Any]]
+):
+    print(
+        f"{'module':<22} {'source':<10} {'frames/s':>10} {'baseline':>10} "
+        f"{'peak [KiB]':>11} {'retained':>9} {'errors':>7}"
+    )
+    for model, result in results.items():
+        base = baseline.get(model)
+        if base is None:
+            base_fps = "-"
+        elif base["corpus"] != result["corpus"]:
+            base_fps = "changed"
+        else:
+            base_fps = f"{base['frames_per_second']:.0f}"
+        source = "generated" if result["source"] == "generated" else "captured"
+        print(
+            f"{model:<22} {source:<10} {result['frames_per_second']:>10.0f} "
+            f"{base_fps:>10} {result['peak_bytes'] / 1024:>11.1f} "
+            f"{result['retained_blocks']:>9} {result['errors']:>7}"
+        )
+
+
+def _read_results(path: Path) -> dict[str, dict[str, Any]]:
+    return json.loads(path.read_text()) if path.exists() else {}
+
+
+def _write_results(path: Path, results: dict[str, dict[str, Any]]):
+    path.write_text(json.dumps(dict(sorted(results.items())), indent=2) + "\n")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=20,
+        help="number of times the corpus is decoded in a single run",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="relative change of a metric reported as regression",
+    )
+    parser.add_argument(
+        "--update", action="store_true", help="write results as the new baseline"
+    )
+    parser.add_argument("--output", type=Path, help="write results to JSON file")
+    parser.add_argument(
+        "--compare",
+        nargs=2,
+        type=Path,
+        metavar=("OLD", "NEW"),
+        help="compare two stored results instead of measuring",
+    )
+    parser.add_argument("models", nargs="*", help="device modules, default all")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        baseline = _read_results(args.compare[0])
+        results = _read_results(args.compare[1])
+    else:
+        baseline = _read_results(BASELINE_FILE)
+        stats = asyncio.run(
+            measure(args.models or list(SN_PREFIXES), args.repeat, args.runs)
+        )
+        results = {model: s.as_dict() for model, s in stats.items()}
+
+    _print_results(results, baseline)
+
+    if args.output:
+        _write_results(args.output, results)
+        print(f"Results written to {args.output}")
+
+    if args.update:
+        _write_results(BASELINE_FILE, {**baseline, **results})
+        print(f"Baseline written to {BASELINE_FILE.relative_to(ROOT)}")
+        return 0
+
+    failed = False
+    if missing := [model for model in results if model not in baseline]:
+        print(f"No baseline for {len(missing)} module(s): {', '.join(missing)}")
+        failed = True
+    if regressions := compare(results, baseline, args.threshold):
+        print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+        for regression in regressions:
+            print(f"  {regression}")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
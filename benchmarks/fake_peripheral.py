@@ -0,0 +1,441 @@
+"""
+In-process EcoFlow BLE peripheral
+
+`FakePeripheral` implements the device side of the protocol - the public key exchange
+and key info response for encrypt type 7, the auth status (0x35/0x89) and auth
+(0x35/0x86) replies for both encrypt types - and streams heartbeats once
+authenticated. Its `client_class` is a `BleakClient` stand-in that can be handed to
+`Connection.with_client_class` or `DeviceBase.with_client_class`, so the whole
+connect path runs through `establish_connection` up to `AUTHENTICATED` without any
+BLE hardware.
+
+Link conditions are configurable with one-way latency, MTU and notification loss.
+"""
+
+import asyncio
+import functools
+import hashlib
+import itertools
+import logging
+import random
+import time
+from collections.abc import Callable, Iterable, Sequence
+from dataclasses import dataclass, field
+from typing import Any
+
+import ecdsa
+from bleak.backends.device import BLEDevice
+
+from . import install_package_stub
+
+install_package_stub()
+
+from custom_components.ef_ble.eflib.connection import Connection  # noqa: E402
+from custom_components.ef_ble.eflib.encryption import (  # noqa: E402
+    Type1Encryption,
+    Type7Encryption,
+)
+from custom_components.ef_ble.eflib.frame_assembler import (  # noqa: E402
+    EncPacketAssembler,
+    FrameAssembler,
+    RawHeaderAssembler,
+    SimplePacketAssembler,
+)
+from custom_components.ef_ble.eflib.packet import Packet  # noqa: E402
+
+NORDIC_UART_SERVICE = "6e400001-b5a3-f393-e0a9-e50e24dcca9e"
+NORDIC_UART_WRITE = "6e400002-b5a3-f393-e0a9-e50e24dcca9e"
+NORDIC_UART_NOTIFY = "6e400003-b5a3-f393-e0a9-e50e24dcca9e"
+
+# curve number reported in public key response, 0 is SECP160r1 with 40 byte keys
+_SECP160R1 = 0
+
+_LOGGER = logging.getLogger(__name__)
+
+_address_counter = itertools.count(1)
+
+
+@dataclass(frozen=True)
+class FakeCharacteristic:
+    uuid: str
+    handle: int
+    service_uuid: str
+    properties: tuple[str, ...]
+    max_write_without_response_size: int
+    description: str = ""
+
+
+class FakeServices:
+    """Minimal `BleakGATTServiceCollection` with the Nordic UART characteristics"""
+
+    def __init__(self, mtu: int) -> None:
+        write_size = mtu - 3
+        self.characteristics = {
+            11: FakeCharacteristic(
+                NORDIC_UART_WRITE,
+                11,
+                NORDIC_UART_SERVICE,
+                ("write", "write-without-response"),
+                write_size,
+            ),
+            14: FakeCharacteristic(
+                NORDIC_UART_NOTIFY, 14, NORDIC_UART_SERVICE, ("notify",), write_size
+            ),
+        }
+
+    def get_characteristic(self, specifier: int | str) -> FakeCharacteristic | None:
+        if isinstance(specifier, int):
+            return self.characteristics.get(specifier)
+        return next(
+            (c for c in self.characteristics.values() if c.uuid == specifier), None
+        )
+
+
+@dataclass
+class PeripheralStats:
+    connects: int = 0
+    writes: int = 0
+    notifications: int = 0
+    dropped: int = 0
+    heartbeats: int = 0
+    # seconds spent in the notification handler of the connection
+    handler_time: float = 0.0
+    received_packets: list[Packet] = field(default_factory=list)
+
+
+class FakeBleakClient:
+    """`BleakClient` stand-in connected to a `FakePeripheral`"""
+
+    def __init__(
+        self,
+        peripheral: "FakePeripheral",
+        device: BLEDevice,
+        disconnected_callback: Callable[[Any], None] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        self._peripheral = peripheral
+        self.address = device.address
+        self._disconnected_callback = disconnected_callback
+        self._connected = False
+        self.services = FakeServices(peripheral.mtu)
+        self.notify_callback: Callable[..., Any] | None = None
+
+    @property
+    def is_connected(self) -> bool:
+        return self._connected
+
+    async def connect(self, **kwargs: Any) -> bool:
+        await asyncio.sleep(self._peripheral.latency)
+        self._connected = True
+        self._peripheral._on_connect(self)
+        return True
+
+    async def disconnect(self) -> bool:
+        self._drop()
+        return True
+
+    async def clear_cache(self) -> bool:
+        return True
+
+    async def start_notify(
+        self, characteristic: FakeCharacteristic, callback: Callable, **kwargs: Any
+    ):
+        self.notify_callback = callback
+
+    async def stop_notify(self, characteristic: FakeCharacteristic):
+        self.notify_callback = None
+
+    async def write_gatt_char(
+        self, characteristic: FakeCharacteristic, data: bytes, response: bool = True
+    ):
+        if not self._connected:
+            raise ConnectionError("Not connected")
+        if response:
+            # write request waits for the write response from the device
+            await asyncio.sleep(self._peripheral.latency)
+        await self._peripheral._on_write(bytes(data))
+
+    def _drop(self):
+        if not self._connected:
+            return
+        self._connected = False
+        self.notify_callback = None
+        self._peripheral._on_disconnect(self)
+        if self._disconnected_callback is not None:
+            self._disconnected_callback(self)
+
+
+class FakePeripheral:
+    """
+    Device side of the EcoFlow BLE protocol
+
+    Parameters
+    ----------
+    serial_number
+        Serial number of the simulated device, used for type 1 session keys and auth
+    encrypt_type, optional
+        Session encryption, 1 for fixed keys derived from serial number or 7 for ECDH
+        key exchange
+    user_id, optional
+        User id expected in auth request, any user id is accepted if None
+    heartbeats, optional
+        Packets streamed once authenticated - a sequence of raw packets in the format
+        of the `packet_sequence` fixtures in tests is repeated in a loop, any other
+        iterable, e.g. `HeartbeatGenerator`, is streamed until exhausted
+    heartbeat_interval, optional
+        Seconds between two streamed heartbeats
+    latency, optional
+        One-way link latency in seconds, applied to connect, write responses and
+        notifications
+    mtu, optional
+        ATT MTU, notifications longer than MTU - 3 are split over several
+    loss, optional
+        Probability of a notification being dropped
+    seed, optional
+        Seed of the random generator used for loss and session keys
+    """
+
+    def __init__(
+        self,
+        serial_number: str,
+        *,
+        encrypt_type: int = 7,
+        user_id: str | None = None,
+        heartbeats: Iterable[Packet | bytes] = (),
+        heartbeat_interval: float = 1.0,
+        latency: float = 0.0,
+        mtu: int = 247,
+        loss: float = 0.0,
+        seed: int | None = None,
+    ) -> None:
+        if encrypt_type not in (1, 7):
+            raise ValueError(f"Unsupported encryption type: {encrypt_type}")
+
+        self.serial_number = serial_number
+        self.encrypt_type = encrypt_type
+        self.user_id = user_id
+        self.heartbeats = (
+            list(heartbeats) if isinstance(heartbeats, Sequence) else heartbeats
+        )
+        self.heartbeat_interval = heartbeat_interval
+        self.latency = latency
+        self.mtu = mtu
+        self.loss = loss
+        self.address = "EF:00:00:00:{:02X}:{:02X}".format(
+            *divmod(next(_address_counter) % 0x10000, 0x100)
+        )
+        self.stats = PeripheralStats()
+
+        self._random = random.Random(seed)
+        self._client: FakeBleakClient | None = None
+        self._simple = SimplePacketAssembler()
+        self._private_key: ecdsa.SigningKey | None = None
+        self._shared_encryption: Type7Encryption | None = None
+        self._session: FrameAssembler | None = None
+        self._authenticated = False
+        self._deliveries: asyncio.Queue[tuple[float, bytes]] | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    @property
+    def ble_device(self) -> BLEDevice:
+        return BLEDevice(self.address, f"EF-{self.serial_number[-4:]}", None)
+
+    @property
+    def client_class(self) -> Callable[..., FakeBleakClient]:
+        """Client factory accepted by `Connection.with_client_class`"""
+        return functools.partial(FakeBleakClient, self)
+
+    @property
+    def is_connected(self) -> bool:
+        return self._client is not None and self._client.is_connected
+
+    @property
+    def authenticated(self) -> bool:
+        return self._authenticated
+
+    def disconnect(self):
+        """Drop connection from the device side, e.g. device going out of range"""
+        if self._client is not None:
+            self._client._drop()
+
+    def notify(self, packet: Packet | bytes):
+        """Encrypt packet with current session and send it as notification"""
+        self._start_task(self._notify_packet(packet))
+
+    def _on_connect(self, client: FakeBleakClient):
+        self.stats.connects += 1
+        self._client = client
+        self._simple.reset()
+        self._private_key = None
+        self._shared_encryption = None
+        self._authenticated = False
+        self._deliveries = asyncio.Queue()
+        self._session = (
+            RawHeaderAssembler(
+                Type1Encryption(
+                    hashlib.md5(self.serial_number.encode()).digest(),
+                    hashlib.md5(self.serial_number[::-1].encode()).digest(),
+                )
+            )
+            if self.encrypt_type == 1
+            else None
+        )
+        self._start_task(self._deliver(client, self._deliveries))
+
+    def _on_disconnect(self, client: FakeBleakClient):
+        if client is not self._client:
+            return
+        self._client = None
+        self._deliveries = None
+        self._authenticated = False
+        # disconnect can be triggered from a notification handler, the delivery task
+        # running it stops on its own
+        current = asyncio.current_task()
+        for task in self._tasks:
+            if task is not current:
+                task.cancel()
+
+    def _start_task(self, coro):
+        task = asyncio.get_running_loop().create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _on_write(self, data: bytes):
+        self.stats.writes += 1
+
+        if self._session is None:
+            if (payload := self._simple.parse(data)) is not None:
+                await self._on_simple_command(payload)
+            return
+
+        for payload in await self._session.reassemble(data):
+            packet = Packet.fromBytes(payload)
+            if not Packet.is_invalid(packet):
+                self.stats.received_packets.append(packet)
+                await self._on_packet(packet)
+
+    async def _on_simple_command(self, payload: bytes):
+        match payload[0]:
+            case 0x01:
+                host_key = ecdsa.VerifyingKey.from_string(
+                    payload[2:42], curve=ecdsa.SECP160r1
+                )
+                self._private_key = ecdsa.SigningKey.generate(
+                    curve=ecdsa.SECP160r1, entropy=self._random.randbytes
+                )
+                shared_key = ecdsa.ECDH(
+                    ecdsa.SECP160r1, self._private_key, host_key
+                ).generate_sharedsecret_bytes()
+                self._shared_encryption = Type7Encryption(
+                    shared_key[:16], hashlib.md5(shared_key).digest()
+                )
+                public_key = self._private_key.get_verifying_key().to_string()  # pyright: ignore[reportOptionalMemberAccess]
+                await self._notify_raw(
+                    SimplePacketAssembler.encode(
+                        bytes([0x01, 0x00, _SECP160R1]) + public_key
+                    )
+                )
+            case 0x02:
+                assert self._shared_encryption is not None
+                srand = self._random.randbytes(16)
+                # offsets into key data stay within its 255 * 256 bytes
+                seed = bytes(
+                    [self._random.randrange(16), self._random.randrange(1, 256)]
+                )
+                encrypted = await self._shared_encryption.encrypt(srand + seed)
+                session_key = await Connection.genSessionKey(seed, srand)
+                await self._notify_raw(
+                    SimplePacketAssembler.encode(b"\x02" + encrypted)
+                )
+                self._session = EncPacketAssembler(
+                    Type7Encryption(session_key, self._shared_encryption.iv)
+                )
+
+    async def _on_packet(self, packet: Packet):
+        if packet.cmdSet != 0x35:
+            return
+
+        match packet.cmdId:
+            case 0x89:
+                await self._notify_packet(self._reply(packet, b"\x00"))
+            case 0x86:
+                expected = hashlib.md5(
+                    ((self.user_id or "") + self.serial_number).encode()
+                ).hexdigest()
+                accepted = self.user_id is None or packet.payload == (
+                    expected.upper().encode()
+                )
+                # 0x06 - wrong key
+                await self._notify_packet(
+                    self._reply(packet, b"\x00" if accepted else b"\x06")
+                )
+                if accepted and not self._authenticated:
+                    self._authenticated = True
+                    if self.heartbeats:
+                        self._start_task(self._stream_heartbeats())
+
+    @staticmethod
+    def _reply(packet: Packet, payload: bytes) -> Packet:
+        return Packet(
+            packet.dst,
+            packet.src,
+            packet.cmdSet,
+            packet.cmdId,
+            payload,
+            dsrc=packet.ddst,
+            ddst=packet.dsrc,
+            version=packet.version,
+        )
+
+    async def _stream_heartbeats(self):
+        heartbeats = (
+            itertools.cycle(self.heartbeats)
+            if isinstance(self.heartbeats, list)
+            else self.heartbeats
+        )
+        for heartbeat in heartbeats:
+            await self._notify_packet(heartbeat)
+            self.stats.heartbeats += 1
+            await asyncio.sleep(self.heartbeat_interval)
+
+    async def _notify_packet(self, packet: Packet | bytes):
+        assert self._session is not None
+        data = packet.toBytes() if isinstance(packet, Packet) else packet
+        await self._notify_raw(await self._session.encode_bytes(data))
+
+    async def _notify_raw(self, frame: bytes):
+        if self._deliveries is None:
+            return
+
+        due = asyncio.get_running_loop().time() + self.latency
+        chunk_size = self.mtu - 3
+        for start in range(0, len(frame), chunk_size):
+            if self.loss and self._random.random() < self.loss:
+                self.stats.dropped += 1
+                continue
+            self._deliveries.put_nowait((due, frame[start : start + chunk_size]))
+
+    async def _deliver(
+        self, client: FakeBleakClient, deliveries: asyncio.Queue[tuple[float, bytes]]
+    ):
+        # notifications are delivered one by one in order, like from a single link
+        loop = asyncio.get_running_loop()
+        characteristic = client.services.characteristics[14]
+        while client.is_connected:
+            due, chunk = await deliveries.get()
+            if (delay := due - loop.time()) > 0:
+                await asyncio.sleep(delay)
+
+            if (callback := client.notify_callback) is None:
+                continue
+
+            self.stats.notifications += 1
+            start = time.perf_counter()
+            try:
+                result = callback(characteristic, bytearray(chunk))
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception:
+                # bleak only logs exceptions raised from notification handlers
+                _LOGGER.exception("Notification handler failed")
+            self.stats.handler_time += time.perf_counter() - start
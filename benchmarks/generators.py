@@ -0,0 +1,544 @@
+"""
+Synthetic heartbeat streams for supported device models
+
+`HeartbeatGenerator` produces valid `Packet`s for a device model from the same protobuf
+and `RawData` messages the device class decodes. Routes are found by probing a scratch
+device with each of `CANDIDATE_ROUTES`, and every message field that the device maps to
+one of its fields gets a value drifting in a random walk. `change_rate` is the
+probability of a value changing between two packets of the same message, so it also
+controls how many entity updates each packet causes.
+
+Values that the device cannot process - e.g. an integer that is not a member of the
+enum it is converted to - are found before the first packet is generated and kept
+constant instead.
+
+Usage::
+
+    generator = await HeartbeatGenerator.create("delta2_max", seed=1)
+    packet = next(generator)
+"""
+
+import contextlib
+import random
+import struct
+from collections.abc import Coroutine, Iterator, Sequence
+from dataclasses import dataclass, fields
+from typing import Any
+
+from bleak.backends.device import BLEDevice
+from bleak.backends.scanner import AdvertisementData
+from google.protobuf.descriptor import Descriptor, FieldDescriptor
+from google.protobuf.message import Message
+
+from . import install_package_stub, manufacturer_data
+
+install_package_stub()
+
+from custom_components.ef_ble.eflib.devicebase import DeviceBase  # noqa: E402
+from custom_components.ef_ble.eflib.devices import (  # noqa: E402
+    SN_PREFIXES,
+    device_class_for,
+)
+from custom_components.ef_ble.eflib.model.base import RawData  # noqa: E402
+from custom_components.ef_ble.eflib.packet import Packet  # noqa: E402
+from custom_components.ef_ble.eflib.props.protobuf_field import (  # noqa: E402
+    ProtobufField,
+)
+from custom_components.ef_ble.eflib.props.raw_data_field import (  # noqa: E402
+    RawDataField,
+)
+from custom_components.ef_ble.eflib.props.repeated_protobuf_field import (  # noqa: E402
+    ProtobufRepeatedField,
+)
+from custom_components.ef_ble.eflib.props.updatable_props import Field  # noqa: E402
+
+# routes devices publish their state on, probed together with HEARTBEAT_ROUTES of the
+# device class - kit info (0x03, 0x03, 0x0E) is left out as it changes the number of
+# extra batteries
+CANDIDATE_ROUTES = (
+    (0x02, 0xFE, 0x15),
+    (0x08, 0xFE, 0x15),
+    (0x14, 0xFE, 0x15),
+    (0x42, 0xFE, 0x15),
+    (0x42, 0xFE, 0x16),
+    (0x02, 0x20, 0x02),
+    (0x03, 0x20, 0x02),
+    (0x03, 0x20, 0x32),
+    (0x04, 0x20, 0x02),
+    (0x05, 0x20, 0x02),
+    (0x06, 0x20, 0x32),
+    (0x02, 0x02, 0x01),
+    (0x02, 0x02, 0x02),
+    (0x02, 0x02, 0x03),
+    (0x02, 0x02, 0x04),
+    (0x02, 0x02, 0x21),
+    (0x35, 0x14, 0x01),
+    (0x35, 0x14, 0x04),
+    (0x0B, 0x0C, 0x20),
+    (0x42, 0x42, 0x50),
+)
+
+# standard deviation of a single drift step relative to the value range
+DRIFT = 0.02
+# value range of numbers with wider types, keeps values in magnitudes devices report
+MAX_VALUE = 1000
+
+_INT_CPP_TYPES = (
+    FieldDescriptor.CPPTYPE_INT32,
+    FieldDescriptor.CPPTYPE_INT64,
+    FieldDescriptor.CPPTYPE_UINT32,
+    FieldDescriptor.CPPTYPE_UINT64,
+)
+_FLOAT_CPP_TYPES = (FieldDescriptor.CPPTYPE_FLOAT, FieldDescriptor.CPPTYPE_DOUBLE)
+
+
+def serial_number_for(model: str, index: int = 0) -> str:
+    """Return serial number of simulated device of model, e.g. `R351SIM000000001`"""
+    prefix = SN_PREFIXES[model][0].decode()
+    return f"{prefix}SIM{index:0{13 - len(prefix)}d}"
+
+
+def create_device(
+    serial_number: str,
+    ble_device: BLEDevice | None = None,
+    encrypt_type: int = 7,
+) -> DeviceBase:
+    """Create device for serial number as if it was discovered by a scan"""
+    device_class = device_class_for(serial_number.encode())
+    if ble_device is None:
+        ble_device = BLEDevice("EF:00:00:00:00:00", None, None)
+    adv_data = AdvertisementData(
+        local_name=None,
+        manufacturer_data={
+            device_class.MANUFACTURER_KEY: manufacturer_data(
+                serial_number, encrypt_type
+            )
+        },
+        service_data={},
+        service_uuids=[],
+        tx_power=None,
+        rssi=0,
+        platform_data=(),
+    )
+    return device_class(ble_device, adv_data, serial_number)
+
+
+@dataclass
+class _Value:
+    """Value of a single message field drifting in a random walk"""
+
+    value: Any
+    low: float = 0
+    high: float = 0
+    is_int: bool = True
+    choices: Sequence[Any] | None = None
+    constant: bool = False
+
+    def candidates(self) -> list[Any]:
+        if self.choices is not None:
+            return list(self.choices)
+        if isinstance(self.value, bool):
+            return [False, True]
+        return [self.low, self.high, self.value]
+
+    def step(self, rng: random.Random) -> bool:
+        if self.constant:
+            return False
+        old = self.value
+        if self.choices is not None:
+            self.value = rng.choice(self.choices)
+        elif isinstance(self.value, bool):
+            self.value = not self.value
+        else:
+            step = rng.gauss(0, (self.high - self.low) * DRIFT)
+            if self.is_int:
+                step = round(step) or rng.choice((-1, 1))
+            self.value = min(max(self.value + step, self.low), self.high)
+        return self.value != old
+
+
+@dataclass
+class _Message:
+    """Message of one route with its drifting values"""
+
+    route: tuple[int, int, int]
+    message_type: type[Message] | type[RawData]
+    values: dict[Any, _Value]
+
+    def step(self, rng: random.Random, change_rate: float) -> bool:
+        changed = False
+        for value in self.values.values():
+            if rng.random() < change_rate:
+                changed |= value.step(rng)
+        return changed
+
+    def build(self, overrides: dict[Any, Any] | None = None) -> Message | RawData:
+        values = {key: value.value for key, value in self.values.items()}
+        if overrides:
+            values.update(overrides)
+
+        if issubclass(self.message_type, RawData):
+            return self.message_type(*values.values())
+
+        message = self.message_type()
+        for path, value in values.items():
+            _set_path(message, path, value)
+        return message
+
+    def serialize(self) -> bytes:
+        message = self.build()
+        if isinstance(message, RawData):
+            # RawData.pack slices the format by field count, which only works for
+            # single character formats
+            values = [getattr(message, field.name) for field in fields(message)]
+            return struct.pack(message._STRUCT_FMT, *values)
+        return message.SerializeToString()
+
+
+def _set_path(message: Message, path: tuple[str | int, ...], value: Any):
+    target: Any = message
+    for part in path[:-1]:
+        if isinstance(part, int):
+            while len(target) <= part:
+                target.add()
+            target = target[part]
+        else:
+            target = getattr(target, part)
+
+    if isinstance(last := path[-1], int):
+        if len(target) <= last:
+            target.append(value)
+        else:
+            target[last] = value
+    else:
+        setattr(target, last, value)
+
+
+def _protobuf_value(field: FieldDescriptor, rng: random.Random) -> _Value | None:
+    if field.cpp_type in _INT_CPP_TYPES:
+        return _Value(rng.randint(0, MAX_VALUE), high=MAX_VALUE)
+    if field.cpp_type in _FLOAT_CPP_TYPES:
+        return _Value(rng.uniform(0, MAX_VALUE), high=MAX_VALUE, is_int=False)
+    if field.cpp_type == FieldDescriptor.CPPTYPE_BOOL:
+        return _Value(rng.random() < 0.5)
+    if field.cpp_type == FieldDescriptor.CPPTYPE_ENUM:
+        choices = [value.number for value in field.enum_type.values]
+        return _Value(rng.choice(choices), choices=choices)
+    if field.cpp_type == FieldDescriptor.CPPTYPE_STRING:
+        value = b"sim" if field.type == FieldDescriptor.TYPE_BYTES else "sim"
+        return _Value(value, constant=True)
+    return None
+
+
+def _message_values(
+    descriptor: Descriptor,
+    path: tuple[str | int, ...],
+    rng: random.Random,
+    repeated_items: int,
+    key: bool = False,
+) -> dict[tuple[str | int, ...], _Value]:
+    """Values for all scalar fields of message, nested messages are not expanded"""
+    values = {}
+    for field in descriptor.fields:
+        if field.message_type is not None:
+            continue
+        if field.is_repeated:
+            for i in range(repeated_items):
+                if (value := _protobuf_value(field, rng)) is not None:
+                    values[(*path, field.name, i)] = value
+        elif (value := _protobuf_value(field, rng)) is not None:
+            values[(*path, field.name)] = value
+
+    if key and isinstance(index := path[-1], int):
+        # first integer of list items is usually its index, e.g. battery number,
+        # drifting it would make items appear and disappear
+        for value in values.values():
+            if isinstance(value.value, int) and not isinstance(value.value, bool):
+                if value.choices is None and not value.constant:
+                    value.value = index + 1
+                    value.constant = True
+                    break
+    return values
+
+
+def _protobuf_message_values(
+    device_class: type[DeviceBase],
+    message_type: type[Message],
+    rng: random.Random,
+    repeated_items: int,
+) -> dict[tuple[str | int, ...], _Value]:
+    values: dict[tuple[str | int, ...], _Value] = {}
+    for device_field in device_class._fields:
+        if not isinstance(device_field, ProtobufField):
+            continue
+        if device_field.pb_field.message_type is not message_type:
+            continue
+
+        descriptor = message_type.DESCRIPTOR
+        path: tuple[str | int, ...] = ()
+        field = None
+        for attr in device_field.pb_field.attrs:
+            field = descriptor.fields_by_name[attr]
+            path = (*path, attr)
+            descriptor = field.message_type
+
+        if field is None or path in values:
+            continue
+
+        if field.is_repeated:
+            # list items picked by index need at least that many items
+            indexes = [
+                index
+                for other in device_class._fields
+                if isinstance(other, ProtobufField)
+                and tuple(other.pb_field.attrs) == path
+                and isinstance(index := getattr(other, "index", None), int)
+            ]
+            for i in range(max([repeated_items, *(index + 1 for index in indexes)])):
+                if descriptor is None:
+                    if (value := _protobuf_value(field, rng)) is not None:
+                        values[(*path, i)] = value
+                    continue
+                values |= _message_values(
+                    descriptor,
+                    (*path, i),
+                    rng,
+                    repeated_items,
+                    key=isinstance(device_field, ProtobufRepeatedField),
+                )
+        elif descriptor is not None:
+            values |= _message_values(descriptor, path, rng, repeated_items)
+        elif (value := _protobuf_value(field, rng)) is not None:
+            values[path] = value
+    return values
+
+
+def _raw_data_value(fmt: str, rng: random.Random) -> _Value:
+    code = fmt[-1]
+    if code in "bBhHiIlLqQnN":
+        size = struct.calcsize(f"<{code}")
+        high = min(2 ** (8 * size - code.islower()) - 1, MAX_VALUE)
+        return _Value(rng.randint(0, high), high=high)
+    if code in "efd":
+        return _Value(rng.uniform(0, MAX_VALUE), high=MAX_VALUE, is_int=False)
+    if code == "?":
+        return _Value(rng.random() < 0.5)
+    if code == "c":
+        return _Value(b"\x00", constant=True)
+    return _Value(bytes(struct.calcsize(f"<{fmt}")), constant=True)
+
+
+def _raw_data_message_values(
+    device_class: type[DeviceBase],
+    message_type: type[RawData],
+    rng: random.Random,
+) -> dict[str, _Value]:
+    mapped = {
+        field.data_attr.attr
+        for field in device_class._fields
+        if isinstance(field, RawDataField)
+        and issubclass(message_type, field.data_attr.message_type)
+    }
+
+    values = {}
+    # first element of the format is the byte order
+    for field, fmt in zip(
+        fields(message_type), message_type._FULL_STRUCT_FMT[1:], strict=True
+    ):
+        value = _raw_data_value(fmt, rng)
+        if field.name not in mapped:
+            value.constant = True
+        values[field.name] = value
+    return values
+
+
+class HeartbeatGenerator(Iterator[Packet]):
+    """
+    Endless stream of heartbeat packets of a device model
+
+    Packets are generated for each discovered route in turn. Use `create` to build
+    generator for a model, it needs a running event loop to probe the device.
+
+    Parameters
+    ----------
+    device
+        Scratch device of the simulated model, used only for probing
+    messages
+        Messages with their routes and drifting values
+    change_rate, optional
+        Probability of each value changing between two packets of the same message
+    seed, optional
+        Seed of the random generator
+    """
+
+    def __init__(
+        self,
+        device: DeviceBase,
+        messages: Sequence[_Message],
+        change_rate: float = 0.1,
+        seed: int | None = None,
+    ) -> None:
+        self.device = device
+        self.messages = list(messages)
+        self.change_rate = change_rate
+        self.packets = 0
+        # whether values of the last generated packet changed from the previous one
+        self.changed = True
+
+        self._random = random.Random(seed)
+        self._next_message = 0
+
+    @classmethod
+    async def create(
+        cls,
+        model: str,
+        change_rate: float = 0.1,
+        seed: int | None = None,
+        repeated_items: int = 2,
+    ):
+        """
+        Create generator for device model
+
+        Parameters
+        ----------
+        model
+            Name of the device module, one of `SN_PREFIXES`
+        change_rate, optional
+            Probability of each value changing between two packets of the same message
+        seed, optional
+            Seed of the random generator
+        repeated_items, optional
+            Number of items generated for repeated message fields
+
+        Raises
+        ------
+        ValueError
+            If the device does not decode any of the probed routes
+        """
+        rng = random.Random(seed)
+        device = create_device(serial_number_for(model))
+        routes = await _discover_routes(device)
+        if not routes:
+            raise ValueError(f"No heartbeat routes found for '{model}'")
+
+        device_class = type(device)
+        messages = []
+        for route, message_type in routes.items():
+            if issubclass(message_type, RawData):
+                values = _raw_data_message_values(device_class, message_type, rng)
+            else:
+                values = _protobuf_message_values(
+                    device_class, message_type, rng, repeated_items
+                )
+            message = _Message(route, message_type, values)
+            _calibrate(device, message)
+            messages.append(message)
+
+        return cls(device, messages, change_rate=change_rate, seed=rng.random())
+
+    @property
+    def routes(self) -> list[tuple[int, int, int]]:
+        return [message.route for message in self.messages]
+
+    def __next__(self) -> Packet:
+        message = self.messages[self._next_message]
+        self._next_message = (self._next_message + 1) % len(self.messages)
+
+        self.changed = message.step(self._random, self.change_rate)
+        self.packets += 1
+        src, cmd_set, cmd_id = message.route
+        return Packet(
+            src,
+            0x21,
+            cmd_set,
+            cmd_id,
+            message.serialize(),
+            version=self.device.packet_version,
+        )
+
+
+async def _discover_routes(
+    device: DeviceBase,
+) -> dict[tuple[int, int, int], type[Message] | type[RawData]]:
+    """Return message type decoded by device for each route it processes"""
+    seen: list[Any] = []
+    unlisten = device.on_message_processed(seen.append)  # pyright: ignore[reportAttributeAccessIssue]
+    device._conn = NullConnection()  # pyright: ignore[reportAttributeAccessIssue]
+
+    routes = {}
+    candidates = dict.fromkeys([*type(device).HEARTBEAT_ROUTES, *CANDIDATE_ROUTES])
+    try:
+        for src, cmd_set, cmd_id in candidates:
+            # empty payload is a valid protobuf message, RawData needs enough bytes
+            for payload in (b"", bytes(1024)):
+                seen.clear()
+                packet = Packet(
+                    src, 0x21, cmd_set, cmd_id, payload, version=device.packet_version
+                )
+                # probed routes may not be what the device expects
+                with contextlib.suppress(Exception):
+                    await device.data_parse(packet)
+                if seen:
+                    routes[src, cmd_set, cmd_id] = type(seen[0])
+                    break
+    finally:
+        unlisten()
+        device._conn = None  # pyright: ignore[reportAttributeAccessIssue]
+    return routes
+
+
+class NullConnection:
+    """Connection of scratch device, replies sent from `data_parse` are dropped"""
+
+    def _add_task(self, coro: Coroutine):
+        coro.close()
+
+    def __getattr__(self, name: str):
+        async def _drop(*args: Any, **kwargs: Any):
+            return None
+
+        return _drop
+
+
+def _calibrate(device: DeviceBase, message: _Message):
+    """Keep values constant if their device field fails to process them"""
+    for device_field in type(device)._fields:
+        if isinstance(device_field, RawDataField):
+            if not issubclass(
+                message.message_type, device_field.data_attr.message_type
+            ):
+                continue
+            keys = [device_field.data_attr.attr]
+        elif isinstance(device_field, ProtobufField):
+            if device_field.pb_field.message_type is not message.message_type:
+                continue
+            prefix = tuple(device_field.pb_field.attrs)
+            keys = [key for key in message.values if key[: len(prefix)] == prefix]
+        else:
+            continue
+
+        for key in keys:
+            value = message.values[key]
+            if value.constant:
+                continue
+            candidates = value.candidates()
+            valid = [
+                candidate
+                for candidate in candidates
+                if _field_processes(
+                    device, device_field, message.build({key: candidate})
+                )
+            ]
+            if len(valid) < len(candidates):
+                value.constant = True
+                value.value = valid[0] if valid else value.value
+
+
+def _field_processes(device: DeviceBase, device_field: Field, data: Any) -> bool:
+    if isinstance(device_field, ProtobufRepeatedField):
+        data = device_field.get_list(data)
+    try:
+        device_field.__set__(device, data)
+    except Exception:  # noqa: BLE001
+        return False
+    return True
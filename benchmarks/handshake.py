@@ -0,0 +1,174 @@
+"""
+Connect and authentication time against a simulated peripheral
+
+Every run creates a new `Connection` and connects it to a `FakePeripheral` through
+`establish_connection` up to `AUTHENTICATED`. Total connect time and time spent in
+each connection state are reported, so handshake changes can be compared without
+hardware. Link latency, MTU and notification loss are configurable - with loss, runs
+that do not authenticate within the timeout are counted as failed.
+
+Usage::
+
+    python -m benchmarks.handshake --runs 50 --encrypt-type 7 --latency 0.01
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from . import install_package_stub
+
+install_package_stub()
+
+from custom_components.ef_ble.eflib.connection import (  # noqa: E402
+    Connection,
+    ConnectionState,
+)
+from custom_components.ef_ble.eflib.instrumentation import Histogram  # noqa: E402
+from custom_components.ef_ble.eflib.packet import Packet  # noqa: E402
+from custom_components.ef_ble.eflib.protocol_cache import ProtocolCache  # noqa: E402
+
+from .fake_peripheral import FakePeripheral  # noqa: E402
+
+SERIAL_NUMBER = "R351BENCHMARK001"
+USER_ID = "1234567890"
+CONNECT_BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+async def _data_parse(packet: Packet) -> bool:
+    return True
+
+
+async def _packet_parse(data: bytes) -> Packet:
+    return Packet.fromBytes(data)
+
+
+async def connect_once(
+    peripheral: FakePeripheral, timeout: float
+) -> tuple[ConnectionState, float, dict[ConnectionState, float]]:
+    """
+    Connect new connection to peripheral and disconnect it again
+
+    Returns
+    -------
+    Final state, total connect time in seconds and seconds spent in each state
+    """
+    connection = Connection(
+        peripheral.ble_device,
+        peripheral.serial_number,
+        USER_ID,
+        _data_parse,
+        _packet_parse,
+        encrypt_type=peripheral.encrypt_type,
+    ).with_client_class(peripheral.client_class)
+    # every run measures a cold connect with full service discovery
+    await connection._protocol_cache.async_load()
+    connection._protocol_cache.invalidate()
+
+    durations: dict[ConnectionState, float] = defaultdict(float)
+    last = [ConnectionState.CREATED, time.perf_counter()]
+
+    def _on_state(state: ConnectionState):
+        now = time.perf_counter()
+        durations[last[0]] += now - last[1]
+        last[:] = [state, now]
+
+    connection.on_state_change(_on_state)
+
+    start = time.perf_counter()
+    try:
+        await connection.connect()
+        state = await asyncio.wait_for(
+            connection.wait_until_authenticated_or_error(), timeout
+        )
+    except TimeoutError:
+        state = connection._connection_state
+    elapsed = time.perf_counter() - start
+
+    # reconnects would only add retry delays to the measurement
+    connection._retry_on_disconnect = False
+    await connection.disconnect()
+    durations.pop(ConnectionState.CREATED, None)
+    return state, elapsed, durations
+
+
+async def run(args: argparse.Namespace):
+    peripheral = FakePeripheral(
+        SERIAL_NUMBER,
+        encrypt_type=args.encrypt_type,
+        user_id=USER_ID,
+        latency=args.latency,
+        mtu=args.mtu,
+        loss=args.loss,
+        seed=args.seed,
+    )
+
+    total = Histogram(CONNECT_BUCKETS_MS)
+    per_state: dict[ConnectionState, Histogram] = defaultdict(
+        lambda: Histogram(CONNECT_BUCKETS_MS)
+    )
+    failed = 0
+
+    for _ in range(args.runs):
+        state, elapsed, durations = await connect_once(peripheral, args.timeout)
+        if state is not ConnectionState.AUTHENTICATED:
+            failed += 1
+            continue
+        total.add(elapsed * 1000)
+        for connection_state, duration in durations.items():
+            if connection_state is not ConnectionState.AUTHENTICATED:
+                per_state[connection_state].add(duration * 1000)
+
+    print(
+        f"encrypt type: {args.encrypt_type}  latency: {args.latency * 1000:.1f} ms  "
+        f"mtu: {args.mtu}  loss: {args.loss:.0%}"
+    )
+    print(f"runs: {args.runs}  authenticated: {total.count}  failed: {failed}")
+    print(
+        f"connect: mean {total.mean:.2f} ms  p50 {total.percentile(50):.2f} ms  "
+        f"p95 {total.percentile(95):.2f} ms  max {total.max:.2f} ms"
+    )
+
+    print(f"\n{'state':<26} {'mean [ms]':>10} {'max [ms]':>10}")
+    for connection_state in ConnectionState.step_order:
+        if (hist := per_state.get(connection_state)) is None:
+            continue
+        print(f"{connection_state:<26} {hist.mean:>10.3f} {hist.max:>10.3f}")
+    for connection_state, hist in per_state.items():
+        if connection_state not in ConnectionState.step_order:
+            print(f"{connection_state:<26} {hist.mean:>10.3f} {hist.max:>10.3f}")
+
+    return 1 if failed and not args.loss else 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--encrypt-type", type=int, choices=(1, 7), default=7)
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="one-way latency in seconds"
+    )
+    parser.add_argument("--mtu", type=int, default=247)
+    parser.add_argument(
+        "--loss", type=float, default=0.0, help="notification loss probability"
+    )
+    parser.add_argument("--timeout", type=float, default=5.0)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.ERROR)
+
+    # protocol params of simulated peripherals are not persisted with real ones
+    with tempfile.TemporaryDirectory() as cache_dir:
+        ProtocolCache.cache_file_for = staticmethod(  # type: ignore[method-assign]
+            lambda address: Path(cache_dir) / f"{address}_protocol.json"
+        )
+        return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
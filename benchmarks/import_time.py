@@ -0,0 +1,106 @@
+"""
+Import time of eflib and every device module, checked against a stored budget
+
+Each module is imported in a fresh interpreter with `-X importtime` and the cumulative
+import time of the module itself is taken, best of several runs. Modules exceeding
+their budget are reported and the script exits with non-zero status.
+
+Usage::
+
+    python -m benchmarks.import_time            # check against budget
+    python -m benchmarks.import_time --update   # store current times as budget
+"""
+
+import argparse
+import json
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+from . import ROOT
+
+BUDGET_FILE = Path(__file__).with_name("import_time_budget.json")
+PACKAGE = "custom_components.ef_ble.eflib"
+
+_STUB = "from benchmarks import install_package_stub; install_package_stub()"
+
+_IMPORT_TIME_LINE = re.compile(r"^import time:\s*(\d+)\s*\|\s*(\d+)\s*\|\s*(.+)$")
+
+
+def modules() -> list[str]:
+    """Return eflib and all device modules, found without importing them"""
+    device_dir = ROOT / "custom_components" / "ef_ble" / "eflib" / "devices"
+    return [PACKAGE] + [
+        f"{PACKAGE}.devices.{f.stem}"
+        for f in sorted(device_dir.glob("*.py"))
+        if not f.stem.startswith("_")
+    ]
+
+
+def measure(module: str, runs: int) -> int:
+    """Return cumulative import time of module in microseconds, best of runs"""
+    best = None
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"{_STUB}\nimport {module}"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        for line in result.stderr.splitlines():
+            if (match := _IMPORT_TIME_LINE.match(line)) and match[3].strip() == module:
+                cumulative = int(match[2])
+                best = cumulative if best is None else min(best, cumulative)
+                break
+    if best is None:
+        raise RuntimeError(f"No import time reported for {module}")
+    return best
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--update",
+        action="store_true",
+        help="write measured times multiplied by --headroom as the new budget",
+    )
+    parser.add_argument("--headroom", type=float, default=1.5)
+    parser.add_argument("modules", nargs="*", help="modules to measure, default all")
+    args = parser.parse_args(argv)
+
+    budget: dict[str, int] = (
+        json.loads(BUDGET_FILE.read_text()) if BUDGET_FILE.exists() else {}
+    )
+    over_budget = []
+
+    print(f"{'module':<55} {'time [ms]':>10} {'budget [ms]':>12}")
+    for module in args.modules or modules():
+        elapsed = measure(module, args.runs)
+        limit = budget.get(module)
+        status = ""
+        if args.update:
+            budget[module] = int(elapsed * args.headroom)
+        elif limit is not None and elapsed > limit:
+            over_budget.append(module)
+            status = "  OVER BUDGET"
+        limit_ms = "-" if limit is None else f"{limit / 1000:.1f}"
+        print(f"{module:<55} {elapsed / 1000:>10.1f} {limit_ms:>12}{status}")
+
+    if args.update:
+        BUDGET_FILE.write_text(
+            json.dumps(dict(sorted(budget.items())), indent=2) + "\n"
+        )
+        print(f"Budget written to {BUDGET_FILE.relative_to(ROOT)}")
+        return 0
+
+    if over_budget:
+        print(f"{len(over_budget)} module(s) over import time budget")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,416 @@
+"""
+Many simulated devices of mixed models on one event loop
+
+Every simulated device is a real `DeviceBase` connected through `establish_connection`
+to its own `FakePeripheral`, which streams packets of a `HeartbeatGenerator` once
+authenticated. Measurement starts after all devices are connected and reports:
+
+- CPU time per device by model - time spent in the notification handler (receive,
+  reassemble, decrypt) and in packet and data parsing including entity callbacks
+- CPU time of the whole process, which also includes the simulated peripherals
+- event loop lag - how late a periodic timer wakes up
+- publish latency - time from a packet with changed values leaving the peripheral to
+  the first entity callback of its device
+
+Usage::
+
+    python -m benchmarks.load_test --devices 100 --packet-rate 2 --duration 30
+    python -m benchmarks.load_test --devices 20 --models delta2_max,river3,dpu
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from . import install_package_stub
+
+install_package_stub()
+
+from custom_components.ef_ble.eflib.connection import ConnectionState  # noqa: E402
+from custom_components.ef_ble.eflib.devicebase import DeviceBase  # noqa: E402
+from custom_components.ef_ble.eflib.devices import SN_PREFIXES  # noqa: E402
+from custom_components.ef_ble.eflib.instrumentation import Histogram  # noqa: E402
+from custom_components.ef_ble.eflib.packet import Packet  # noqa: E402
+from custom_components.ef_ble.eflib.protocol_cache import ProtocolCache  # noqa: E402
+
+from .fake_peripheral import FakePeripheral  # noqa: E402
+from .generators import (  # noqa: E402
+    HeartbeatGenerator,
+    create_device,
+    serial_number_for,
+)
+
+USER_ID = "1234567890"
+LAG_BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000)
+LATENCY_BUCKETS_MS = (0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+# interval of the timer measuring event loop lag
+LAG_INTERVAL = 0.05
+
+
+@dataclass
+class SimulatedDevice:
+    """Device connected to simulated peripheral streaming generated heartbeats"""
+
+    model: str
+    generator: HeartbeatGenerator
+    peripheral: FakePeripheral
+    device: DeviceBase
+    parse_time: float = 0.0
+    packets: int = 0
+    errors: int = 0
+    # when the oldest packet with changed values not published yet was sent
+    pending_since: float | None = None
+
+    @property
+    def cpu_time(self) -> float:
+        return self.peripheral.stats.handler_time + self.parse_time
+
+
+@dataclass
+class ModelStats:
+    devices: int = 0
+    packets: int = 0
+    cpu_time: float = 0.0
+    publish_latency: Histogram = field(
+        default_factory=lambda: Histogram(LATENCY_BUCKETS_MS)
+    )
+
+    def as_dict(self, duration: float) -> dict[str, Any]:
+        return {
+            "devices": self.devices,
+            "packets": self.packets,
+            "cpu_per_device": round(self.cpu_time / self.devices / duration, 6),
+            "us_per_packet": round(self.cpu_time / max(self.packets, 1) * 1e6, 1),
+            "publish_latency": self.publish_latency.as_dict(),
+        }
+
+
+@dataclass
+class LoadTestStats:
+    devices: int = 0
+    connected: int = 0
+    duration: float = 0.0
+    packets: int = 0
+    publishes: int = 0
+    errors: int = 0
+    process_cpu: float = 0.0
+    loop_lag: Histogram = field(default_factory=lambda: Histogram(LAG_BUCKETS_MS))
+    publish_latency: Histogram = field(
+        default_factory=lambda: Histogram(LATENCY_BUCKETS_MS)
+    )
+    models: dict[str, ModelStats] = field(
+        default_factory=lambda: defaultdict(ModelStats)
+    )
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "devices": self.devices,
+            "connected": self.connected,
+            "duration": round(self.duration, 3),
+            "packets": self.packets,
+            "publishes": self.publishes,
+            "errors": self.errors,
+            "process_cpu": round(self.process_cpu / self.duration, 6),
+            "process_cpu_per_device": round(
+                self.process_cpu / self.duration / max(self.connected, 1), 6
+            ),
+            "loop_lag": self.loop_lag.as_dict(),
+            "publish_latency": self.publish_latency.as_dict(),
+            "models": {
+                model: stats.as_dict(self.duration)
+                for model, stats in sorted(self.models.items())
+            },
+        }
+
+
+class _StampedHeartbeats:
+    """Heartbeats of generator, marking when changed values are sent"""
+
+    def __init__(self, simulated: SimulatedDevice) -> None:
+        self._simulated = simulated
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> Packet:
+        simulated = self._simulated
+        packet = next(simulated.generator)
+        if simulated.generator.changed and simulated.pending_since is None:
+            simulated.pending_since = time.perf_counter()
+        return packet
+
+
+class LoadTest:
+    """
+    Runs simulated devices on the current event loop
+
+    Parameters
+    ----------
+    models
+        Device models cycled through when creating devices, see `SN_PREFIXES`
+    devices
+        Number of simulated devices
+    packet_rate, optional
+        Heartbeats per second sent by every device
+    change_rate, optional
+        Probability of each value changing between heartbeats of the same message
+    update_period, optional
+        Device update period in seconds, throttles entity callbacks
+    latency, optional
+        One-way link latency of simulated peripherals in seconds
+    seed, optional
+        Seed of heartbeat generators
+    """
+
+    def __init__(
+        self,
+        models: list[str],
+        devices: int,
+        *,
+        packet_rate: float = 1.0,
+        change_rate: float = 0.1,
+        update_period: int = 0,
+        latency: float = 0.0,
+        seed: int | None = None,
+    ) -> None:
+        self._models = models
+        self._devices = devices
+        self._packet_rate = packet_rate
+        self._change_rate = change_rate
+        self._update_period = update_period
+        self._latency = latency
+        self._seed = seed
+
+        self.simulated: list[SimulatedDevice] = []
+        self.stats = LoadTestStats(devices=devices)
+        self._measuring = False
+
+    async def run(self, duration: float, connect_timeout: float = 30.0):
+        """Connect all devices, measure for duration in seconds and disconnect"""
+        for index, model in zip(
+            range(self._devices), itertools.cycle(self._models), strict=False
+        ):
+            self.simulated.append(await self._create(model, index))
+
+        try:
+            states = await asyncio.gather(
+                *(
+                    self._connect(simulated, connect_timeout)
+                    for simulated in self.simulated
+                )
+            )
+            self.stats.connected = states.count(ConnectionState.AUTHENTICATED)
+            await self._measure(duration)
+        finally:
+            for simulated in self.simulated:
+                simulated.device.with_disabled_reconnect()
+            await asyncio.gather(
+                *(simulated.device.disconnect() for simulated in self.simulated)
+            )
+        return self.stats
+
+    async def _create(self, model: str, index: int) -> SimulatedDevice:
+        generator = await HeartbeatGenerator.create(
+            model,
+            change_rate=self._change_rate,
+            seed=None if self._seed is None else self._seed + index,
+        )
+        serial_number = serial_number_for(model, index)
+        peripheral = FakePeripheral(
+            serial_number,
+            heartbeat_interval=1 / self._packet_rate,
+            latency=self._latency,
+            seed=None if self._seed is None else self._seed + index,
+        )
+        device = (
+            create_device(serial_number, peripheral.ble_device)
+            .with_client_class(peripheral.client_class)
+            .with_update_period(self._update_period)
+        )
+        simulated = SimulatedDevice(model, generator, peripheral, device)
+        peripheral.heartbeats = _StampedHeartbeats(simulated)
+        self._instrument(simulated)
+        return simulated
+
+    def _instrument(self, simulated: SimulatedDevice):
+        device = simulated.device
+        data_parse = device.data_parse
+        packet_parse = device.packet_parse
+        stats = self.stats
+        model_latency = stats.models[simulated.model].publish_latency
+
+        async def _packet_parse(data: bytes):
+            start = time.perf_counter()
+            try:
+                return await packet_parse(data)
+            finally:
+                simulated.parse_time += time.perf_counter() - start
+
+        async def _data_parse(packet: Packet):
+            start = time.perf_counter()
+            simulated.packets += 1
+            try:
+                return await data_parse(packet)
+            except Exception:
+                simulated.errors += 1
+                raise
+            finally:
+                simulated.parse_time += time.perf_counter() - start
+
+        # stand-in for Home Assistant entities, one callback for every field
+        def _entity_callback():
+            if simulated.pending_since is None:
+                return
+            if self._measuring:
+                latency = (time.perf_counter() - simulated.pending_since) * 1000
+                stats.publish_latency.add(latency)
+                model_latency.add(latency)
+                stats.publishes += 1
+            simulated.pending_since = None
+
+        # connection is created on connect and takes parse functions from the device
+        device.packet_parse = _packet_parse
+        device.data_parse = _data_parse
+        for prop in device._fields:
+            device.register_callback(_entity_callback, prop.public_name)
+
+    async def _connect(self, simulated: SimulatedDevice, timeout: float):
+        await simulated.device.connect(user_id=USER_ID)
+        try:
+            return await asyncio.wait_for(
+                simulated.device.wait_until_authenticated_or_error(), timeout
+            )
+        except TimeoutError:
+            return simulated.device.connection_state
+
+    async def _measure(self, duration: float):
+        start_cpu = {id(sim): (sim.cpu_time, sim.packets) for sim in self.simulated}
+        errors = sum(simulated.errors for simulated in self.simulated)
+
+        self._measuring = True
+        process_start = time.process_time()
+        start = time.perf_counter()
+        await self._monitor_loop_lag(start + duration)
+        self.stats.duration = time.perf_counter() - start
+        self.stats.process_cpu = time.process_time() - process_start
+        self._measuring = False
+
+        stats = self.stats
+        stats.errors = sum(sim.errors for sim in self.simulated) - errors
+        for simulated in self.simulated:
+            cpu_time, packets = start_cpu[id(simulated)]
+            model = stats.models[simulated.model]
+            model.devices += 1
+            model.cpu_time += simulated.cpu_time - cpu_time
+            model.packets += simulated.packets - packets
+            stats.packets += simulated.packets - packets
+
+    async def _monitor_loop_lag(self, until: float):
+        loop = asyncio.get_running_loop()
+        while time.perf_counter() < until:
+            expected = loop.time() + LAG_INTERVAL
+            await asyncio.sleep(LAG_INTERVAL)
+            self.stats.loop_lag.add(max(loop.time() - expected, 0) * 1000)
+
+
+def _print_stats(stats: LoadTestStats):
+    duration = stats.duration
+    print(
+        f"devices: {stats.devices}  connected: {stats.connected}  "
+        f"duration: {duration:.1f} s"
+    )
+    print(
+        f"packets: {stats.packets} ({stats.packets / duration:.1f}/s)  "
+        f"publishes: {stats.publishes}  errors: {stats.errors}"
+    )
+    print(
+        f"process CPU: {stats.process_cpu / duration:.1%}  "
+        f"per device: {stats.process_cpu / duration / max(stats.connected, 1):.3%}"
+    )
+    for name, hist in (
+        ("loop lag", stats.loop_lag),
+        ("publish latency", stats.publish_latency),
+    ):
+        print(
+            f"{name}: p50 {hist.percentile(50):.2f} ms  p95 "
+            f"{hist.percentile(95):.2f} ms  p99 {hist.percentile(99):.2f} ms  "
+            f"max {hist.max:.2f} ms"
+        )
+
+    print(
+        f"\n{'model':<22} {'devices':>7} {'packets':>8} {'cpu/device':>11} "
+        f"{'us/packet':>10} {'p95 publish [ms]':>17}"
+    )
+    for model, model_stats in sorted(stats.models.items()):
+        values = model_stats.as_dict(duration)
+        print(
+            f"{model:<22} {model_stats.devices:>7} {model_stats.packets:>8} "
+            f"{values['cpu_per_device']:>11.3%} {values['us_per_packet']:>10.1f} "
+            f"{model_stats.publish_latency.percentile(95):>17.2f}"
+        )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--devices", type=int, default=20)
+    parser.add_argument(
+        "--models",
+        default=",".join(SN_PREFIXES),
+        help="comma separated device modules, cycled through when creating devices",
+    )
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument(
+        "--packet-rate", type=float, default=1.0, help="heartbeats per second"
+    )
+    parser.add_argument("--change-rate", type=float, default=0.1)
+    parser.add_argument("--update-period", type=int, default=0)
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="one-way latency in seconds"
+    )
+    parser.add_argument("--connect-timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--json", action="store_true", help="print stats as JSON")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.ERROR)
+    # device loggers log connects and disconnects of every device above root level
+    logging.disable(logging.WARNING)
+
+    models = [model for model in args.models.split(",") if model]
+    if unknown := [model for model in models if model not in SN_PREFIXES]:
+        parser.error(f"unknown models: {', '.join(unknown)}")
+
+    load_test = LoadTest(
+        models,
+        args.devices,
+        packet_rate=args.packet_rate,
+        change_rate=args.change_rate,
+        update_period=args.update_period,
+        latency=args.latency,
+        seed=args.seed,
+    )
+
+    # protocol params of simulated peripherals are not persisted with real ones
+    with tempfile.TemporaryDirectory() as cache_dir:
+        ProtocolCache.cache_file_for = staticmethod(  # type: ignore[method-assign]
+            lambda address: Path(cache_dir) / f"{address}_protocol.json"
+        )
+        stats = asyncio.run(load_test.run(args.duration, args.connect_timeout))
+
+    if args.json:
+        print(json.dumps(stats.as_dict(), indent=2))
+    else:
+        _print_stats(stats)
+    return 0 if stats.connected == stats.devices else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
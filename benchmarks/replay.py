@@ -0,0 +1,490 @@
+"""
+Offline replay of captured notification streams through the receive path
+
+Captured frames are fed to a real `Connection` of the device class matching the
+capture's serial number, without any BLE involved - each frame goes through
+`FrameAssembler.reassemble`, the device's `packet_parse` (`Packet.fromBytes`), the
+inbound packet queue, `data_parse` and the field callbacks, the same way notifications
+do when connected. Writes the device makes in response are encoded and dropped.
+
+Captures are read from either of:
+
+- test modules in `tests/eflib` - decrypted payloads from the `packet_sequence`
+  fixture, encrypted with a synthetic session key before replay
+- diagnostics dumps downloaded from Home Assistant - `raw_data_messages` with their
+  session key and IV, diagnostics encryption has to be disabled for the dump
+
+In the default max speed mode frames are replayed back to back and throughput with
+time spent in each stage is reported. `--realtime` keeps the original inter-arrival
+times instead, so queueing and throttling behave as they did on the device.
+
+Usage::
+
+    python -m benchmarks.replay tests/eflib/test_delta2_max.py --repeat 1000
+    python -m benchmarks.replay diagnostics.json --realtime --speed 10
+"""
+
+import argparse
+import ast
+import asyncio
+import hashlib
+import json
+import sys
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from bleak.backends.device import BLEDevice
+from bleak.backends.scanner import AdvertisementData
+
+from . import install_package_stub, manufacturer_data
+
+install_package_stub()
+
+from custom_components.ef_ble.eflib.connection import (  # noqa: E402
+    Connection,
+    ConnectionState,
+)
+from custom_components.ef_ble.eflib.devicebase import DeviceBase  # noqa: E402
+from custom_components.ef_ble.eflib.devices import device_class_for  # noqa: E402
+from custom_components.ef_ble.eflib.encryption import (  # noqa: E402
+    Type1Encryption,
+    Type7Encryption,
+)
+from custom_components.ef_ble.eflib.frame_assembler import (  # noqa: E402
+    EncPacketAssembler,
+    FrameAssembler,
+    RawHeaderAssembler,
+)
+from custom_components.ef_ble.eflib.instrumentation import Histogram  # noqa: E402
+
+if TYPE_CHECKING:
+    from custom_components.ef_ble.eflib.packet import Packet
+
+# per-frame stage durations are mostly well under a millisecond
+STAGE_BUCKETS_MS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100)
+STAGES = ("reassemble", "packet_parse", "data_parse", "callbacks")
+
+_REPLAY_ADDRESS = "00:00:00:00:00:00"
+
+
+@dataclass
+class Capture:
+    """
+    Notification stream of a single device
+
+    Parameters
+    ----------
+    serial_number
+        Serial number of the captured device, selects device class
+    frames
+        Raw notification data with seconds since start of capture
+    session_key
+        Session key the frames are encrypted with
+    iv
+        Initialization vector of the session
+    encrypt_type
+        Encryption type of the device, selects frame assembler
+    """
+
+    serial_number: str
+    frames: list[tuple[float, bytes]]
+    session_key: bytes
+    iv: bytes
+    encrypt_type: int = 7
+
+    @property
+    def duration(self) -> float:
+        return self.frames[-1][0] - self.frames[0][0] if self.frames else 0.0
+
+
+def _frame_assembler(
+    encrypt_type: int, session_key: bytes, iv: bytes
+) -> FrameAssembler:
+    match encrypt_type:
+        case 1:
+            return RawHeaderAssembler(Type1Encryption(session_key, iv))
+        case 7:
+            return EncPacketAssembler(Type7Encryption(session_key, iv))
+        case _:
+            raise ValueError(f"Unsupported encryption type: {encrypt_type}")
+
+
+def fixture_return(tree: ast.Module, fixture: str) -> list[str]:
+    """Return literal list returned by fixture of parsed test module"""
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.FunctionDef) or node.name != fixture:
+            continue
+        for statement in ast.walk(node):
+            if isinstance(statement, ast.Return) and statement.value is not None:
+                return ast.literal_eval(statement.value)
+    raise ValueError(f"No '{fixture}' fixture returning literal list found")
+
+
+def device_serial_number(tree: ast.Module) -> str:
+    """Return serial number of the first device created in parsed test module"""
+    for node in ast.walk(tree):
+        if (
+            isinstance(node, ast.Call)
+            and isinstance(node.func, ast.Name)
+            and node.func.id == "Device"
+            and len(node.args) == 3
+            and isinstance(node.args[2], ast.Constant)
+        ):
+            return node.args[2].value
+    raise ValueError("No 'Device(ble_dev, adv_data, <serial number>)' call found")
+
+
+def load_test_capture(
+    path: Path,
+    fixture: str = "packet_sequence",
+    encrypt_type: int = 7,
+    frame_interval: float = 0.5,
+) -> Capture:
+    """
+    Load decrypted payloads from test module and encrypt them as the device would
+
+    Parameters
+    ----------
+    path
+        Path to test module with payload fixture and device construction
+    fixture, optional
+        Name of the fixture returning hex encoded payloads
+    encrypt_type, optional
+        Encryption type the payloads are framed with
+    frame_interval, optional
+        Seconds between frames, test captures carry no timing
+    """
+    tree = ast.parse(path.read_text(), filename=str(path))
+    serial_number = device_serial_number(tree)
+    payloads = [bytes.fromhex(p) for p in fixture_return(tree, fixture)]
+
+    # same derivation as type 1 session keys, any fixed key would do
+    session_key = hashlib.md5(serial_number.encode()).digest()
+    iv = hashlib.md5(serial_number[::-1].encode()).digest()
+
+    assembler = _frame_assembler(encrypt_type, session_key, iv)
+
+    async def _encode():
+        return [await assembler.encode_bytes(payload) for payload in payloads]
+
+    frames = asyncio.run(_encode())
+    return Capture(
+        serial_number=serial_number,
+        frames=[(i * frame_interval, frame) for i, frame in enumerate(frames)],
+        session_key=session_key,
+        iv=iv,
+        encrypt_type=encrypt_type,
+    )
+
+
+def load_diagnostics_capture(path: Path) -> Capture:
+    """Load `raw_data_messages` from unencrypted Home Assistant diagnostics dump"""
+    dump = json.loads(path.read_text())
+    data = dump.get("data", dump)
+
+    if "session" in data:
+        raise ValueError(
+            "Diagnostics dump is encrypted, disable diagnostics encryption in "
+            "integration options and download it again"
+        )
+    if not data.get("raw_data_messages"):
+        raise ValueError(
+            "Diagnostics dump contains no raw data messages, enable packet "
+            "collection in integration options"
+        )
+
+    manufacturer_data = bytes.fromhex(data["manufacturer_data"])
+    capability_flags = manufacturer_data[22] if len(manufacturer_data) > 22 else 0
+    return Capture(
+        serial_number=manufacturer_data[1:17].decode().rstrip("\x00"),
+        frames=[(t, bytes.fromhex(frame)) for t, frame in data["raw_data_messages"]],
+        session_key=bytes.fromhex(data["session_key"]),
+        iv=bytes.fromhex(data["iv"]),
+        encrypt_type=(capability_flags & 0b0111000) >> 3,
+    )
+
+
+def load_capture(path: Path, **kwargs) -> Capture:
+    """Load capture from test module or diagnostics dump based on file extension"""
+    if path.suffix == ".py":
+        return load_test_capture(path, **kwargs)
+    return load_diagnostics_capture(path)
+
+
+@dataclass
+class ReplayStats:
+    """Result of a single replay run"""
+
+    frames: int = 0
+    packets: int = 0
+    processed: int = 0
+    callbacks: int = 0
+    errors: int = 0
+    elapsed: float = 0.0
+    # how late frames were fed compared to the capture, only in real time mode
+    max_lag: float = 0.0
+    stages: dict[str, Histogram] = field(
+        default_factory=lambda: {stage: Histogram(STAGE_BUCKETS_MS) for stage in STAGES}
+    )
+
+    @property
+    def frames_per_second(self) -> float:
+        return self.frames / self.elapsed if self.elapsed else 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "frames": self.frames,
+            "packets": self.packets,
+            "processed": self.processed,
+            "callbacks": self.callbacks,
+            "errors": self.errors,
+            "elapsed": round(self.elapsed, 6),
+            "frames_per_second": round(self.frames_per_second, 1),
+            "max_lag": round(self.max_lag, 6),
+            "stages": {name: hist.as_dict() for name, hist in self.stages.items()},
+        }
+
+
+class Replay:
+    """
+    Replays capture through a connection of newly created device
+
+    Parameters
+    ----------
+    capture
+        Frames to replay
+    update_period, optional
+        Device update period in seconds, 0 runs callbacks for every update
+    """
+
+    def __init__(self, capture: Capture, update_period: int = 0) -> None:
+        self._capture = capture
+        self._update_period = update_period
+        self.stats = ReplayStats()
+        # time spent in callbacks of the data_parse call currently running
+        self._callback_time = 0.0
+
+    def _timed[**P, R](
+        self, stage: str, func: Callable[P, Awaitable[R]]
+    ) -> Callable[P, Awaitable[R]]:
+        histogram = self.stats.stages[stage]
+
+        async def _wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                histogram.add((time.perf_counter() - start) * 1000)
+
+        return _wrapper
+
+    def _create_device(self) -> tuple[DeviceBase, Connection]:
+        capture = self._capture
+        device_class = device_class_for(capture.serial_number.encode())
+        ble_dev = BLEDevice(_REPLAY_ADDRESS, None, None)
+        adv_data = AdvertisementData(
+            local_name=None,
+            manufacturer_data={
+                device_class.MANUFACTURER_KEY: manufacturer_data(
+                    capture.serial_number, capture.encrypt_type
+                )
+            },
+            service_data={},
+            service_uuids=[],
+            tx_power=None,
+            rssi=0,
+            platform_data=(),
+        )
+        device = device_class(ble_dev, adv_data, capture.serial_number)
+        device.with_update_period(self._update_period)
+
+        stats = self.stats
+        data_parse_hist = stats.stages["data_parse"]
+
+        async def _data_parse(packet: "Packet") -> bool:
+            self._callback_time = 0.0
+            start = time.perf_counter()
+            processed = await device.data_parse(packet)
+            # callbacks run from within data_parse, they are counted separately
+            elapsed = time.perf_counter() - start - self._callback_time
+            data_parse_hist.add(elapsed * 1000)
+            stats.packets += 1
+            stats.processed += bool(processed)
+            return processed
+
+        connection = (
+            Connection(
+                ble_dev=ble_dev,
+                dev_sn=capture.serial_number,
+                user_id="",
+                data_parse=_data_parse,
+                packet_parse=self._timed("packet_parse", device.packet_parse),
+                packet_version=device.packet_version,
+                encrypt_type=capture.encrypt_type,
+                auth_header_dst=device.auth_header_dst,
+            )
+            .with_coalesced_routes(device.HEARTBEAT_ROUTES)
+            .with_min_write_interval(device.MIN_WRITE_INTERVAL)
+        )
+        assembler = _frame_assembler(
+            capture.encrypt_type, capture.session_key, capture.iv
+        )
+        assembler.reassemble = self._timed("reassemble", assembler.reassemble)
+        connection._encryption = assembler._encryption
+        connection._frame_assembler = assembler
+
+        add_error = connection.add_error
+
+        async def _add_error(exception: Exception):
+            stats.errors += 1
+            await add_error(exception)
+
+        connection.add_error = _add_error
+        connection._set_state(ConnectionState.AUTHENTICATED)
+        device._conn = connection
+
+        # stand-in for Home Assistant entities, one callback for every field
+        update_callback = device.update_callback
+        callback_hist = stats.stages["callbacks"]
+
+        def _update_callback(propname: str):
+            start = time.perf_counter()
+            update_callback(propname)
+            elapsed = time.perf_counter() - start
+            self._callback_time += elapsed
+            callback_hist.add(elapsed * 1000)
+
+        def _entity_callback():
+            stats.callbacks += 1
+
+        device.update_callback = _update_callback
+        for prop in device._fields:
+            device.register_callback(_entity_callback, prop.public_name)
+
+        return device, connection
+
+    async def run(self, realtime: bool = False, speed: float = 1.0, repeat: int = 1):
+        """
+        Replay capture and return collected stats
+
+        Parameters
+        ----------
+        realtime, optional
+            Keep inter-arrival times of frames, otherwise frames are fed back to back
+            and each is fully processed before the next one
+        speed, optional
+            Time scale of real time replay, 2 replays twice as fast
+        repeat, optional
+            Number of times the capture is replayed
+        """
+        device, connection = self._create_device()
+        frames = self._capture.frames
+        stats = self.stats
+
+        try:
+            start = time.perf_counter()
+            for iteration in range(repeat):
+                offset = iteration * (self._capture.duration + 1)
+                for timestamp, frame in frames:
+                    if realtime:
+                        due = start + (timestamp - frames[0][0] + offset) / speed
+                        if (delay := due - time.perf_counter()) > 0:
+                            await asyncio.sleep(delay)
+                        stats.max_lag = max(stats.max_lag, time.perf_counter() - due)
+
+                    await connection.listenForDataHandler(
+                        None,  # pyright: ignore[reportArgumentType]
+                        bytearray(frame),
+                    )
+                    stats.frames += 1
+                    if not realtime:
+                        await connection._inbound.join()
+
+            await connection._inbound.join()
+            stats.elapsed = time.perf_counter() - start
+        finally:
+            connection._inbound.stop()
+            connection._commands.stop()
+            connection._cancel_tasks()
+
+        self.device = device
+        return stats
+
+
+def _print_stats(stats: ReplayStats, realtime: bool):
+    print(
+        f"frames: {stats.frames}  packets: {stats.packets}  "
+        f"processed: {stats.processed}  callbacks: {stats.callbacks}  "
+        f"errors: {stats.errors}"
+    )
+    print(
+        f"elapsed: {stats.elapsed:.3f} s  "
+        f"throughput: {stats.frames_per_second:.1f} frames/s"
+    )
+    if realtime:
+        print(f"max lag: {stats.max_lag * 1000:.3f} ms")
+
+    print(
+        f"\n{'stage':<14} {'count':>8} {'total [ms]':>11} {'mean [us]':>10} "
+        f"{'p95 [us]':>9} {'max [us]':>9}"
+    )
+    for name, hist in stats.stages.items():
+        print(
+            f"{name:<14} {hist.count:>8} {hist.total:>11.2f} "
+            f"{hist.mean * 1000:>10.1f} {hist.percentile(95) * 1000:>9.1f} "
+            f"{hist.max * 1000:>9.1f}"
+        )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("capture", type=Path, help="test module or diagnostics dump")
+    parser.add_argument(
+        "--realtime",
+        action="store_true",
+        help="keep original inter-arrival times of frames",
+    )
+    parser.add_argument("--speed", type=float, default=1.0)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument(
+        "--update-period",
+        type=int,
+        default=0,
+        help="device update period in seconds, throttles callbacks",
+    )
+    parser.add_argument("--fixture", default="packet_sequence")
+    parser.add_argument("--encrypt-type", type=int, choices=(1, 7), default=7)
+    parser.add_argument("--frame-interval", type=float, default=0.5)
+    parser.add_argument("--json", action="store_true", help="print stats as JSON")
+    args = parser.parse_args(argv)
+
+    capture = load_capture(
+        args.capture,
+        **(
+            {
+                "fixture": args.fixture,
+                "encrypt_type": args.encrypt_type,
+                "frame_interval": args.frame_interval,
+            }
+            if args.capture.suffix == ".py"
+            else {}
+        ),
+    )
+    replay = Replay(capture, update_period=args.update_period)
+    stats = asyncio.run(
+        replay.run(realtime=args.realtime, speed=args.speed, repeat=args.repeat)
+    )
+
+    if args.json:
+        print(json.dumps(stats.as_dict(), indent=2))
+    else:
+        print(f"{replay.device.device} ({capture.serial_number})")
+        _print_stats(stats, args.realtime)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
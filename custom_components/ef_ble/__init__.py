@@ -1,19 +1,22 @@
 """The unofficial EcoFlow BLE devices integration"""
 
+import asyncio
 import logging
 from functools import partial
+from typing import Any
 
 import homeassistant.helpers.issue_registry as ir
+from bleak.backends.scanner import AdvertisementData
 from homeassistant.components import bluetooth
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import CONF_ADDRESS, Platform
-from homeassistant.core import HomeAssistant
-from homeassistant.exceptions import (
-    ConfigEntryError,
-    ConfigEntryNotReady,
-)
+from homeassistant.const import CONF_ADDRESS, EVENT_HOMEASSISTANT_STOP, Platform
+from homeassistant.core import Event, HomeAssistant
+from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.helpers import config_validation as cv
 from homeassistant.helpers import device_registry as dr
 from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.typing import ConfigType
 
 from . import eflib
 from .config_flow import CONF_COLLECT_PACKETS, ConfLogOptions, LogOptions, PacketVersion
@@ -24,9 +27,12 @@ from .const import (
     CONF_CONNECTION_TIMEOUT,
     CONF_DIAGNOSTICS_OPTIONS,
     CONF_EXTRA_BATTERY,
+    CONF_LOOP_MONITOR,
     CONF_PACKET_VERSION,
+    CONF_STAGE_TIMINGS,
     CONF_UPDATE_PERIOD,
     CONF_USER_ID,
+    CONF_WRITE_BATCHING,
     DEFAULT_CONNECTION_TIMEOUT,
     DEFAULT_UPDATE_PERIOD,
     DOMAIN,
@@ -39,6 +45,8 @@ from .eflib.connection import (
 )
 from .eflib.exceptions import AuthErrors
 from .eflib.logging_util import ConnectionLog
+from .eflib.protocol_cache import ProtocolCache
+from .services import async_setup_services
 
 PLATFORMS: list[Platform] = [
     Platform.BUTTON,
@@ -53,8 +61,19 @@ type DeviceConfigEntry = ConfigEntry[eflib.DeviceBase]
 
 _LOGGER = logging.getLogger(__name__)
 
+STATE_STORE_VERSION = 1
+CONNECT_RETRY_DELAY = 10
+CONNECT_RETRY_MAX_DELAY = 300
+
 ConfigEntryNotReady = partial(ConfigEntryNotReady, translation_domain=DOMAIN)
-ConfigEntryError = partial(ConfigEntryError, translation_domain=DOMAIN)
+
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up services of the integration"""
+    async_setup_services(hass)
+    return True
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: DeviceConfigEntry) -> bool:
@@ -75,15 +94,19 @@ async def async_setup_entry(hass: HomeAssistant, entry: DeviceConfigEntry) -> bo
     if not bluetooth.async_address_present(hass, address):
         raise ConfigEntryNotReady(translation_key="device_not_present")
 
-    _LOGGER.debug("Connecting Device")
+    _LOGGER.debug("Creating Device")
     device: eflib.DeviceBase | None = getattr(entry, "runtime_data", None)
     if device is None:
         discovery_info = bluetooth.async_last_service_info(
             hass, address, connectable=True
         )
-        device = eflib.NewDevice(discovery_info.device, discovery_info.advertisement)
-        if device is None:
+        # device and protobuf modules are loaded on first use, which blocks the loop
+        discovered = await hass.async_add_executor_job(
+            _identify_device, discovery_info.advertisement
+        )
+        if discovered is None:
             raise ConfigEntryNotReady(translation_key="unable_to_create_device")
+        device = discovered.create(discovery_info.device, discovery_info.advertisement)
 
         entry.runtime_data = device
 
@@ -97,90 +120,165 @@ async def async_setup_entry(hass: HomeAssistant, entry: DeviceConfigEntry) -> bo
     options = Connection.Options(
         timeout=timeout,
         bluez_start_notify=advanced.get(CONF_BLUEZ_START_NOTIFY, False),
+        write_batching=advanced.get(CONF_WRITE_BATCHING, False),
+    )
+
+    (
+        device.with_update_period(update_period)
+        .with_logging_options(ConfLogOptions.from_config(merged_options))
+        .with_disabled_reconnect()
+        .with_packet_version(packet_version.to_num())
+        .with_enabled_packet_diagnostics(packet_collection_enabled)
+        .with_stage_timings(diag_options.get(CONF_STAGE_TIMINGS, False))
+        .with_loop_monitor(diag_options.get(CONF_LOOP_MONITOR, False))
+        .with_connection_options(options)
+    )
+
+    # entities are defined by the device class, so they can be created before the
+    # device connects - they show last known state until live data arrives
+    snapshot = await _state_store(hass, address).async_load()
+    if snapshot is not None and snapshot.get("device") == type(device).__name__:
+        device.restore_state(snapshot.get("fields", {}))
+
+    async def _save_state_on_stop(event: Event):
+        await _async_save_state(hass, device)
+
+    entry.async_on_unload(
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, _save_state_on_stop)
     )
+
+    _LOGGER.debug("Creating entities")
+    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+
+    _LOGGER.debug("Setup done")
+    entry.async_on_unload(entry.add_update_listener(_update_listener))
+
+    entry.async_create_background_task(
+        hass,
+        _connect_in_background(hass, entry, device, user_id, timeout),
+        f"{DOMAIN}_connect_{address}",
+    )
+
+    return True
+
+
+async def _connect_in_background(
+    hass: HomeAssistant,
+    entry: DeviceConfigEntry,
+    device: eflib.DeviceBase,
+    user_id: str,
+    timeout: int,
+):
+    """Connect to the device, retrying with increasing delay until authenticated"""
     issue_id = f"{entry.entry_id}_max_connection_attempts"
+    delay = CONNECT_RETRY_DELAY
 
-    try:
-        await (
-            device.with_update_period(update_period)
-            .with_logging_options(ConfLogOptions.from_config(merged_options))
-            .with_disabled_reconnect()
-            .with_packet_version(packet_version.to_num())
-            .with_enabled_packet_diagnostics(packet_collection_enabled)
-            .with_connection_options(options)
-            .connect(
+    while True:
+        try:
+            await device.connect(
                 user_id=user_id,
                 max_attempts=0 if eflib.is_solar_only(device) else None,
             )
-        )
-        state = await device.wait_until_authenticated_or_error(raise_on_error=True)
-    except (ConnectionTimeout, BleakError, TimeoutError) as e:
-        raise ConfigEntryNotReady(
-            translation_key="could_not_connect",
-            translation_placeholders={"time": str(timeout)},
-        ) from e
-    except AuthErrors.BaseException as e:
-        raise ConfigEntryNotReady(translation_key="authentication_failed") from e
-    except MaxConnectionAttemptsReached as e:
-        await device.disconnect()
-        ir.async_create_issue(
-            hass,
-            DOMAIN,
-            issue_id,
-            is_fixable=False,
-            severity=ir.IssueSeverity.ERROR,
-            translation_key="max_connection_attempts_reached",
-            translation_placeholders={
-                "device_name": device.name,
-                "attempts": str(e.attempts),
-            },
-        )
-        raise ConfigEntryError(
-            translation_key="could_not_connect_no_retry",
-            translation_placeholders={"attempts": str(e.attempts)},
-        ) from e
-    except Exception as e:
-        _LOGGER.exception("Unknown error")
-        await device.disconnect()
-        raise ConfigEntryNotReady(
-            translation_key="unknown_error", translation_placeholders={"error": str(e)}
-        ) from e
-    else:
-        if not state.authenticated:
+            state = await device.wait_until_authenticated_or_error(raise_on_error=True)
+        except (ConnectionTimeout, BleakError, TimeoutError):
+            _LOGGER.warning(
+                "%s: Could not connect to the device in %d seconds, retrying in %d "
+                "seconds",
+                device.name,
+                timeout,
+                delay,
+            )
+        except AuthErrors.BaseException as e:
+            _LOGGER.warning(
+                "%s: Authentication failed: %s, retrying in %d seconds",
+                device.name,
+                e,
+                delay,
+            )
+        except MaxConnectionAttemptsReached as e:
             await device.disconnect()
-            raise ConfigEntryNotReady(
-                translation_key="failed_after_successful_connection",
-                translation_placeholders={"last_state": state},
+            ir.async_create_issue(
+                hass,
+                DOMAIN,
+                issue_id,
+                is_fixable=False,
+                severity=ir.IssueSeverity.ERROR,
+                translation_key="max_connection_attempts_reached",
+                translation_placeholders={
+                    "device_name": device.name,
+                    "attempts": str(e.attempts),
+                },
+            )
+            return
+        except Exception:
+            _LOGGER.exception(
+                "%s: Unknown error, retrying in %d seconds", device.name, delay
+            )
+        else:
+            if state.authenticated:
+                break
+            _LOGGER.warning(
+                "%s: Failed after successful connection, last state: %s, retrying in "
+                "%d seconds",
+                device.name,
+                state,
+                delay,
             )
-    ir.async_delete_issue(hass, DOMAIN, issue_id)
 
-    _LOGGER.debug("Creating entities")
-    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+        if device.connection_state is not None:
+            await device.disconnect()
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, CONNECT_RETRY_MAX_DELAY)
 
-    _LOGGER.debug("Setup done")
-    entry.async_on_unload(entry.add_update_listener(_update_listener))
+    ir.async_delete_issue(hass, DOMAIN, issue_id)
 
     def _on_disconnect(exc: Exception | type[Exception] | None):
+        # entities stay in place and become unavailable while the connection
+        # reconnects, entry is reloaded only after the reconnect gives up
+        if device.reconnecting:
+            return
+
         async def _disconnect_and_reload():
             hass.config_entries.async_schedule_reload(entry.entry_id)
 
         hass.async_create_task(_disconnect_and_reload())
 
     entry.async_on_unload(device.on_disconnect(_on_disconnect))
+    # initial connection failures are retried here, drops after that are recovered
+    # in place
+    device.with_disabled_reconnect(False)
 
-    return True
+
+def _identify_device(adv_data: AdvertisementData) -> eflib.DiscoveredDevice | None:
+    if (discovered := eflib.identify_device(adv_data)) is not None:
+        discovered.load_protobuf_modules()
+    return discovered
+
+
+def _state_store(hass: HomeAssistant, address: str) -> Store[dict[str, Any]]:
+    return Store(hass, STATE_STORE_VERSION, f"{DOMAIN}.state.{address}")
+
+
+async def _async_save_state(hass: HomeAssistant, device: eflib.DeviceBase):
+    await _state_store(hass, device.address).async_save(
+        {"device": type(device).__name__, "fields": device.state_snapshot()}
+    )
 
 
 async def async_unload_entry(hass: HomeAssistant, entry: DeviceConfigEntry) -> bool:
     """Unload a config entry."""
     device = entry.runtime_data
-    await device.disconnect()
-    device.with_logging_options(LogOptions.no_options())
+    await _async_save_state(hass, device)
+    if device.connection_state is not None:
+        await device.disconnect()
+    device.with_logging_options(LogOptions.no_options()).with_loop_monitor(False)
     return await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
 
 
 async def async_remove_entry(hass: HomeAssistant, entry: DeviceConfigEntry):
     ConnectionLog.clean_cache_for(entry.data[CONF_ADDRESS])
+    await ProtocolCache.clean_cache_for(entry.data[CONF_ADDRESS])
+    await _state_store(hass, entry.data[CONF_ADDRESS]).async_remove()
 
 
 async def async_migrate_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> bool:
@@ -238,6 +336,7 @@ async def _update_listener(hass: HomeAssistant, entry: DeviceConfigEntry):
     options = Connection.Options(
         timeout=advanced.get(CONF_CONNECTION_TIMEOUT, DEFAULT_CONNECTION_TIMEOUT),
         bluez_start_notify=advanced.get(CONF_BLUEZ_START_NOTIFY, False),
+        write_batching=advanced.get(CONF_WRITE_BATCHING, False),
     )
 
     (
@@ -247,5 +346,7 @@ async def _update_listener(hass: HomeAssistant, entry: DeviceConfigEntry):
             enabled=packet_collection,
             buffer_size=diagnostics_buffer_size,
         )
+        .with_stage_timings(diag_options.get(CONF_STAGE_TIMINGS, False))
+        .with_loop_monitor(diag_options.get(CONF_LOOP_MONITOR, False))
         .with_connection_options(options)
     )
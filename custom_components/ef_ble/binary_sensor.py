@@ -1,6 +1,6 @@
 """EcoFlow BLE binary sensor"""
 
-from collections.abc import Callable
+from collections.abc import Callable, Mapping
 from dataclasses import dataclass
 from typing import Final, TypedDict, Unpack
 
@@ -17,6 +17,7 @@ from . import DeviceConfigEntry
 from .eflib import DeviceBase
 from .eflib.devices import shp2
 from .entity import EcoflowEntity, resolve_entity_description_keys
+from .entity_manifest import entity_manifest
 
 
 @dataclass(frozen=True, kw_only=True)
@@ -164,7 +165,7 @@ _BINARY_SENSORS: Final[dict[str, BinarySensorEntityDescription]] = {
     ),
 }
 
-BINARY_SENSOR_TYPES: Final[dict[str, BinarySensorEntityDescription]] = (
+BINARY_SENSOR_TYPES: Final[Mapping[str, BinarySensorEntityDescription]] = (
     resolve_entity_description_keys(_BINARY_SENSORS)
 )
 
@@ -179,14 +180,17 @@ async def async_setup_entry(
 
     new_sensors = [
         EcoflowBinarySensor(device, sensor)
-        for sensor in BINARY_SENSOR_TYPES
-        if hasattr(device, sensor)
+        for sensor in entity_manifest(device, "binary_sensor", _binary_sensor_keys)
     ]
 
     if new_sensors:
         async_add_entities(new_sensors)
 
 
+def _binary_sensor_keys(device: DeviceBase):
+    return [sensor for sensor in BINARY_SENSOR_TYPES if hasattr(device, sensor)]
+
+
 class EcoflowBinarySensor(EcoflowEntity, BinarySensorEntity):
     def __init__(
         self,
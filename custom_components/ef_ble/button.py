@@ -13,6 +13,7 @@ from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from . import DeviceConfigEntry
 from .eflib import DeviceBase
 from .entity import EcoflowEntity
+from .entity_manifest import entity_manifest
 
 
 @dataclass(frozen=True, kw_only=True)
@@ -36,15 +37,24 @@ async def async_setup_entry(
 
     new_buttons = [
         EcoflowButton(device, button_desc)
-        for button_desc in BUTTON_TYPES
-        if isinstance(getattr(device, button_desc.key, None), Callable)
+        for button_desc in entity_manifest(device, "button", _button_descriptions)
     ]
 
     if new_buttons:
         async_add_entities(new_buttons)
 
 
+def _button_descriptions(device: DeviceBase):
+    return [
+        button_desc
+        for button_desc in BUTTON_TYPES
+        if isinstance(getattr(device, button_desc.key, None), Callable)
+    ]
+
+
 class EcoflowButton(EcoflowEntity, ButtonEntity):
+    _available_with_restored_state = False
+
     def __init__(self, device: DeviceBase, entity_description: ButtonEntityDescription):
         super().__init__(device)
 
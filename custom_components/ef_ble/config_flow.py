@@ -44,6 +44,7 @@ from .const import (
     CONF_DIAGNOSTICS_ENCRYPT,
     CONF_DIAGNOSTICS_OPTIONS,
     CONF_EXTRA_BATTERY,
+    CONF_EXTRA_BATTERY_DESELECTED,
     CONF_LOG_BLEAK,
     CONF_LOG_CONNECTION,
     CONF_LOG_ENCRYPTED_PAYLOADS,
@@ -51,9 +52,12 @@ from .const import (
     CONF_LOG_MESSAGES,
     CONF_LOG_PACKETS,
     CONF_LOG_PAYLOADS,
+    CONF_LOOP_MONITOR,
     CONF_PACKET_VERSION,
+    CONF_STAGE_TIMINGS,
     CONF_UPDATE_PERIOD,
     CONF_USER_ID,
+    CONF_WRITE_BATCHING,
     DEFAULT_CONNECTION_TIMEOUT,
     DEFAULT_UPDATE_PERIOD,
     DOMAIN,
@@ -98,8 +102,10 @@ class EFBLEConfigFlow(ConfigFlow, domain=DOMAIN):
         """Initialize the config flow."""
         self._discovery_info: BluetoothServiceInfoBleak | None = None
         self._discovered_device: eflib.DeviceBase | None = None
-        self._discovered_devices: dict[str, eflib.DeviceBase] = {}
-        self._device_by_display_name: dict[str, eflib.DeviceBase] = {}
+        self._discovered_devices: dict[str, eflib.DiscoveredDevice] = {}
+        self._device_by_display_name: dict[
+            str, tuple[BluetoothServiceInfoBleak, eflib.DiscoveredDevice]
+        ] = {}
         self._local_names: dict[str, str] = {}
 
         self._user_id: str = ""
@@ -115,9 +121,12 @@ class EFBLEConfigFlow(ConfigFlow, domain=DOMAIN):
         await self.async_set_unique_id(unique_id=discovery_info.address)
         self._abort_if_unique_id_configured()
 
-        device = eflib.NewDevice(discovery_info.device, discovery_info.advertisement)
-        if device is None:
+        discovered = await self.hass.async_add_executor_job(
+            eflib.identify_device, discovery_info.advertisement
+        )
+        if discovered is None:
             return self.async_abort(reason="not_supported")
+        device = discovered.create(discovery_info.device, discovery_info.advertisement)
         self._discovery_info = discovery_info
         self._discovered_device = device
         self._set_name_from_discovery(self._discovery_info, device.name)
@@ -178,9 +187,13 @@ class EFBLEConfigFlow(ConfigFlow, domain=DOMAIN):
         """Handle the user step to pick discovered device."""
 
         if user_input is not None:
-            self._discovered_device = self._device_by_display_name[
+            discovery_info, discovered = self._device_by_display_name[
                 user_input[CONF_ADDRESS]
             ]
+            # only the picked device is created, listing uses identities only
+            self._discovered_device = discovered.create(
+                discovery_info.device, discovery_info.advertisement
+            )
 
             if eflib.is_unsupported(self._discovered_device):
                 return await self.async_step_unsupported_device()
@@ -195,17 +208,20 @@ class EFBLEConfigFlow(ConfigFlow, domain=DOMAIN):
             if address in current_addresses or address in self._discovered_devices:
                 continue
 
-            device = eflib.NewDevice(
-                discovery_info.device, discovery_info.advertisement
+            discovered = await self.hass.async_add_executor_job(
+                eflib.identify_device, discovery_info.advertisement
             )
 
-            if device is not None:
-                self._discovered_devices[address] = device
-                self._set_name_from_discovery(discovery_info, device.name)
-                name = f"{self._local_names[address]} - {device.device}"
-                if eflib.is_unsupported(device):
+            if discovered is not None:
+                self._discovered_devices[address] = discovered
+                self._set_name_from_discovery(discovery_info, discovered.name)
+                name = f"{self._local_names[address]} - {discovered.model}"
+                if discovered.is_unsupported:
                     name = f"[Unsupported] {name.replace('[Unsupported]', '')}"
-                self._device_by_display_name[f"{name} ({address})"] = device
+                self._device_by_display_name[f"{name} ({address})"] = (
+                    discovery_info,
+                    discovered,
+                )
 
         if not self._discovered_devices:
             return self.async_abort(reason="no_devices_found")
@@ -213,7 +229,7 @@ class EFBLEConfigFlow(ConfigFlow, domain=DOMAIN):
         device_by_name_sorted = dict(
             sorted(
                 self._device_by_display_name.items(),
-                key=lambda item: eflib.is_unsupported(item[1]),
+                key=lambda item: item[1][1].is_unsupported,
             )
         )
 
@@ -335,9 +351,17 @@ class EFBLEConfigFlow(ConfigFlow, domain=DOMAIN):
                 address = reconfigure_entry.data.get(CONF_ADDRESS)
                 await self.async_set_unique_id(address, raise_on_progress=False)
                 self._abort_if_unique_id_mismatch()
+                data_updates = user_input
+                if device is not None and CONF_EXTRA_BATTERY in user_input:
+                    data_updates = {
+                        **user_input,
+                        CONF_EXTRA_BATTERY_DESELECTED: _deselected_batteries(
+                            reconfigure_entry.data, user_input, device
+                        ),
+                    }
                 return self.async_update_reload_and_abort(
                     reconfigure_entry,
-                    data_updates=user_input,
+                    data_updates=data_updates,
                 )
             except Exception:  # pylint: disable=broad-except
                 _LOGGER.exception("Unexpected exception")
@@ -392,7 +416,7 @@ class EFBLEConfigFlow(ConfigFlow, domain=DOMAIN):
 
         if CONF_EXTRA_BATTERY not in entry_data:
             entry_data[CONF_EXTRA_BATTERY] = _find_enabled_batteries(
-                device, range(1, 6)
+                device, device.EXTRA_BATTERY_SLOTS
             )
 
         return self.async_create_entry(title=device.name, data=entry_data)
@@ -740,6 +764,16 @@ class _SchemaBuilder:
                             bool,
                             diag.get(CONF_DIAGNOSTICS_ENCRYPT, True),
                         )
+                        .optional(
+                            CONF_STAGE_TIMINGS,
+                            bool,
+                            diag.get(CONF_STAGE_TIMINGS, False),
+                        )
+                        .optional(
+                            CONF_LOOP_MONITOR,
+                            bool,
+                            diag.get(CONF_LOOP_MONITOR, False),
+                        )
                         .build()
                     ),
                     {"collapsed": collapsed},
@@ -770,6 +804,11 @@ class _SchemaBuilder:
                             bool,
                             advanced.get(CONF_BLUEZ_START_NOTIFY, False),
                         )
+                        .optional(
+                            CONF_WRITE_BATCHING,
+                            bool,
+                            advanced.get(CONF_WRITE_BATCHING, False),
+                        )
                         .build()
                     ),
                     {"collapsed": collapsed},
@@ -805,9 +844,7 @@ class _SchemaBuilder:
         self, extra_battery_conf: list[str] | None, device: eflib.DeviceBase
     ):
         available_battery_slots = (
-            [i for i in range(1, 6) if hasattr(device, f"battery_{i}_battery_level")]
-            if device is not None
-            else []
+            _available_battery_slots(device) if device is not None else []
         )
 
         if not available_battery_slots:
@@ -847,3 +884,35 @@ def schema_builder():
 
 def _find_enabled_batteries(device: eflib.DeviceBase, slots: Iterable[int]):
     return [str(i) for i in slots if getattr(device, f"battery_{i}_enabled", False)]
+
+
+def _available_battery_slots(device: eflib.DeviceBase):
+    return [
+        i
+        for i in device.EXTRA_BATTERY_SLOTS
+        if hasattr(device, f"battery_{i}_battery_level")
+    ]
+
+
+def _deselected_batteries(
+    entry_data: Mapping[str, Any],
+    user_input: dict[str, Any],
+    device: eflib.DeviceBase,
+):
+    """
+    Return batteries left out of the selection that were connected or selected before
+
+    Slots that never had a battery are not deselected, batteries connected to them
+    later are added automatically.
+    """
+    known = {
+        *(int(i) for i in entry_data.get(CONF_EXTRA_BATTERY_DESELECTED, [])),
+        *(int(i) for i in entry_data.get(CONF_EXTRA_BATTERY) or []),
+        *(device.extra_batteries or ()),
+    }
+    selected = {int(i) for i in user_input[CONF_EXTRA_BATTERY]}
+    return [
+        str(i)
+        for i in _available_battery_slots(device)
+        if i in known and i not in selected
+    ]
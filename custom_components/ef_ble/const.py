@@ -10,12 +10,16 @@ CONF_PACKET_VERSION = "packet_version"
 CONF_COLLECT_PACKETS = "collect_packets"
 CONF_COLLECT_PACKETS_AMOUNT = "collect_packets_amount"
 CONF_EXTRA_BATTERY = "extra_battery"
+CONF_EXTRA_BATTERY_DESELECTED = "extra_battery_deselected"
 
 CONF_ADVANCED_CONNECTION_OPTIONS = "advanced_connection_options"
 CONF_BLUEZ_START_NOTIFY = "bluez_start_notify"
+CONF_WRITE_BATCHING = "write_batching"
 
 CONF_DIAGNOSTICS_OPTIONS = "diagnostics_options"
 CONF_DIAGNOSTICS_ENCRYPT = "diagnostics_encrypt"
+CONF_STAGE_TIMINGS = "stage_timings"
+CONF_LOOP_MONITOR = "loop_monitor"
 
 CONF_LOG_MASKED = "log_masked"
 CONF_LOG_PACKETS = "log_packets"
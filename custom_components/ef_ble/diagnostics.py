@@ -22,6 +22,13 @@ async def async_get_config_entry_diagnostics(
         "sn_prefix": device._sn[:4],
         "connection_state": device.connection_state,
         "connection_state_history": list(device.connection_log.history),
+        "connection_stats": device.connection_stats,
+        "connect_timings": device.diagnostics.connect_timings,
+        "stage_timings": device.diagnostics.stage_timings,
+        "loop_monitor": device.diagnostics.loop_monitor,
+        "profile": device.diagnostics.profile,
+        "memory": device.diagnostics.memory,
+        "memory_trace": device.diagnostics.memory_trace,
         "manufacturer_data": (
             session.encrypt(device._manufacturer_data).hex()
             if session is not None
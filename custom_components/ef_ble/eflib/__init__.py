@@ -1,13 +1,14 @@
 """Library for EcoFlow BLE protocol"""
 
-from typing import TYPE_CHECKING, TypeGuard
+import sys
+from typing import TYPE_CHECKING, NamedTuple, TypeGuard
 
 from bleak.backends.device import BLEDevice
 from bleak.backends.scanner import AdvertisementData
 
 from . import devices
 from .devicebase import DeviceBase
-from .devices import powerstream, stream_microinverter, unsupported
+from .devices import unsupported
 from .entity import controls as controls
 from .entity import units as units
 from .props.updatable_props import UpdatableProps
@@ -33,21 +34,69 @@ def is_unsupported(
     return isinstance(device, unsupported.UnsupportedDevice)
 
 
+def _is_instance_of_module_device(device: DeviceBase | None, *module_names: str):
+    # device modules are imported lazily and a device can only be an instance of a
+    # class from an already imported module, so modules not imported yet are skipped
+    device_classes = tuple(
+        module.Device
+        for name in module_names
+        if (module := sys.modules.get(f"{devices.__name__}.{name}")) is not None
+    )
+    return isinstance(device, device_classes)
+
+
 def is_solar_only(device: DeviceBase | None):
-    return isinstance(device, (stream_microinverter.Device, powerstream.Device))
+    return _is_instance_of_module_device(device, "stream_microinverter", "powerstream")
 
 
-def NewDevice(ble_dev: BLEDevice, adv_data: AdvertisementData) -> DeviceBase | None:
-    """Return Device if ble dev fits the requirements otherwise None"""
+class DiscoveredDevice(NamedTuple):
+    """Device identified from advertisement data, before the device is created"""
+
+    sn: str
+    device_class: type[DeviceBase]
+
+    @property
+    def name(self) -> str:
+        return self.device_class.default_name_for(self.sn)
+
+    @property
+    def model(self) -> str:
+        return self.device_class.model_for(self.sn)
+
+    @property
+    def is_unsupported(self) -> bool:
+        return issubclass(self.device_class, unsupported.UnsupportedDevice)
+
+    def create(self, ble_dev: BLEDevice, adv_data: AdvertisementData) -> DeviceBase:
+        return self.device_class(ble_dev, adv_data, self.sn)
+
+    def load_protobuf_modules(self):
+        """Load protobuf modules the device decodes, does disk IO like the import"""
+        from .props import ProtobufProps  # noqa: PLC0415
+
+        if issubclass(self.device_class, ProtobufProps):
+            self.device_class.load_message_types()
+
+
+def identify_device(adv_data: AdvertisementData) -> DiscoveredDevice | None:
+    """
+    Return device identity if advertisement comes from EcoFlow device
+
+    The device module is imported the first time its model is seen, which does disk
+    IO - run this in an executor when called from the event loop.
+    """
     if (sn := sn_from_advertisement(adv_data)) is None:
         return None
 
-    # Check if known devices fits the found serial number
-    for item in devices.devices:
-        if (device := getattr(item, "Device", None)) is not None and device.check(sn):
-            return item.Device(ble_dev, adv_data, sn.decode("ASCII"))
+    return DiscoveredDevice(sn.decode("ASCII"), devices.device_class_for(sn))
+
+
+def NewDevice(ble_dev: BLEDevice, adv_data: AdvertisementData) -> DeviceBase | None:
+    """Return Device if ble dev fits the requirements otherwise None"""
+    if (discovered := identify_device(adv_data)) is None:
+        return None
 
-    return unsupported.UnsupportedDevice(ble_dev, adv_data, sn.decode("ASCII"))
+    return discovered.create(ble_dev, adv_data)
 
 
 def get_protobuf_device(device: DeviceBase | None) -> "ProtobufProps | None":
@@ -77,12 +126,14 @@ def get_controls[E: "controls.ControlType"](
 
 __all__ = [
     "DeviceBase",
+    "DiscoveredDevice",
     "NewDevice",
     "controls",
     "get_controls",
     "get_fixed_length_coding_device",
     "get_protobuf_device",
     "get_updatable_prop_device",
+    "identify_device",
     "is_solar_only",
     "is_unsupported",
     "units",
@@ -0,0 +1,198 @@
+import asyncio
+import itertools
+import struct
+from collections.abc import Callable, Hashable
+from dataclasses import dataclass, field
+
+from .instrumentation import Histogram
+from .packet import Packet
+
+type ConfirmFunc = Callable[[], bool]
+
+
+def seq_counter(seq: bytes) -> int:
+    return struct.unpack("<I", seq)[0] >> 8
+
+
+@dataclass(eq=False)
+class PendingCommand:
+    counter: int
+    route: tuple[int, int, int]
+    future: asyncio.Future[bool]
+    started: float
+    confirm: ConfirmFunc | None = None
+    scope: Hashable | None = None
+    timeout_handle: asyncio.TimerHandle | None = field(default=None, repr=False)
+
+
+class AckTracker:
+    """
+    Correlates outbound commands with device confirmations
+
+    Tracked packets get unique sequence numbers. A command is confirmed either by a
+    device reply on the same route echoing its sequence number, or by a confirm
+    function becoming true after the device reports its state (e.g. next heartbeat
+    containing the new value of the changed field). Devices reply to commands they
+    reject as well, so commands with a confirm function are confirmed only by it.
+    Replies without a known sequence number confirm the oldest command on their
+    route, and a reply to a command also confirms all older commands on the same
+    route since they were superseded.
+    Commands sent from the same coalesce scope (e.g. the same control) supersede each
+    other and share the result of the newest one.
+
+    The first byte of the sequence is always zero, since some devices xor payloads
+    with it.
+    """
+
+    def __init__(self) -> None:
+        self._counter = itertools.count(1)
+        self._pending: dict[tuple[int, int, int], list[PendingCommand]] = {}
+        self.latency = Histogram()
+        self.confirmed = 0
+        self.timeouts = 0
+
+    def __len__(self):
+        return sum(len(pending) for pending in self._pending.values())
+
+    def with_seq(self, packet: Packet) -> tuple[Packet, int]:
+        """Return copy of the packet with new sequence number and its counter"""
+        counter = next(self._counter) & 0xFFFFFF
+        seq = struct.pack("<I", counter << 8)
+        return (
+            Packet(
+                packet.src,
+                packet.dst,
+                packet.cmdSet,
+                packet.cmdId,
+                packet.payload,
+                packet.dsrc,
+                packet.ddst,
+                packet.version,
+                seq,
+                packet.productId,
+            ),
+            counter,
+        )
+
+    def track(
+        self,
+        packet: Packet,
+        counter: int,
+        confirm: ConfirmFunc | None = None,
+        timeout: float = 10,
+        scope: Hashable | None = None,
+    ) -> PendingCommand:
+        """
+        Start tracking sent packet
+
+        Parameters
+        ----------
+        packet
+            Packet with sequence number assigned by `with_seq`
+        counter
+            Sequence counter returned by `with_seq`
+        confirm, optional
+            Function returning True once device state reflects the command
+        timeout, optional
+            Seconds after which the command resolves as not confirmed
+        scope, optional
+            Coalesce scope of the command, pending commands with the same scope and
+            route are superseded by this one
+        """
+        loop = asyncio.get_running_loop()
+        # replies come from the command destination
+        route = (packet.dst, packet.cmdSet, packet.cmdId)
+        pending = PendingCommand(
+            counter=counter,
+            route=route,
+            future=loop.create_future(),
+            started=loop.time(),
+            confirm=confirm,
+            scope=scope,
+        )
+        pending.timeout_handle = loop.call_later(timeout, self._expire, pending)
+
+        if scope is not None:
+            for older in [c for c in self._pending.get(route, ()) if c.scope == scope]:
+                self._supersede(older, pending)
+        self._pending.setdefault(route, []).append(pending)
+        return pending
+
+    def discard(self, pending: PendingCommand):
+        self._resolve(pending, result=False)
+
+    def on_packet(self, packet: Packet):
+        """Confirm commands replied to by the packet"""
+        pending = [
+            command
+            for command in self._pending.get(
+                (packet.src, packet.cmdSet, packet.cmdId), ()
+            )
+            if command.confirm is None
+        ]
+        if not pending:
+            return
+
+        counter = seq_counter(packet.seq)
+        if not any(command.counter == counter for command in pending):
+            counter = pending[0].counter
+
+        for command in [c for c in pending if c.counter <= counter]:
+            self._resolve(command, result=True)
+
+    def check_confirmations(self):
+        """Confirm commands whose confirm functions are satisfied by current state"""
+        if not self._pending:
+            return
+
+        for pending in list(self._pending.values()):
+            for command in list(pending):
+                if command.confirm is not None and command.confirm():
+                    self._resolve(command, result=True)
+
+    def cancel_all(self):
+        for pending in list(self._pending.values()):
+            for command in list(pending):
+                self._resolve(command, result=False)
+
+    def stats(self):
+        return {
+            "pending": len(self),
+            "confirmed": self.confirmed,
+            "timeouts": self.timeouts,
+            "latency_ms": self.latency.as_dict(),
+        }
+
+    def _supersede(self, older: PendingCommand, newer: PendingCommand):
+        self._untrack(older)
+
+        def _follow(future: asyncio.Future[bool]):
+            if not older.future.done():
+                older.future.set_result(future.result())
+
+        newer.future.add_done_callback(_follow)
+
+    def _expire(self, pending: PendingCommand):
+        if not pending.future.done():
+            self.timeouts += 1
+        self._resolve(pending, result=False)
+
+    def _untrack(self, pending: PendingCommand):
+        if (commands := self._pending.get(pending.route)) and pending in commands:
+            commands.remove(pending)
+            if not commands:
+                del self._pending[pending.route]
+
+        if pending.timeout_handle is not None:
+            pending.timeout_handle.cancel()
+
+    def _resolve(self, pending: PendingCommand, result: bool):
+        self._untrack(pending)
+        if pending.future.done():
+            return
+
+        if result:
+            self.confirmed += 1
+            loop = pending.future.get_loop()
+            self.latency.add((loop.time() - pending.started) * 1000)
+        pending.future.set_result(result)
@@ -0,0 +1,364 @@
+import asyncio
+import contextlib
+import heapq
+import itertools
+import logging
+from collections.abc import Awaitable, Callable, Hashable
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from enum import IntEnum
+
+_LOGGER = logging.getLogger(__name__)
+
+type WriteFunc = Callable[[], Awaitable[None]]
+type EncodeFunc = Callable[[], Awaitable[bytes]]
+type BatchWriteFunc = Callable[[bytes], Awaitable[None]]
+
+_coalesce_scope: ContextVar[Hashable | None] = ContextVar(
+    "coalesce_scope", default=None
+)
+
+
+@contextlib.contextmanager
+def coalesce_scope(key: Hashable):
+    """
+    Mark commands sent within this context as superseding each other
+
+    Commands sent to the same route from the same scope are last-write-wins - while one
+    is waiting in the queue, a newer one replaces it. Used by controls, so e.g. values
+    of a number slider being dragged collapse to the last one.
+    """
+    token = _coalesce_scope.set(key)
+    try:
+        yield
+    finally:
+        _coalesce_scope.reset(token)
+
+
+def current_coalesce_scope() -> Hashable | None:
+    return _coalesce_scope.get()
+
+
+class Priority(IntEnum):
+    AUTH = 0
+    REPLY = 1
+    COMMAND = 2
+    POLL = 3
+
+
+@dataclass
+class CommandQueueStats:
+    depth: int = 0
+    max_depth: int = 0
+    written: int = 0
+    batches: int = 0
+    batched: int = 0
+    coalesced: int = 0
+    retried: int = 0
+    failed: int = 0
+
+    def as_dict(self):
+        return asdict(self)
+
+
+@dataclass(eq=False)
+class _Command:
+    priority: Priority
+    order: int
+    write: WriteFunc
+    future: asyncio.Future[bool]
+    key: Hashable | None = None
+    encode: EncodeFunc | None = None
+    attempt: int = 0
+    queued: bool = False
+    superseded_by: "_Command | None" = None
+
+    def __lt__(self, other: "_Command"):
+        return (self.priority, self.order) < (other.priority, other.order)
+
+
+class CommandQueue:
+    """
+    Outbound command queue served by a single writer task
+
+    Commands are written one at a time in order of their priority, with at least
+    `min_interval` seconds between writes. Failed writes are retried from the queue
+    with linearly increasing delay, so callers only wait for the final result.
+
+    Parameters
+    ----------
+    on_error
+        Coroutine function called with the last exception when a command fails after
+        all attempts, once per write for commands batched together
+    min_interval
+        Minimal time between two writes in seconds
+    max_attempts
+        Number of attempts before the command is considered failed
+    retry_delay
+        Delay before the first retry in seconds, increased by the same amount with
+        each attempt
+
+    With batching enabled, commands submitted with an encode function are written
+    together - the frames of consecutive queued commands are concatenated into one
+    write as long as they fit into the maximum batch size.
+    """
+
+    def __init__(
+        self,
+        on_error: Callable[[Exception], Awaitable[None]] | None = None,
+        min_interval: float = 0.0,
+        max_attempts: int = 4,
+        retry_delay: float = 1.0,
+    ) -> None:
+        self._on_error = on_error
+        self._min_interval = min_interval
+        self._max_attempts = max_attempts
+        self._retry_delay = retry_delay
+
+        self._heap: list[_Command] = []
+        # latest unfinished command for each key
+        self._keyed: dict[Hashable, _Command] = {}
+        self._retries: dict[_Command, asyncio.TimerHandle] = {}
+        self._in_flight: list[_Command] = []
+        self._order = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._writer: asyncio.Task | None = None
+        self._last_write: float | None = None
+        self._batch_write: BatchWriteFunc | None = None
+        self._max_batch_size: Callable[[], int] = lambda: 0
+        self.stats = CommandQueueStats()
+
+    def __len__(self):
+        return len(self._heap)
+
+    def with_min_interval(self, min_interval: float):
+        self._min_interval = min_interval
+        return self
+
+    def with_batching(self, write: BatchWriteFunc, max_size: Callable[[], int]):
+        """
+        Enable writing frames of several commands at once
+
+        Parameters
+        ----------
+        write
+            Coroutine function writing concatenated frames
+        max_size
+            Function returning current maximum size of one write, batching is
+            disabled while it returns 0
+        """
+        self._batch_write = write
+        self._max_batch_size = max_size
+        return self
+
+    def submit(
+        self,
+        write: WriteFunc,
+        priority: Priority = Priority.COMMAND,
+        key: Hashable | None = None,
+        encode: EncodeFunc | None = None,
+    ) -> asyncio.Future[bool]:
+        """
+        Queue write of a command
+
+        Parameters
+        ----------
+        write
+            Coroutine function performing the write, raising on failure
+        priority
+            Priority class of the command
+        key, optional
+            Commands with the same key replace each other while waiting in the queue
+        encode, optional
+            Coroutine function returning the frame `write` would write, allows the
+            command to be batched with others
+
+        Returns
+        -------
+        Future resolved to True when the command was written, False if it failed or the
+        queue was stopped
+        """
+        loop = asyncio.get_running_loop()
+        self._start(loop)
+
+        queued = self._keyed.get(key) if key is not None else None
+        if queued is not None and queued.queued:
+            queued.write = write
+            queued.encode = encode
+            self.stats.coalesced += 1
+            if priority < queued.priority:
+                queued.priority = priority
+                heapq.heapify(self._heap)
+            return queued.future
+
+        command = _Command(
+            priority=priority,
+            order=next(self._order),
+            write=write,
+            future=loop.create_future(),
+            key=key,
+            encode=encode,
+        )
+        if key is not None:
+            if queued is not None:
+                # in flight or waiting for a retry, it will not be retried anymore
+                queued.superseded_by = command
+            self._keyed[key] = command
+        self._push(command)
+        return command.future
+
+    def stop(self):
+        """Stop the writer and resolve all pending commands as failed"""
+        if self._writer is not None:
+            self._writer.cancel()
+            self._writer = None
+
+        pending = [*self._heap, *self._retries, *self._in_flight]
+        for handle in self._retries.values():
+            handle.cancel()
+
+        self._heap.clear()
+        self._keyed.clear()
+        self._retries.clear()
+        self._in_flight = []
+        self._wakeup.clear()
+        self.stats.depth = 0
+
+        for command in pending:
+            if not command.future.done():
+                command.future.set_result(False)
+
+    def _start(self, loop: asyncio.AbstractEventLoop):
+        if self._writer is None or self._writer.done():
+            self._writer = loop.create_task(self._run())
+
+    def _push(self, command: _Command):
+        command.queued = True
+        heapq.heappush(self._heap, command)
+        self.stats.depth = len(self._heap)
+        self.stats.max_depth = max(self.stats.max_depth, self.stats.depth)
+        self._wakeup.set()
+
+    def _pop(self):
+        command = heapq.heappop(self._heap)
+        command.queued = False
+        self.stats.depth = len(self._heap)
+        return command
+
+    def _finish(self, command: _Command, result: bool):
+        if command.key is not None and self._keyed.get(command.key) is command:
+            del self._keyed[command.key]
+        if not command.future.done():
+            command.future.set_result(result)
+
+    def _retry(self, command: _Command):
+        self._retries.pop(command, None)
+        if (newer := command.superseded_by) is None:
+            self._push(command)
+            return
+
+        # newer command replaced this one, so it shares its result
+        self.stats.coalesced += 1
+
+        def _resolve(future: asyncio.Future[bool]):
+            if not command.future.done():
+                command.future.set_result(future.result())
+
+        newer.future.add_done_callback(_resolve)
+
+    async def _throttle(self):
+        if self._last_write is None or self._min_interval <= 0:
+            return
+        loop = asyncio.get_running_loop()
+        if (delay := self._last_write + self._min_interval - loop.time()) > 0:
+            await asyncio.sleep(delay)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._wakeup.wait()
+
+            while self._heap:
+                await self._throttle()
+                if not self._heap:
+                    break
+
+                command = self._pop()
+                batch = self._in_flight = [command]
+                try:
+                    if (max_size := self._batch_size(command)) > 0:
+                        await self._write_batch(batch, max_size)
+                    else:
+                        await command.write()
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:  # noqa: BLE001
+                    # error is reported once per write, not for each batched command
+                    exhausted = [
+                        failed
+                        for failed in batch
+                        if self._handle_failure(failed, e, loop)
+                    ]
+                    if exhausted and self._on_error is not None:
+                        await self._on_error(e)
+                else:
+                    self.stats.written += len(batch)
+                    for written in batch:
+                        self._finish(written, True)
+                finally:
+                    self._in_flight = []
+                    self._last_write = loop.time()
+
+            self._wakeup.clear()
+
+    def _batch_size(self, command: _Command):
+        if command.encode is None or self._batch_write is None:
+            return 0
+        return self._max_batch_size()
+
+    async def _write_batch(self, batch: list[_Command], max_size: int):
+        assert self._batch_write is not None
+        assert batch[0].encode is not None
+
+        data = await batch[0].encode()
+        while self._heap and (following := self._heap[0]).encode is not None:
+            frame = await following.encode()
+            # queue could have changed while encoding
+            if (
+                len(data) + len(frame) > max_size
+                or not self._heap
+                or self._heap[0] is not following
+            ):
+                break
+            batch.append(self._pop())
+            data += frame
+
+        await self._batch_write(data)
+        self.stats.batches += 1
+        if len(batch) > 1:
+            self.stats.batched += len(batch)
+
+    def _handle_failure(
+        self, command: _Command, exc: Exception, loop: asyncio.AbstractEventLoop
+    ) -> bool:
+        """Schedule retry of failed command, return True if it ran out of attempts"""
+        command.attempt += 1
+        if command.superseded_by is not None:
+            self._retry(command)
+            return False
+
+        if command.attempt < self._max_attempts:
+            delay = self._retry_delay * command.attempt
+            _LOGGER.debug(
+                "Command write failed on attempt %d: %s, retrying in %.1f seconds",
+                command.attempt,
+                exc,
+                delay,
+            )
+            self.stats.retried += 1
+            self._retries[command] = loop.call_later(delay, self._retry, command)
+            return False
+
+        self.stats.failed += 1
+        self._finish(command, False)
+        return True
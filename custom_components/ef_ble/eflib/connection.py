@@ -2,29 +2,38 @@ import asyncio
 import contextlib
 import functools
 import hashlib
-import logging
 import struct
 import time
 import traceback
 from collections import deque
-from collections.abc import Awaitable, Callable, Collection, Coroutine, MutableSequence
+from collections.abc import (
+    Awaitable,
+    Callable,
+    Collection,
+    Coroutine,
+    Hashable,
+    MutableSequence,
+)
+from contextvars import ContextVar
 from dataclasses import dataclass
 from enum import StrEnum, auto
 from functools import cached_property
-from typing import Literal, Self
+from typing import Any, Literal, Self
 
 import ecdsa
-from bleak import BleakClient
 from bleak.backends.characteristic import BleakGATTCharacteristic
 from bleak.backends.device import BLEDevice
 from bleak.exc import BleakError
 from bleak_retry_connector import (
     MAX_CONNECT_ATTEMPTS,
+    BleakClientWithServiceCache,
     BleakNotFoundError,
     establish_connection,
 )
 
 from . import keydata
+from .ack_tracker import AckTracker, ConfirmFunc
+from .command_queue import CommandQueue, Priority, current_coalesce_scope
 from .encryption import EncryptionStrategy, Type1Encryption, Type7Encryption
 from .exceptions import (
     AuthErrors,
@@ -42,13 +51,25 @@ from .frame_assembler import (
     RawHeaderAssembler,
     SimplePacketAssembler,
 )
+from .instrumentation import (
+    ConnectTimings,
+    Histogram,
+    Stage,
+    StageTimings,
+    ThroughputMeter,
+)
 from .listeners import ListenerGroup, ListenerRegistry
 from .logging_util import ConnectionLogger, LogOptions
+from .loop_monitor import LoopHolds, LoopStage
 from .packet import Packet
+from .packet_queue import InboundPacketQueue, Route
 from .props.utils import classproperty
+from .protocol_cache import ProtocolCache, ProtocolParams
+from .timers import TimerScheduler
 
 MAX_RECONNECT_ATTEMPTS = 2
 MAX_CONNECTION_ATTEMPTS = 10
+RECOVERY_BUCKETS_MS = (1000, 2500, 5000, 10000, 20000, 30000, 60000, 120000, 300000)
 
 
 _BT_PROTOCOL_UUIDS = {
@@ -206,6 +227,8 @@ class Connection:
 
         timeout: int = 20
         bluez_start_notify: bool = False
+        # pack frames of several queued packets into one write, up to MTU size
+        write_batching: bool = False
 
     _listeners = _ConnectionListeners.create()
 
@@ -232,11 +255,22 @@ class Connection:
         self._encryption: EncryptionStrategy | None = None
         self._simple_assembler = SimplePacketAssembler()
         self._frame_assembler: FrameAssembler | None = None
+        self._inbound = InboundPacketQueue(self._process_packet)
+        self._commands = CommandQueue(on_error=self.add_error).with_batching(
+            self._write_batch, self._max_batch_size
+        )
+        self._writes = ThroughputMeter()
+        self._acks = AckTracker()
         self._options = Connection.Options()
+        self._timings: StageTimings | None = None
+        self._loop_holds: LoopHolds | None = None
 
         self._errors = 0
         self._last_errors = deque(maxlen=10)
         self._client = None
+        self._client_class: type[BleakClientWithServiceCache] = (
+            BleakClientWithServiceCache
+        )
         self._connected = asyncio.Event()
         self._disconnected = asyncio.Event()
         self._retry_on_disconnect = False
@@ -244,6 +278,11 @@ class Connection:
         self._auth_header_dst = auth_header_dst
 
         self._tasks: set[asyncio.Task] = set()
+        self._timers: TimerScheduler | None = None
+
+        self._protocol_cache = ProtocolCache.for_address(self._address)
+        self._cached_params: ProtocolParams | None = None
+        self._connect_started: float | None = None
 
         self._logger = ConnectionLogger(self)
         self._state_changed = asyncio.Event()
@@ -254,6 +293,11 @@ class Connection:
         self._connection_attempt: int = 0
         self._reconnect_attempt: int = 0
         self._reconnect = True
+        # monotonic and process time when connection dropped and recovery started
+        self._recovery_started: tuple[float, float] | None = None
+        self._recoveries = Histogram(RECOVERY_BUCKETS_MS)
+        self._recovery_cpu = Histogram()
+        self._connect_timings = ConnectTimings()
 
         self._connection_state: ConnectionState = None  # pyright: ignore[reportAttributeAccessIssue]
         self._set_state(ConnectionState.CREATED)
@@ -262,6 +306,14 @@ class Connection:
     def is_connected(self) -> bool:
         return self._client is not None and self._client.is_connected
 
+    @property
+    def reconnecting(self) -> bool:
+        """Whether connection drops are recovered by reconnecting in place"""
+        return (
+            self._retry_on_disconnect
+            and self._state is not ConnectionState.ERROR_MAX_RECONNECT_ATTEMPTS_REACHED
+        )
+
     def _add_listener(self, collection: MutableSequence[Callable], listener: Callable):
         collection.append(listener)
 
@@ -316,6 +368,8 @@ class Connection:
 
     def with_disabled_reconnect(self, is_disabled: bool = True):
         self._reconnect = not is_disabled
+        if self.is_connected:
+            self._retry_on_disconnect = self._reconnect
         return self
 
     def with_options(self, options: "Connection.Options"):
@@ -323,10 +377,48 @@ class Connection:
         self._options = options
         return self
 
+    def with_client_class(self, client_class: type[BleakClientWithServiceCache]):
+        """Set BLE client class created on connect, e.g. simulated peripheral client"""
+        self._client_class = client_class
+        return self
+
+    def with_min_write_interval(self, interval: float):
+        """Set minimal time between two writes to the device in seconds"""
+        self._commands.with_min_interval(interval)
+        return self
+
+    def with_coalesced_routes(self, routes: Collection[Route]):
+        """Set routes for which only the latest queued packet is processed"""
+        self._inbound.with_coalesced_routes(routes)
+        return self
+
+    def with_stage_timings(self, timings: StageTimings | None):
+        """Set timings receiving hot path stage durations, `None` disables timing"""
+        self._timings = timings
+        if self._frame_assembler is not None:
+            self._frame_assembler.timings = timings
+        return self
+
+    def with_connect_timings(self, timings: ConnectTimings):
+        """Set timings receiving durations of connection attempts"""
+        self._connect_timings = timings
+        return self
+
+    def with_loop_holds(self, holds: LoopHolds | None):
+        """Set monitor of time spent holding the event loop, `None` disables it"""
+        self._loop_holds = holds
+        return self
+
+    def _hold(self, stage: LoopStage):
+        if self._loop_holds is None:
+            return contextlib.nullcontext()
+        return self._loop_holds.hold(stage)
+
     async def connect(
         self,
         max_attempts: int | None = None,
     ):
+        await self._protocol_cache.async_load()
         if self._state.is_connecting:
             return
 
@@ -356,19 +448,12 @@ class Connection:
 
             self._set_state(ConnectionState.ESTABLISHING_CONNECTION)
             self._logger.info("Connecting to device")
+            self._connect_started = time.monotonic()
             # max_attempts=0 means unlimited at Connection level, but
             # establish_connection needs a real retry count for BLE-level
             # attempts (e.g. when adapter slots are contested).
             ble_attempts = max_attempts if max_attempts != 0 else MAX_CONNECT_ATTEMPTS
-            self._client = await establish_connection(
-                BleakClient,
-                self.ble_dev(),
-                self._ble_dev.name,
-                disconnected_callback=self.disconnected,
-                ble_device_callback=self.ble_dev,
-                max_attempts=ble_attempts,
-                timeout=self._options.timeout,
-            )
+            self._client = await self._establish_connection(ble_attempts)
         except TimeoutError as e:
             error = e
             self._set_state(
@@ -391,6 +476,10 @@ class Connection:
             self.disconnected()
             return
 
+        # characteristics have to be resolved again from the new client
+        self.__dict__.pop("_notify_characteristic", None)
+        self.__dict__.pop("_write_characteristic", None)
+
         self._set_state(ConnectionState.CONNECTED)
         self._logger.info("Connected")
         self._errors = 0
@@ -400,9 +489,65 @@ class Connection:
 
         await self.initBleSessionKey()
 
+    async def _establish_connection(self, max_attempts: int):
+        self._cached_params = self._protocol_cache.get(
+            self._packet_version, self._encrypt_type, self._auth_header_dst
+        )
+
+        kwargs = {}
+        if self._cached_params is not None:
+            # only discover the service we know the protocol characteristics live in
+            kwargs["services"] = [self._cached_params.service_uuid]
+            self._logger.log_filtered(
+                LogOptions.CONNECTION_DEBUG,
+                "Using cached protocol params: %s",
+                self._cached_params,
+            )
+
+        started = time.monotonic()
+        try:
+            return await establish_connection(
+                self._timed_client_class(),
+                self.ble_dev(),
+                self._ble_dev.name,
+                disconnected_callback=self.disconnected,
+                ble_device_callback=self.ble_dev,
+                max_attempts=max_attempts,
+                timeout=self._options.timeout,
+                use_services_cache=True,
+                **kwargs,
+            )
+        finally:
+            self._connect_timings.add_establish(time.monotonic() - started)
+
+    def _timed_client_class(self) -> Callable[..., BleakClientWithServiceCache]:
+        """Client factory timing every BLE connect call made by establish_connection"""
+        client_class = self._client_class
+        timings = self._connect_timings
+
+        def _create_client(*args, **kwargs):
+            client = client_class(*args, **kwargs)
+            connect = client.connect
+
+            async def _timed_connect(*connect_args, **connect_kwargs):
+                started = time.monotonic()
+                try:
+                    return await connect(*connect_args, **connect_kwargs)
+                finally:
+                    timings.add_ble_connect(time.monotonic() - started)
+
+            client.connect = _timed_connect  # type: ignore[method-assign]
+            return client
+
+        return _create_client
+
     def disconnected(self, *args, **kwargs) -> None:
         self._logger.warning("Disconnected from device")
         self._client = None
+        self._cancel_timers()
+        self._inbound.stop()
+        self._commands.stop()
+        self._acks.cancel_all()
 
         if not self._retry_on_disconnect:
             if self._reconnect_task:
@@ -415,14 +560,22 @@ class Connection:
             self._set_state(ConnectionState.DISCONNECTED)
             return
 
-        if self._reconnect_task is not None:
+        if self._recovery_started is None:
+            self._recovery_started = (time.monotonic(), time.process_time())
+
+        # failed attempt of running reconnect schedules the next one
+        if (
+            self._reconnect_task is not None
+            and self._reconnect_task is not asyncio.current_task()
+        ):
             return
 
         loop = asyncio.get_event_loop()
         self._reconnect_task = self._add_task(self.reconnect(), loop)
 
         def _reconnect_done(task: asyncio.Task[None]):
-            self._reconnect_task = None
+            if self._reconnect_task is task:
+                self._reconnect_task = None
             with contextlib.suppress(asyncio.CancelledError):
                 if exc := task.exception():
                     raise exc
@@ -449,6 +602,7 @@ class Connection:
             self._notify_disconnect(self._last_exception)
 
             self._reconnect_attempt = 0
+            self._recovery_started = None
             return
 
         self._logger.warning(
@@ -457,7 +611,9 @@ class Connection:
             self._reconnect_attempt,
             MAX_RECONNECT_ATTEMPTS,
         )
+        delay_started = time.monotonic()
         await asyncio.sleep(self._retry_on_disconnect_delay)
+        self._connect_timings.add_reconnect_delay(time.monotonic() - delay_started)
         if not self._retry_on_disconnect:
             self._logger.warning("Reconnect is aborted")
             return
@@ -469,9 +625,14 @@ class Connection:
     async def disconnect(self) -> None:
         self._logger.info(msg="Disconnecting from device")
         self._retry_on_disconnect = False
+        self._recovery_started = None
 
         self._reconnect_attempt = 0
         self._cancel_tasks()
+        self._cancel_timers()
+        self._inbound.stop()
+        self._commands.stop()
+        self._acks.cancel_all()
 
         if self._client is not None and self._client.is_connected:
             self._set_state(ConnectionState.DISCONNECTING)
@@ -584,6 +745,8 @@ class Connection:
         tb = traceback.format_tb(exception.__traceback__)
         self._logger.error("Captured exception: %s:\n%s", exception, "".join(tb))
         self._errors += 1
+        if self._timings is not None:
+            self._timings.errors += 1
         self._last_exception = exception
         if self._errors > 5:
             # Too much errors happened - let's reconnect
@@ -607,10 +770,26 @@ class Connection:
     def _state(self, value: ConnectionState):
         self._last_state = self._connection_state
         self._connection_state = value
+        self._time_state(value)
         self._state_changed.set()
         self._state_changed.clear()
         self._listeners.on_connection_state_change(value)
 
+    def _time_state(self, state: ConnectionState):
+        if state is ConnectionState.ESTABLISHING_CONNECTION:
+            self._connect_timings.start(
+                state.name,
+                attempt=self._connection_attempt,
+                reconnect_attempt=self._reconnect_attempt,
+                cached_params=self._protocol_cache.params is not None,
+            )
+        elif state.is_terminal or state is ConnectionState.DISCONNECTING:
+            self._connect_timings.finish(
+                state.name, succeeded=state is ConnectionState.AUTHENTICATED
+            )
+        else:
+            self._connect_timings.transition(state.name)
+
     def _set_state(
         self, state: ConnectionState, exc: Exception | type[Exception] | None = None
     ):
@@ -626,17 +805,59 @@ class Connection:
     def _get_characteristics(self, char_type: Literal["write", "notify"]):
         assert self._client is not None
 
+        if (params := self._cached_params) is not None:
+            handle = (
+                params.notify_handle if char_type == "notify" else params.write_handle
+            )
+            expected_uuid = _BT_PROTOCOL_UUIDS[params.uuid_family][char_type]
+            if (
+                characteristic := self._client.services.get_characteristic(handle)
+            ) is not None and characteristic.uuid == expected_uuid:
+                return characteristic
+
         for uuids in _BT_PROTOCOL_UUIDS.values():
             if (
                 uuid := self._client.services.get_characteristic(uuids[char_type])
             ) is not None:
                 return uuid
+
+        # cached layout is stale, next connection has to discover all services again
+        self._protocol_cache.invalidate()
+
         characteristic_list = [
             f"{c.uuid} {c.description} {c.properties}"
             for c in self._client.services.characteristics.values()
         ]
         raise UnsupportedBluetoothProtocol("write", characteristic_list)
 
+    def _store_protocol_params(self):
+        notify = self._notify_characteristic
+        write = self._write_characteristic
+        uuid_family = next(
+            name
+            for name, uuids in _BT_PROTOCOL_UUIDS.items()
+            if uuids["write"] == write.uuid
+        )
+
+        if self._connect_started is not None:
+            self._protocol_cache.record_connect_time(
+                time.monotonic() - self._connect_started,
+                cached=self._cached_params is not None,
+            )
+            self._connect_started = None
+
+        self._protocol_cache.store(
+            ProtocolParams(
+                uuid_family=uuid_family,
+                service_uuid=write.service_uuid,
+                notify_handle=notify.handle,
+                write_handle=write.handle,
+                packet_version=self._packet_version,
+                encrypt_type=self._encrypt_type,
+                auth_header_dst=self._auth_header_dst,
+            )
+        )
+
     @cached_property
     def _notify_characteristic(self):
         return self._get_characteristics("notify")
@@ -645,7 +866,8 @@ class Connection:
     def _write_characteristic(self):
         return self._get_characteristics("write")
 
-    async def genSessionKey(self, seed: bytes, srand: bytes):
+    @staticmethod
+    async def genSessionKey(seed: bytes, srand: bytes):
         """Implements the necessary part of the logic, rest is skipped"""
         data_num = [0, 0, 0, 0]
 
@@ -707,13 +929,21 @@ class Connection:
 
         frame_assembler = self._frame_assembler or self._create_frame_assembler()
 
+        timings = self._timings
+        start = time.perf_counter_ns() if timings is not None else 0
         decoded_payloads = await frame_assembler.reassemble(data)
+        if timings is not None:
+            timings.add(Stage.REASSEMBLE, start)
 
         packets = []
         for payload in decoded_payloads:
             try:
                 self._listeners.on_packet_received(payload)
+                if timings is not None:
+                    start = time.perf_counter_ns()
                 packet = await self._packet_parse(payload)
+                if timings is not None:
+                    timings.add(Stage.PARSE, start)
                 self._listeners.on_packet_parsed(packet)
 
                 self._logger.log_filtered(
@@ -734,40 +964,48 @@ class Connection:
 
         return packets
 
-    async def sendRequest(self, send_data: bytes, response_handler=None):
-        self._logger.log_filtered(LogOptions.CONNECTION_DEBUG, "Sending: %r", send_data)
-        self._listeners.on_data_send(send_data)
+    async def sendRequest(
+        self,
+        send_data: bytes,
+        response_handler=None,
+        priority: Priority = Priority.AUTH,
+    ) -> bool:
+        """
+        Queue write of raw data and wait until it is written
 
-        # In case exception happens we need to try again
-        err = None
-        for retry in range(4):
-            try:
-                await self._sendRequest(send_data, response_handler)
-            except Exception as e:  # noqa: BLE001
-                self._logger.log_filtered(
-                    LogOptions.CONNECTION_DEBUG,
-                    (
-                        "Exception occured when sending request on try %d: %s, "
-                        "retrying in %d seconds"
-                    ),
-                    retry,
-                    str(e),
-                    retry + 1,
-                    level=logging.WARNING,
-                )
-                if err is None:
-                    err = e
-                await asyncio.sleep(retry + 1)
-                continue
-            else:
-                return
+        Failed writes are retried by the command queue, the last error is added to the
+        connection errors.
+
+        Returns
+        -------
+        True if data was written, False otherwise
+        """
+
+        async def _write():
+            self._log_send(send_data)
+            await self._sendRequest(send_data, response_handler)
 
-        await self.add_error(err)
+        return await self._commands.submit(_write, priority)
+
+    def _log_send(self, send_data: bytes):
+        self._logger.log_filtered(LogOptions.CONNECTION_DEBUG, "Sending: %r", send_data)
+        self._listeners.on_data_send(send_data)
 
     async def _start_notify(self, callback: Callable):
         kwargs = {}
         if self._options.bluez_start_notify:
             kwargs["bluez"] = {"use_start_notify": True}
+        if (holds := self._loop_holds) is not None:
+            handler = callback
+
+            async def _timed_handler(
+                characteristic: BleakGATTCharacteristic, recv_data: bytearray
+            ):
+                await holds.timed(
+                    LoopStage.NOTIFICATION, handler(characteristic, recv_data)
+                )
+
+            callback = _timed_handler
         await self._client.start_notify(self._notify_characteristic, callback, **kwargs)
 
     async def _sendRequest(self, send_data: bytes, response_handler=None):
@@ -786,30 +1024,167 @@ class Connection:
         await self._client.write_gatt_char(
             self._write_characteristic, bytearray(send_data)
         )
+        self._writes.add(len(send_data))
 
     async def sendPacket(
-        self, packet: Packet, response_handler=None, wait_for_response: bool = True
-    ):
-        self._logger.log_filtered(
-            LogOptions.CONNECTION_DEBUG, "Sending packet: %r", packet
+        self,
+        packet: Packet,
+        response_handler=None,
+        wait_for_response: bool = True,
+        priority: Priority = Priority.COMMAND,
+        coalesce_key: Hashable | None = None,
+    ) -> bool:
+        """
+        Queue packet and wait until it is written
+
+        Parameters
+        ----------
+        packet
+            Packet to send
+        response_handler, optional
+            Notification handler to register before the packet is written
+        wait_for_response, optional
+            If False, packet is written without response even if the protocol requires
+            writes with response
+        priority, optional
+            Priority class of the packet in the command queue
+        coalesce_key, optional
+            Packets with the same key replace each other while waiting in the queue. If
+            not provided and the packet is sent from a control, the key is derived from
+            the control and packet route.
+
+        Returns
+        -------
+        True if packet was written, False otherwise
+        """
+        return await self._queue_packet(
+            packet, response_handler, wait_for_response, priority, coalesce_key
         )
 
+    async def send_confirmed(
+        self,
+        packet: Packet,
+        confirm: ConfirmFunc | None = None,
+        timeout: float = 10,
+        priority: Priority = Priority.COMMAND,
+    ) -> bool:
+        """
+        Send packet with unique sequence number and wait for device confirmation
+
+        Parameters
+        ----------
+        packet
+            Packet to send
+        confirm, optional
+            Function returning True once the device state reflects the command,
+            checked after each processed packet
+        timeout, optional
+            Seconds to wait for confirmation
+        priority, optional
+            Priority class of the packet in the command queue
+
+        Returns
+        -------
+        True if confirm function returned True before timeout, or without confirm
+        function if device replied to the packet before timeout, False otherwise
+        """
+        packet, counter = self._acks.with_seq(packet)
+        pending = self._acks.track(
+            packet, counter, confirm, timeout, scope=current_coalesce_scope()
+        )
+
+        if not await self.sendPacket(packet, priority=priority):
+            self._acks.discard(pending)
+        return await pending.future
+
+    def _queue_packet(
+        self,
+        packet: Packet,
+        response_handler=None,
+        wait_for_response: bool = True,
+        priority: Priority = Priority.COMMAND,
+        coalesce_key: Hashable | None = None,
+    ) -> asyncio.Future[bool]:
+        if coalesce_key is None and (scope := current_coalesce_scope()) is not None:
+            coalesce_key = (scope, packet.dst, packet.cmdSet, packet.cmdId)
+
+        async def _encode():
+            self._logger.log_filtered(
+                LogOptions.CONNECTION_DEBUG, "Sending packet: %r", packet
+            )
+            # packets are encoded right before the write, so they always use the
+            # current session state
+            frame_assembler = self._frame_assembler or self._create_frame_assembler()
+            return await frame_assembler.encode(packet)
+
+        async def _write():
+            to_send = await _encode()
+            frame_assembler = self._frame_assembler or self._create_frame_assembler()
+            await self._write_frame(
+                to_send,
+                with_response=frame_assembler.write_with_response and wait_for_response,
+                response_handler=response_handler,
+            )
+
+        # packets waiting for a response need their own write
+        batchable = response_handler is None and wait_for_response
+        return self._commands.submit(
+            _write, priority, coalesce_key, encode=_encode if batchable else None
+        )
+
+    def _queue_serialized_packet(
+        self, data: bytes, priority: Priority = Priority.COMMAND
+    ) -> asyncio.Future[bool]:
+        async def _encode():
+            self._logger.log_filtered(
+                LogOptions.CONNECTION_DEBUG, "Sending serialized packet: %r", data
+            )
+            frame_assembler = self._frame_assembler or self._create_frame_assembler()
+            return await frame_assembler.encode_bytes(data)
+
+        async def _write():
+            await self._write_batch(await _encode())
+
+        return self._commands.submit(_write, priority, encode=_encode)
+
+    async def _write_batch(self, to_send: bytes):
         frame_assembler = self._frame_assembler or self._create_frame_assembler()
+        await self._write_frame(
+            to_send, with_response=frame_assembler.write_with_response
+        )
 
-        to_send = await frame_assembler.encode(packet)
+    def _max_batch_size(self) -> int:
+        if (
+            not self._options.write_batching
+            or self._client is None
+            or not self._client.is_connected
+        ):
+            return 0
+        # frames are written as single ATT write, so they have to fit into MTU - 3
+        return self._write_characteristic.max_write_without_response_size
 
-        if frame_assembler.write_with_response and wait_for_response:
-            await self.sendRequest(to_send, response_handler)
+    async def _write_frame(
+        self, to_send: bytes, with_response: bool, response_handler=None
+    ):
+        if with_response:
+            self._log_send(to_send)
+            await self._sendRequest(to_send, response_handler)
         elif self._client is not None and self._client.is_connected:
             await self._client.write_gatt_char(
                 self._write_characteristic, bytearray(to_send), response=False
             )
+            self._writes.add(len(to_send))
 
     async def replyPacket(self, packet: Packet):
         """Copy and change the packet to be reply packet and sends it back to device"""
         # Found it's necesary to send back the packets, otherwise device will not send
         # moar info then strict minimum - which just about power params, but not configs
         # & advanced params
+        if (reply := packet.reply_bytes()) is not None:
+            # patched directly from the received frame, no need to build new packet
+            self._queue_serialized_packet(reply, priority=Priority.REPLY)
+            return
+
         reply_packet = Packet(
             packet.dst,  # Switching src to dst
             packet.src,  # Switching dst to src
@@ -822,8 +1197,8 @@ class Connection:
             packet.seq,
             packet.productId,
         )
-        # Running reply asynchroneously
-        self._add_task(self.sendPacket(reply_packet))
+        # Queued without waiting, so replies do not block packet processing
+        self._queue_packet(reply_packet, priority=Priority.REPLY)
 
     async def initBleSessionKey(self):
         self._simple_assembler.reset()
@@ -849,8 +1224,9 @@ class Connection:
         self._logger.log_filtered(
             LogOptions.CONNECTION_DEBUG, "initBleSessionKey: Pub key exchange"
         )
-        self._private_key = ecdsa.SigningKey.generate(curve=ecdsa.SECP160r1)
-        self._public_key: ecdsa.VerifyingKey = self._private_key.get_verifying_key()  # pyright: ignore[reportAttributeAccessIssue]
+        with self._hold(LoopStage.ECDH):
+            self._private_key = ecdsa.SigningKey.generate(curve=ecdsa.SECP160r1)
+            self._public_key: ecdsa.VerifyingKey = self._private_key.get_verifying_key()  # pyright: ignore[reportAttributeAccessIssue]
 
         to_send = SimplePacketAssembler.encode(
             # Payload contains some weird prefix and generated public key
@@ -878,17 +1254,18 @@ class Connection:
             )
         # status = data[1]
         ecdh_type_size = getEcdhTypeSize(data[2])
-        self._dev_pub_key = ecdsa.VerifyingKey.from_string(
-            data[3 : ecdh_type_size + 3], curve=ecdsa.SECP160r1
-        )
 
         # Generating shared key from our private key and received device public key
         # NOTE: The device will do the same with it's private key and our public key to
         # generate the # same shared key value and use it to encrypt/decrypt using
         # symmetric encryption algorithm
-        shared_key = ecdsa.ECDH(
-            ecdsa.SECP160r1, self._private_key, self._dev_pub_key
-        ).generate_sharedsecret_bytes()
+        with self._hold(LoopStage.ECDH):
+            self._dev_pub_key = ecdsa.VerifyingKey.from_string(
+                data[3 : ecdh_type_size + 3], curve=ecdsa.SECP160r1
+            )
+            shared_key = ecdsa.ECDH(
+                ecdsa.SECP160r1, self._private_key, self._dev_pub_key
+            ).generate_sharedsecret_bytes()
         # Set Initialization Vector from digest of the original shared key
         iv = hashlib.md5(shared_key).digest()
 
@@ -953,18 +1330,25 @@ class Connection:
             self._packet_version,
         )
 
-        await self.sendPacket(packet=packet, response_handler=self.getAuthStatusHandler)
+        await self.sendPacket(
+            packet=packet,
+            response_handler=self.getAuthStatusHandler,
+            priority=Priority.AUTH,
+        )
 
     @_auth_handler(ConnectionState.REQUESTING_AUTH_STATUS)
     async def getAuthStatusHandler(
         self, characteristic: BleakGATTCharacteristic, recv_data: bytearray
     ):
-        self._set_state(ConnectionState.AUTH_STATUS_RECEIVED)
-        await self._client.stop_notify(self._notify_characteristic)
-
         packets = await self.parseEncPackets(bytes(recv_data))
         if len(packets) < 1:
+            # with small MTU the reply is split over several notifications
+            if self._frame_assembler is not None and self._frame_assembler.pending:
+                return
             raise PacketReceiveError
+
+        self._set_state(ConnectionState.AUTH_STATUS_RECEIVED)
+        await self._client.stop_notify(self._notify_characteristic)
         data = packets[0].payload
 
         self._logger.log_filtered(
@@ -999,7 +1383,7 @@ class Connection:
         )
 
         # Sending request and starting the common listener
-        await self.sendPacket(packet, self.listenForDataHandler)
+        await self.sendPacket(packet, self.listenForDataHandler, priority=Priority.AUTH)
 
     async def _check_auth(self, packet: Packet):
         exc = AuthErrors.from_payload(packet.payload)
@@ -1026,11 +1410,14 @@ class Connection:
             0x01,
             self._packet_version,
         )
-        await self.sendPacket(pkt)
+        await self.sendPacket(pkt, priority=Priority.AUTH)
 
     async def listenForDataHandler(
         self, characteristic: BleakGATTCharacteristic, recv_data: bytearray
     ):
+        received_at = time.monotonic()
+        timings = self._timings
+        start = time.perf_counter_ns() if timings is not None else 0
         try:
             packets = await self.parseEncPackets(bytes(recv_data))
         except Exception as e:  # noqa: BLE001
@@ -1040,8 +1427,7 @@ class Connection:
         self._reset_error_counter()
 
         for packet in packets:
-            processed = False
-
+            packet.received_at = received_at
             # Handling autoAuthentication response
             if (
                 packet.src == self._auth_header_dst
@@ -1051,31 +1437,68 @@ class Connection:
                 await self._check_auth(packet)
                 self._connection_attempt = 0
                 self._reconnect_attempt = 0
-                processed = True
                 self._logger.info("Auth completed, everything is fine")
+                self._store_protocol_params()
+                self._record_recovery()
                 self._set_state(ConnectionState.AUTHENTICATED)
                 self._connected.set()
-            else:
-                try:
-                    # Processing the packet with specific device
-                    processed = await self._data_parse(packet)
-                except Exception as e:  # noqa: BLE001
-                    await self.add_error(e)
-                    continue
+                continue
 
-            if not processed:
-                self._logger.log_filtered(
-                    LogOptions.CONNECTION_DEBUG, "listenForDataHandler: %r", packet
+            # Device logic runs in a separate task so slow handlers do not hold up
+            # notifications
+            self._inbound.start()
+            self._inbound.put(packet)
+
+        if timings is not None:
+            timings.add(Stage.RECEIVE, start)
+
+    async def _process_packet(self, packet: Packet):
+        self._acks.on_packet(packet)
+        token = (
+            _packet_received_at.set(packet.received_at)
+            if self._timings is not None
+            else None
+        )
+        try:
+            # Processing the packet with specific device
+            if self._loop_holds is None:
+                processed = await self._data_parse(packet)
+            else:
+                processed = await self._loop_holds.timed(
+                    LoopStage.DATA_PARSE, self._data_parse(packet)
                 )
+        except Exception as e:  # noqa: BLE001
+            await self.add_error(e)
+            return
+        finally:
+            if token is not None:
+                _packet_received_at.reset(token)
+            self._acks.check_confirmations()
+
+        if not processed:
+            self._logger.log_filtered(
+                LogOptions.CONNECTION_DEBUG, "listenForDataHandler: %r", packet
+            )
+
+    def _record_recovery(self):
+        if self._recovery_started is None:
+            return
+
+        started, cpu_started = self._recovery_started
+        self._recovery_started = None
+        self._recoveries.add((time.monotonic() - started) * 1000)
+        self._recovery_cpu.add((time.process_time() - cpu_started) * 1000)
 
     def _create_frame_assembler(self):
         match self._encrypt_type:
             case 1:
-                return RawHeaderAssembler(self._encryption)
+                assembler = RawHeaderAssembler(self._encryption)
             case 7:
-                return EncPacketAssembler(self._encryption)
+                assembler = EncPacketAssembler(self._encryption)
             case _:
                 raise ValueError(f"Unsupported encryption type: {self._encrypt_type}")
+        assembler.timings = self._timings
+        return assembler
 
     def _cancel_tasks(self):
         for task in self._tasks:
@@ -1092,25 +1515,70 @@ class Connection:
         task.add_done_callback(self._tasks.discard)
         return task
 
+    def _cancel_timers(self):
+        if self._timers is not None:
+            self._timers.cancel_owner(self)
+
     def add_timer_task(
         self,
         coro: Callable[[], Coroutine],
         interval: float = 30,
         event_loop: asyncio.AbstractEventLoop | None = None,
+        key: Hashable | None = None,
     ):
+        """
+        Run coroutine periodically while the connection is authenticated
+
+        Timers are registered on the scheduler shared by all connections running on the
+        same event loop and are cancelled on disconnect. Adding a timer with the same
+        key (coroutine function by default) replaces the previous one.
+        """
+
         async def _timer_task():
-            while True:
-                start_time = time.monotonic()
-                if self._connection_state != ConnectionState.AUTHENTICATED:
-                    await self._state_changed.wait()
-                    continue
-                await coro()
-
-                elapsed = time.monotonic() - start_time
-                sleep_time = max(0, interval - (elapsed % interval))
-                await asyncio.sleep(sleep_time)
-
-        return self._add_task(_timer_task(), event_loop)
+            if self._connection_state != ConnectionState.AUTHENTICATED:
+                return
+            await coro()
+
+        _timer_task.__qualname__ = getattr(coro, "__qualname__", repr(coro))
+
+        self._timers = TimerScheduler.for_loop(event_loop)
+        return self._timers.schedule(
+            key=(id(self), key if key is not None else coro),
+            callback=_timer_task,
+            interval=interval,
+            owner=self,
+        )
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """Runtime statistics of this connection"""
+        return {
+            "timers": self._timers.stats(owner=self) if self._timers else {},
+            "protocol_cache": self._protocol_cache.as_dict(),
+            "inbound_queue": self._inbound.stats.as_dict(),
+            "command_queue": self._commands.stats.as_dict(),
+            "writes": self._writes.as_dict(),
+            "recovery": {
+                "time_ms": self._recoveries.as_dict(),
+                "cpu_ms": self._recovery_cpu.as_dict(),
+            },
+            "acks": self._acks.stats(),
+            "frame_cache": (
+                self._frame_assembler.cache_stats.as_dict()
+                if self._frame_assembler
+                else {}
+            ),
+        }
+
+
+_packet_received_at: ContextVar[float | None] = ContextVar(
+    "packet_received_at", default=None
+)
+
+
+def current_packet_received_at() -> float | None:
+    """Receive time of the packet being processed, set while stage timing is on"""
+    return _packet_received_at.get()
 
 
 def getEcdhTypeSize(curve_num: int):
@@ -12,9 +12,14 @@ crc16_arc = Configuration(
 )
 
 
+# table-driven calculators are built once, creating them per call dominates the cost
+_crc8 = Calculator(Crc8.CCITT, optimized=True)
+_crc16 = Calculator(crc16_arc, optimized=True)
+
+
 def crc8(data: bytes):
-    return Calculator(Crc8.CCITT).checksum(data)
+    return _crc8.checksum(data)
 
 
 def crc16(data: bytes):
-    return Calculator(crc16_arc).checksum(data)
+    return _crc16.checksum(data)
@@ -2,13 +2,14 @@ import abc
 import asyncio
 import time
 from collections import defaultdict
-from collections.abc import Callable, Coroutine
+from collections.abc import Callable, Collection, Coroutine, Mapping
 from dataclasses import dataclass, field
 from functools import cached_property
-from typing import Any, overload
+from typing import Any, ClassVar, Self, overload
 
 from bleak.backends.device import BLEDevice
 from bleak.backends.scanner import AdvertisementData
+from bleak_retry_connector import BleakClientWithServiceCache
 
 from .connection import (
     Connection,
@@ -19,7 +20,9 @@ from .connection import (
     DisconnectListener,
     PacketParsedListener,
     PacketReceivedListener,
+    current_packet_received_at,
 )
+from .instrumentation import ConnectTimings, StageRates, StageTimings
 from .listeners import ListenerGroup, ListenerRegistry
 from .logging_util import (
     ConnectionLog,
@@ -27,9 +30,16 @@ from .logging_util import (
     DeviceLogger,
     LogOptions,
 )
+from .loop_monitor import LoopHolds, LoopMonitor
 from .packet import Packet
 from .props.raw_data_props import Literal
 
+# interval in seconds of stage rate sensor updates
+STAGE_RATES_INTERVAL = 60
+
+# receives indices of extra batteries that are currently connected
+type TopologyChangeListener = Callable[[frozenset[int]], None]
+
 
 class _Listeners(ListenerRegistry):
     on_packet_received: ListenerGroup[PacketReceivedListener]
@@ -38,6 +48,7 @@ class _Listeners(ListenerRegistry):
     on_packet_parsed: ListenerGroup[PacketParsedListener]
     on_data_received: ListenerGroup[DataReceivedListener]
     on_data_send: ListenerGroup[DataSendListener]
+    on_topology_change: ListenerGroup[TopologyChangeListener]
 
 
 class DeviceBase(abc.ABC):
@@ -48,12 +59,40 @@ class DeviceBase(abc.ABC):
     NAME_PREFIX: str
     SN_PREFIX: tuple[bytes, ...]
 
+    # (src, cmdSet, cmdId) routes where every packet is a full snapshot, so only the
+    # newest one needs to be parsed when packets are queued faster than processed
+    HEARTBEAT_ROUTES: ClassVar[Collection[tuple[int, int, int]]] = ()
+
+    # minimal time between two writes to the device in seconds
+    MIN_WRITE_INTERVAL: ClassVar[float] = 0.05
+
+    # extra battery slots exposed as `battery_{n}_*` fields
+    EXTRA_BATTERY_SLOTS: ClassVar[range] = range(1, 6)
+
     _listeners = _Listeners.create()
 
     @classmethod
     @abc.abstractmethod
     def check(cls, sn: bytes) -> bool: ...
 
+    @classmethod
+    def _without_connection(cls, sn: str) -> Self:
+        # names and models are derived from the serial number only, so they can be
+        # read from a bare instance without going through __init__
+        device = cls.__new__(cls)
+        device._sn = sn
+        return device
+
+    @classmethod
+    def default_name_for(cls, sn: str) -> str:
+        """Return default name of the device with serial number"""
+        return cls._without_connection(sn).NAME_PREFIX + sn[-4:]
+
+    @classmethod
+    def model_for(cls, sn: str) -> str:
+        """Return model name of the device with serial number"""
+        return cls._without_connection(sn).device
+
     def __init__(
         self, ble_dev: BLEDevice, adv_data: AdvertisementData, sn: str
     ) -> None:
@@ -84,12 +123,28 @@ class DeviceBase(abc.ABC):
         self._update_period = 0
         self._last_updated = 0
         self._props_to_update = set()
+        # receive time of the oldest frame with unpublished updates, per field
+        self._props_received_at: dict[str, float] = {}
         self._wait_until_throttle = 0
         self._packet_version = 0x03
 
+        self._timer_tasks: dict[
+            Callable[[], Coroutine],
+            tuple[float, asyncio.AbstractEventLoop | None],
+        ] = {}
+
         self._reconnect_disabled = False
+        self._state_restored = False
+        self._extra_batteries: frozenset[int] | None = None
+        self.on_connection_state_change(self._clear_restored_state)
+        self.on_connection_state_change(self._on_connect_timed)
         self._options = Connection.Options()
+        self._client_class: type[BleakClientWithServiceCache] | None = None
         self._diagnostics = DeviceDiagnosticsCollector(self)
+        self._timings: StageTimings | None = None
+        self._connect_timings = ConnectTimings()
+        self._loop_holds: LoopHolds | None = None
+        self._stage_rates: StageRates | None = None
 
         self._manufacturer_data = adv_data.manufacturer_data[self.MANUFACTURER_KEY]
 
@@ -121,6 +176,11 @@ class DeviceBase(abc.ABC):
     def is_connected(self) -> bool:
         return self._conn is not None and self._conn.is_connected
 
+    @property
+    def reconnecting(self) -> bool:
+        """Whether the connection recovers from drops by reconnecting in place"""
+        return self._conn is not None and self._conn.reconnecting
+
     @property
     def packet_version(self) -> int:
         return self._packet_version
@@ -137,6 +197,51 @@ class DeviceBase(abc.ABC):
     def diagnostics(self):
         return self._diagnostics
 
+    @property
+    def stage_timings(self) -> StageTimings | None:
+        """Hot path stage timings, None if timing is disabled"""
+        return self._timings
+
+    @property
+    def loop_holds(self) -> LoopHolds | None:
+        """Time spent holding the event loop, None if loop monitoring is disabled"""
+        return self._loop_holds
+
+    @property
+    def connect_timings(self) -> ConnectTimings:
+        """Durations of connection attempts made by this device"""
+        return self._connect_timings
+
+    @property
+    def last_connect_duration(self) -> float | None:
+        """Seconds the last successful connection took to authenticate"""
+        return self._connect_timings.last_connect_duration
+
+    def _on_connect_timed(self, state: ConnectionState):
+        if state is ConnectionState.AUTHENTICATED:
+            self.update_callback("last_connect_duration")
+
+    @property
+    def frame_rate(self) -> float | None:
+        """Frames received per second, None if stage timing is disabled"""
+        if self._stage_rates is None:
+            return None
+        return self._stage_rates.frames_per_second
+
+    @property
+    def mean_decode_time(self) -> float | None:
+        """Mean payload decode time in microseconds"""
+        if self._stage_rates is None:
+            return None
+        return self._stage_rates.mean_decode_us
+
+    @property
+    def error_rate(self) -> float | None:
+        """Errors per minute, None if stage timing is disabled"""
+        if self._stage_rates is None:
+            return None
+        return self._stage_rates.errors_per_minute
+
     @cached_property
     def scan_record(self):
         return _ScanRecordV2.from_manufacturer_data(self._manufacturer_data)
@@ -147,11 +252,93 @@ class DeviceBase(abc.ABC):
         interval: float = 30,
         event_loop: asyncio.AbstractEventLoop | None = None,
     ):
-        def _register_timer_task(state: ConnectionState):
-            if state == ConnectionState.AUTHENTICATED:
-                self._conn.add_timer_task(coro, interval, event_loop)
+        """
+        Run coroutine periodically every time the device is authenticated
+
+        Timers are keyed by the coroutine function, so adding the same coroutine again
+        only updates its interval instead of starting another timer.
+        """
+        if not self._timer_tasks:
+            self.on_connection_state_change(self._register_timer_tasks)
+        self._timer_tasks[coro] = (interval, event_loop)
+
+    def _register_timer_tasks(self, state: ConnectionState):
+        if state != ConnectionState.AUTHENTICATED or self._conn is None:
+            return
 
-        self.on_connection_state_change(_register_timer_task)
+        for coro, (interval, event_loop) in self._timer_tasks.items():
+            self._conn.add_timer_task(coro, interval, event_loop)
+
+    async def send_confirmed(
+        self,
+        packet: Packet,
+        confirm: Callable[[], bool] | None = None,
+        timeout: float = 10,
+    ) -> bool:
+        """
+        Send packet and wait until the device confirms it
+
+        Parameters
+        ----------
+        packet
+            Packet to send
+        confirm, optional
+            Function returning True once the device state reflects the command, e.g.
+            when the next heartbeat contains the new value
+        timeout, optional
+            Seconds to wait for confirmation
+
+        Returns
+        -------
+        True if the command was confirmed before timeout, False otherwise
+        """
+        if self._conn is None:
+            return False
+        return await self._conn.send_confirmed(packet, confirm, timeout)
+
+    def state_snapshot(self) -> dict[str, Any]:
+        """Return JSON-serializable values of all fields that have a value"""
+        snapshot = {}
+        for prop in self._fields:
+            value = getattr(self, prop.private_name, None)
+            # enums and other types need field transforms to restore, skip them
+            if type(value) in (bool, int, float, str):
+                snapshot[prop.public_name] = value
+        return snapshot
+
+    def restore_state(self, snapshot: Mapping[str, Any]):
+        """
+        Restore field values from a snapshot taken by `state_snapshot`
+
+        Restored values are reported as current state until the first connection
+        attempt either authenticates and starts receiving live data, or fails.
+        """
+        fields = {prop.public_name: prop for prop in self._fields}
+        restored = 0
+        for name, value in snapshot.items():
+            if (prop := fields.get(name)) is not None:
+                setattr(self, prop.private_name, value)
+                restored += 1
+
+        if not restored:
+            return
+
+        self._recompute()
+        self._state_restored = True
+
+    @property
+    def state_restored(self) -> bool:
+        """Whether field values are restored from snapshot and not yet confirmed"""
+        return self._state_restored
+
+    def _clear_restored_state(self, state: ConnectionState):
+        if state is ConnectionState.AUTHENTICATED or state.is_error:
+            self._state_restored = False
+
+    @property
+    def connection_stats(self) -> dict[str, Any]:
+        """Runtime statistics of the current connection"""
+        return {} if self._conn is None else self._conn.stats
 
     def with_update_period(self, period: int):
         self._update_period = period
@@ -176,6 +363,13 @@ class DeviceBase(abc.ABC):
             self._conn.with_options(options)
         return self
 
+    def with_client_class(self, client_class: type[BleakClientWithServiceCache]):
+        """Set BLE client class used by connections, e.g. simulated peripheral client"""
+        self._client_class = client_class
+        if self._conn is not None:
+            self._conn.with_client_class(client_class)
+        return self
+
     def with_packet_version(self, packet_version: int | None = None):
         self._packet_version = (
             packet_version if packet_version is not None else self._packet_version
@@ -189,6 +383,63 @@ class DeviceBase(abc.ABC):
         self._diagnostics.with_buffer_size(buffer_size)
         return self
 
+    def with_stage_timings(self, enabled: bool = True):
+        """
+        Enable or disable timing of hot path stages
+
+        Timings are kept across reconnects and reset when timing is enabled again.
+        """
+        if enabled == (self._timings is not None):
+            return self
+
+        self._timings = StageTimings() if enabled else None
+        self._stage_rates = None
+        self._props_received_at.clear()
+        if self._conn is not None:
+            self._conn.with_stage_timings(self._timings)
+
+        if enabled:
+            self.add_timer_task(self._update_stage_rates, STAGE_RATES_INTERVAL)
+            if self.connection_state == ConnectionState.AUTHENTICATED:
+                self._conn.add_timer_task(
+                    self._update_stage_rates, STAGE_RATES_INTERVAL
+                )
+        else:
+            self._notify_stage_rates()
+        return self
+
+    def with_loop_monitor(self, enabled: bool = True):
+        """
+        Enable or disable monitoring of time eflib work holds the event loop
+
+        The monitor is shared by all devices on the loop, so holds are kept for the
+        lifetime of the loop. Has to be called from the loop.
+        """
+        if enabled == (self._loop_holds is not None):
+            return self
+
+        if enabled:
+            monitor = LoopMonitor.for_loop()
+            monitor.register(self)
+            self._loop_holds = LoopHolds(monitor, self.address)
+        else:
+            self._loop_holds.monitor.unregister(self)
+            self._loop_holds = None
+
+        if self._conn is not None:
+            self._conn.with_loop_holds(self._loop_holds)
+        return self
+
+    async def _update_stage_rates(self):
+        if self._timings is None:
+            return
+        self._stage_rates = self._timings.rates()
+        self._notify_stage_rates()
+
+    def _notify_stage_rates(self):
+        for propname in ("frame_rate", "mean_decode_time", "error_rate"):
+            self.update_callback(propname)
+
     def with_name(self, name: str):
         self._name = name
         return self
@@ -229,7 +480,14 @@ class DeviceBase(abc.ABC):
                 .with_logging_options(self._logger.options)
                 .with_disabled_reconnect(self._reconnect_disabled)
                 .with_options(self._options)
+                .with_coalesced_routes(self.HEARTBEAT_ROUTES)
+                .with_min_write_interval(self.MIN_WRITE_INTERVAL)
+                .with_stage_timings(self._timings)
+                .with_connect_timings(self._connect_timings)
+                .with_loop_holds(self._loop_holds)
             )
+            if self._client_class is not None:
+                self._conn.with_client_class(self._client_class)
             self._connection_event.set()
 
             self._logger.info("Connecting to %s", self.device)
@@ -334,6 +592,40 @@ class DeviceBase(abc.ABC):
     ):
         return self._listeners.on_connection_state_change.add(connection_state_listener)
 
+    def on_topology_change(self, listener: TopologyChangeListener):
+        """
+        Add listener called when extra batteries are connected or disconnected
+
+        Parameters
+        ----------
+        listener
+            Listener receiving indices of all currently connected extra batteries. It
+            is also called once the first report of connected batteries arrives.
+
+        Return
+        -------
+        Function to remove this listener
+        """
+        return self._listeners.on_topology_change.add(listener)
+
+    @property
+    def extra_batteries(self) -> frozenset[int] | None:
+        """Indices of connected extra batteries, None until the device reports them"""
+        return self._extra_batteries
+
+    def _update_extra_battery_topology(self):
+        """Notify topology listeners if `battery_{n}_enabled` fields changed"""
+        batteries = frozenset(
+            i
+            for i in self.EXTRA_BATTERY_SLOTS
+            if getattr(self, f"battery_{i}_enabled", None)
+        )
+        if batteries == self._extra_batteries:
+            return
+
+        self._extra_batteries = batteries
+        self._listeners.on_topology_change(batteries)
+
     def register_callback(
         self, callback: Callable[[], None], propname: str | None = None
     ) -> None:
@@ -358,6 +650,11 @@ class DeviceBase(abc.ABC):
         """Find the registered callbacks in the map and then calling the callbacks"""
 
         self._props_to_update.add(propname)
+        if (
+            self._timings is not None
+            and (received_at := current_packet_received_at()) is not None
+        ):
+            self._props_received_at.setdefault(propname, received_at)
 
         if self._update_period != 0:
             now = time.time()
@@ -374,12 +671,35 @@ class DeviceBase(abc.ABC):
 
             self._last_updated = now
 
+        if self._timings is not None:
+            self._publish_timed(self._timings)
+            return
+
         for prop in self._props_to_update:
             for callback in self._callbacks_map.get(prop, set()):
                 callback()
 
         self._props_to_update.clear()
 
+    def _publish_timed(self, timings: StageTimings):
+        for prop in self._props_to_update:
+            received_at = self._props_received_at.pop(prop, None)
+            if not (callbacks := self._callbacks_map.get(prop)):
+                continue
+
+            published = time.monotonic()
+            for callback in callbacks:
+                callback()
+
+            if received_at is not None:
+                timings.latencies.add(
+                    prop,
+                    publish_ms=(published - received_at) * 1000,
+                    write_ms=(time.monotonic() - received_at) * 1000,
+                )
+
+        self._props_to_update.clear()
+
     def register_state_update_callback(
         self, state_update_callback: Callable[[Any], None], propname: str
     ):
@@ -394,11 +714,25 @@ class DeviceBase(abc.ABC):
 
     def update_state(self, propname: str, value: Any):
         """Run callback for updated state"""
-        if propname not in self._state_update_callbacks:
+        if not (callbacks := self._state_update_callbacks.get(propname)):
             return
 
-        for update in self._state_update_callbacks[propname]:
+        if (
+            self._timings is None
+            or (received_at := current_packet_received_at()) is None
+        ):
+            for update in callbacks:
+                update(value)
+            return
+
+        published = time.monotonic()
+        for update in callbacks:
             update(value)
+        self._timings.latencies.add(
+            propname,
+            publish_ms=(published - received_at) * 1000,
+            write_ms=(time.monotonic() - received_at) * 1000,
+        )
 
 
 @dataclass
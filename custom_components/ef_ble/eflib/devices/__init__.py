@@ -1,3 +1,11 @@
+"""
+Device modules, resolved by serial number prefix
+
+Device modules pull in their generated protobuf modules on import, so they are only
+imported once a serial number that belongs to them is seen. The prefix table below
+mirrors `SN_PREFIX` of each module's `Device` class.
+"""
+
 import importlib
 from pathlib import Path
 from types import ModuleType
@@ -16,6 +24,120 @@ __all__ = [
     if f.is_file() and not f.stem.startswith("_")
 ]
 
-devices: list["ModuleWithDevice | ModuleType"] = [
-    importlib.import_module(f".{device}", __name__) for device in __all__
-]
+SN_PREFIXES: dict[str, tuple[bytes, ...]] = {
+    "alternator_charger": (b"F371", b"F372", b"DC01"),
+    "delta2": (b"R331", b"R335"),
+    "delta2_max": (b"R351", b"R354"),
+    "delta2_plus": (b"D361",),
+    "delta3": (b"P231",),
+    "delta3_air": (b"PR11", b"PR12", b"PR21"),
+    "delta3_classic": (b"P321",),
+    "delta3_max": (b"D3N1",),
+    "delta3_max_plus": (b"D3M1",),
+    "delta3_plus": (b"P351",),
+    "delta3_ultra": (b"D751",),
+    "delta3_ultra_plus": (b"D511",),
+    "delta_pro": (
+        b"DCA",
+        b"DCK",
+        b"DCE",
+        b"DCC",
+        b"DCU",
+        b"DCT",
+        b"DCG",
+        b"DCS",
+        b"DCF",
+        b"Z1",
+        b"R511",
+    ),
+    "delta_pro_3": (b"MR51",),
+    "dpu": (b"Y711",),
+    "powerpulse_ev": (
+        b"C101",
+        b"C102",
+        b"C103",
+        b"C371",
+        b"C372",
+        b"C373",
+        b"C374",
+        b"C375",
+        b"C376",
+    ),
+    "powerstream": (b"HW51",),
+    "river2": (b"R601", b"R603"),
+    "river2_max": (b"R611", b"R613"),
+    "river2_pro": (b"R621", b"R623"),
+    "river3": (b"R651", b"R653", b"R654", b"R655"),
+    "river3_plus": (b"R631", b"R634", b"R635"),
+    "shp2": (b"HD31",),
+    "smart_generator": (b"G371",),
+    "smart_generator_4k": (b"G351",),
+    "smart_meter": (b"BK21",),
+    "stream_ac": (b"BK51",),
+    "stream_ac_pro": (b"BK31",),
+    "stream_max": (b"BK41",),
+    "stream_microinverter": (b"BK01", b"BK02", b"N011"),
+    "stream_pro": (b"BK12",),
+    "stream_ultra": (b"BK11", b"ES11", b"BK61"),
+    "wave2": (b"KT21",),
+    "wave3": (b"AC71",),
+}
+
+FALLBACK_MODULE = "unsupported"
+
+
+class PrefixTrie:
+    """Byte-wise trie returning the value of the longest prefix matching a key"""
+
+    __slots__ = ("_root",)
+
+    _VALUE = -1
+
+    def __init__(self) -> None:
+        self._root: dict[int, dict] = {}
+
+    def insert(self, prefix: bytes, value: str):
+        node = self._root
+        for byte in prefix:
+            node = node.setdefault(byte, {})
+        node[self._VALUE] = value
+
+    def longest_match(self, key: bytes) -> str | None:
+        node = self._root
+        match = None
+        for byte in key:
+            if (node := node.get(byte)) is None:
+                break
+            match = node.get(self._VALUE, match)
+        return match
+
+
+_trie = PrefixTrie()
+for _module, _prefixes in SN_PREFIXES.items():
+    for _prefix in _prefixes:
+        _trie.insert(_prefix, _module)
+
+
+def module_name_for(sn: bytes) -> str:
+    """Return name of the device module handling serial number"""
+    return _trie.longest_match(sn) or FALLBACK_MODULE
+
+
+def load_module(name: str) -> "ModuleWithDevice":
+    """Import device module by name, modules are imported only once"""
+    return importlib.import_module(f".{name}", __name__)
+
+
+def device_class_for(sn: bytes) -> "type[DeviceBase]":
+    """Return device class for serial number, importing only its module"""
+    module = load_module(module_name_for(sn))
+    if (device := getattr(module, "Device", None)) is not None:
+        return device
+    return module.UnsupportedDevice
+
+
+def __getattr__(name: str) -> "list[ModuleWithDevice | ModuleType]":
+    # kept for callers iterating over all device modules, imports every one of them
+    if name == "devices":
+        return [load_module(module) for module in __all__]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,3 +1,5 @@
+import functools
+
 from ..devicebase import DeviceBase
 from ..entity import controls
 from ..entity.base import dynamic
@@ -37,6 +39,15 @@ pb_inv = dataclass_attr_mapper(DirectInvDeltaHeartbeatPack)
 
 
 class Delta2Base(DeviceBase, RawDataProps):
+    HEARTBEAT_ROUTES = (
+        (0x02, 0x20, 0x02),
+        (0x03, 0x20, 0x02),
+        (0x03, 0x20, 0x32),
+        (0x04, 0x20, 0x02),
+        (0x05, 0x20, 0x02),
+        (0x06, 0x20, 0x32),
+    )
+
     ac_output_power = raw_field(pb_inv.output_watts)
     ac_input_voltage = raw_field(pb_inv.ac_in_vol, lambda x: round(x / 1000, 2))
     ac_input_current = raw_field(pb_inv.ac_in_amp, lambda x: round(x / 1000, 2))
@@ -153,26 +164,16 @@ class Delta2Base(DeviceBase, RawDataProps):
 
     @controls.switch(usb_ports)
     async def enable_usb_ports(self, enabled: bool):
-        packet = Packet(0x21, 0x02, 0x20, 0x22, enabled.to_bytes(), version=0x02)
-        await self._conn.sendPacket(packet)
+        await self._conn.sendPacket(_toggle_packet(0x02, 0x22, enabled.to_bytes()))
 
     @controls.switch(dc_12v_port)
     async def enable_dc_12v_port(self, enabled: bool):
-        packet = Packet(
-            0x21,
-            0x05,
-            0x20,
-            0x51,
-            enabled.to_bytes(),
-            version=0x02,
-        )
-        await self._conn.sendPacket(packet)
+        await self._conn.sendPacket(_toggle_packet(0x05, 0x51, enabled.to_bytes()))
 
     @controls.outlet(ac_ports)
     async def enable_ac_ports(self, enabled: bool):
         payload = bytes([1 if enabled else 0, 0xFF, 0xFF, 0xFF, 0xFF, 0xFF, 0xFF])
-        packet = Packet(0x21, self.ac_commands_dst, 0x20, 0x42, payload, version=0x02)
-        await self._conn.sendPacket(packet)
+        await self._conn.sendPacket(_toggle_packet(self.ac_commands_dst, 0x42, payload))
 
     @controls.battery(battery_charge_limit_max, min=dynamic(battery_charge_limit_min))
     async def set_battery_charge_limit_max(self, limit: float):
@@ -216,3 +217,11 @@ class Delta2Base(DeviceBase, RawDataProps):
             if available:
                 self.set_value(battery_dict["sn"], kit.sn.decode())
                 self.set_value(battery_dict["level"], round(kit.f32_soc, 2))
+
+        self._update_extra_battery_topology()
+
+
+@functools.lru_cache(maxsize=32)
+def _toggle_packet(dst: int, cmd_id: int, payload: bytes):
+    """Shared packet for on/off commands, serialized only once per state"""
+    return Packet(0x21, dst, 0x20, cmd_id, payload, version=0x02)
@@ -18,8 +18,8 @@ from ..props import (
 from ..props.enums import IntFieldValue
 from ..props.transforms import flow_is_on, out_power
 
-pb = proto_attr_mapper(pd335_sys_pb2.DisplayPropertyUpload)
-pb_bms = proto_attr_mapper(pd335_bms_bp_pb2.BMSHeartBeatReport)
+pb = proto_attr_mapper(lambda: pd335_sys_pb2.DisplayPropertyUpload)
+pb_bms = proto_attr_mapper(lambda: pd335_bms_bp_pb2.BMSHeartBeatReport)
 
 
 class _DcChargingMaxField(
@@ -31,7 +31,7 @@ class _DcChargingMaxField(
 ):
     vol_type: int
 
-    def get_value(self, item: pd335_sys_pb2.PvChgMaxItem) -> int | None:
+    def get_value(self, item: "pd335_sys_pb2.PvChgMaxItem") -> int | None:
         return item.pv_chg_amp_max if item.pv_chg_vol_type == self.vol_type else None
 
 
@@ -45,7 +45,7 @@ class _DcAmpSettingField(
     vol_type: int
     plug_index: int
 
-    def get_value(self, item: pd335_sys_pb2.PvDcChgSetting) -> int | None:
+    def get_value(self, item: "pd335_sys_pb2.PvDcChgSetting") -> int | None:
         return (
             item.pv_chg_amp_limit
             if item.pv_plug_index == self.plug_index
@@ -186,7 +186,7 @@ class Delta3Base(DeviceBase, ProtobufProps):
     async def set_dc_charging_amps_max(
         self,
         value: float,
-        plug_index: pd335_sys_pb2.PV_PLUG_INDEX = pd335_sys_pb2.PV_PLUG_INDEX_1,
+        plug_index: "pd335_sys_pb2.PV_PLUG_INDEX" = pd335_sys_pb2.PV_PLUG_INDEX_1,
     ) -> bool:
         config = pd335_sys_pb2.ConfigWrite()
         config.cfg_pv_dc_chg_setting.pv_plug_index = plug_index
@@ -11,7 +11,7 @@ from ..pb import dc009_apl_comm_pb2
 from ..props import Field, ProtobufProps, pb_field, proto_attr_mapper
 from ..props.enums import IntFieldValue
 
-pb = proto_attr_mapper(dc009_apl_comm_pb2.DisplayPropertyUpload)
+pb = proto_attr_mapper(lambda: dc009_apl_comm_pb2.DisplayPropertyUpload)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -25,7 +25,7 @@ class ChargerMode(IntFieldValue):
     REVERSE_CHARGE = 3  # original name: PARKING_CHARGE
 
     @classmethod
-    def from_mode(cls, mode: dc009_apl_comm_pb2.SP_CHARGER_CHG_MODE):
+    def from_mode(cls, mode: "dc009_apl_comm_pb2.SP_CHARGER_CHG_MODE"):
         try:
             return cls(mode)
         except ValueError:
@@ -125,7 +125,7 @@ class Device(DeviceBase, ProtobufProps):
 
         return processed
 
-    async def _send_config_packet(self, message: dc009_apl_comm_pb2.ConfigWrite):
+    async def _send_config_packet(self, message: "dc009_apl_comm_pb2.ConfigWrite"):
         payload = message.SerializeToString()
         packet = Packet(0x20, 0x14, 0xFE, 0x11, payload, 0x01, 0x01, 0x13)
         await self._conn.sendPacket(packet)
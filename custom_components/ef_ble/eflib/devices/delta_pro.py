@@ -4,6 +4,7 @@ from functools import cached_property
 from bleak.backends.device import BLEDevice
 from bleak.backends.scanner import AdvertisementData
 
+from ..command_queue import Priority
 from ..devicebase import DeviceBase
 from ..model import (
     AllKitDetailData,
@@ -44,6 +45,13 @@ class Device(DeviceBase, RawDataProps):
     )
     NAME_PREFIX = "EF-DC"
 
+    HEARTBEAT_ROUTES = (
+        (0x02, 0x20, 0x02),
+        (0x03, 0x20, 0x02),
+        (0x03, 0x20, 0x32),
+        (0x04, 0x20, 0x02),
+    )
+
     @property
     def packet_version(self) -> int:
         return 0x02
@@ -221,6 +229,8 @@ class Device(DeviceBase, RawDataProps):
                 version=self.packet_version,
             ),
             wait_for_response=False,
+            priority=Priority.POLL,
+            coalesce_key=(dst, cmd_set, cmd_id),
         )
 
     def _update_extra_batteries(self, kit_data: AllKitDetailData):
@@ -244,6 +254,8 @@ class Device(DeviceBase, RawDataProps):
                 self.set_value(battery_dict["sn"], kit.sn.strip(b"\x00").decode())
                 self.set_value(battery_dict["level"], round(kit.f32_soc, 2))
 
+        self._update_extra_battery_topology()
+
     @cached_property
     def _mppt_dst(self) -> int:
         return 0x07 if self._sn.startswith("R511") else 0x05
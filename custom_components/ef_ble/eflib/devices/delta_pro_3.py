@@ -16,7 +16,7 @@ from ..props.enums import IntFieldValue
 from ..props.resv_info_parser import resv_soc, resv_temperature
 from ..props.transforms import flow_is_on, out_power
 
-pb = proto_attr_mapper(mr521_pb2.DisplayPropertyUpload)
+pb = proto_attr_mapper(lambda: mr521_pb2.DisplayPropertyUpload)
 
 
 class DCPortState(IntFieldValue):
@@ -1,5 +1,7 @@
+from collections.abc import Callable, Sequence
 from enum import IntEnum
 
+from ..command_queue import Priority
 from ..commands import TimeCommands
 from ..devicebase import AdvertisementData, BLEDevice, DeviceBase
 from ..entity import controls
@@ -7,7 +9,6 @@ from ..entity.base import dynamic
 from ..packet import Packet
 from ..pb import yj751_sys_pb2
 from ..props import (
-    Field,
     ProtobufProps,
     field_group,
     pb_field,
@@ -17,13 +18,15 @@ from ..props import (
 from ..props.enums import IntFieldValue
 from ..props.transforms import pmultiply, prop_has_bit_off, prop_has_bit_on, pround
 
-pb_heartbeat = proto_attr_mapper(yj751_sys_pb2.AppShowHeartbeatReport)
+pb_heartbeat = proto_attr_mapper(lambda: yj751_sys_pb2.AppShowHeartbeatReport)
 pb_backend_record_heartbeat = proto_attr_mapper(
-    yj751_sys_pb2.BackendRecordHeartbeatReport
+    lambda: yj751_sys_pb2.BackendRecordHeartbeatReport
+)
+pb_bp_info = proto_attr_mapper(lambda: yj751_sys_pb2.BpInfoReport)
+pb_app_para_heartbeat = proto_attr_mapper(lambda: yj751_sys_pb2.APPParaHeartbeatReport)
+pb_display_property_upload = proto_attr_mapper(
+    lambda: yj751_sys_pb2.DisplayPropertyUpload
 )
-pb_bp_info = proto_attr_mapper(yj751_sys_pb2.BpInfoReport)
-pb_app_para_heartbeat = proto_attr_mapper(yj751_sys_pb2.APPParaHeartbeatReport)
-pb_display_property_upload = proto_attr_mapper(yj751_sys_pb2.DisplayPropertyUpload)
 
 
 class OperatingMode(IntFieldValue):
@@ -51,6 +54,13 @@ class SolarSource(IntEnum):
     HV = 1
 
 
+class _BatteryPresent(repeated_pb_field_type(list_field=pb_bp_info.bp_info)):
+    battery_no: int
+
+    def get_item(self, value: "Sequence[yj751_sys_pb2.BPInfo]") -> bool:
+        return any(item.bp_no == self.battery_no for item in value)
+
+
 class _BatteryLevel(
     repeated_pb_field_type(
         list_field=pb_bp_info.bp_info, value_field=lambda x: x.bp_soc, per_item=True
@@ -58,7 +68,7 @@ class _BatteryLevel(
 ):
     battery_no: int
 
-    def get_value(self, item: yj751_sys_pb2.BPInfo) -> int | None:
+    def get_value(self, item: "yj751_sys_pb2.BPInfo") -> int | None:
         return item.bp_soc if item.bp_no == self.battery_no else None
 
 
@@ -69,7 +79,7 @@ class _BatteryTemperature(
 ):
     battery_no: int
 
-    def get_value(self, item: yj751_sys_pb2.BPInfo) -> int | None:
+    def get_value(self, item: "yj751_sys_pb2.BPInfo") -> int | None:
         return item.bp_temp if item.bp_no == self.battery_no else None
 
 
@@ -83,6 +93,8 @@ class Device(DeviceBase, ProtobufProps):
     SN_PREFIX = b"Y711"
     NAME_PREFIX = "EF-YJ"
 
+    HEARTBEAT_ROUTES = ((0x02, 0x02, 0x01), (0x02, 0x02, 0x02), (0x02, 0x02, 0x03))
+
     # Bitmap for various binary states and the individual binary states therein
     show_flag = pb_field(pb_heartbeat.show_flag)
     is_charging = pb_field(pb_heartbeat.show_flag, prop_has_bit_on(0))
@@ -163,7 +175,7 @@ class Device(DeviceBase, ProtobufProps):
     output_power = pb_field(pb_heartbeat.watts_out_sum)
 
     battery_enabled = field_group(
-        lambda _: Field[bool](), 5, name_template="battery_{n}_enabled"
+        _BatteryPresent, 5, name_template="battery_{n}_enabled"
     )
     battery_battery_level = field_group(
         _BatteryLevel, 5, name_template="battery_{n}_battery_level"
@@ -340,6 +352,7 @@ class Device(DeviceBase, ProtobufProps):
                 # self._logger.debug("DPU APPParaHeartbeatReport: \n %s", str(p))
             case 0x02, 0x02, 0x04:
                 self.update_from_bytes(yj751_sys_pb2.BpInfoReport, packet.payload)
+                self._update_extra_battery_topology()
                 # self._logger.debug("DPU BpInfoReport: \n %s", str(p))
             case 0x02, 0x0A, 0x20:
                 self.update_from_bytes(yj751_sys_pb2.CurrentNode, packet.payload)
@@ -378,11 +391,22 @@ class Device(DeviceBase, ProtobufProps):
 
         return processed
 
-    async def _send_command_packet(self, dst: int, cmd_func: int, cmd_id: int, message):
+    async def _send_command_packet(
+        self,
+        dst: int,
+        cmd_func: int,
+        cmd_id: int,
+        message,
+        *,
+        priority: Priority = Priority.COMMAND,
+        confirm: Callable[[], bool] | None = None,
+    ) -> bool:
         payload = message.SerializeToString()
         p = Packet(0x21, dst, cmd_func, cmd_id, payload, 0x01, 0x01, 0x13)
 
-        await self._conn.sendPacket(p)
+        if confirm is not None:
+            return await self.send_confirmed(p, confirm)
+        return await self._conn.sendPacket(p, priority=priority)
 
     async def enable_wireless_4g(self, enable: bool):
         """Send command to enable/disable wireless 4G"""
@@ -510,10 +534,13 @@ class Device(DeviceBase, ProtobufProps):
         # Current value from pb_app_para_heartbeat.chg_c20_set_watts
         message = yj751_sys_pb2.ACChgSet(chg_c20_watts=int(watts))
 
-        await self._send_command_packet(
-            dst=0x02, cmd_func=0x02, cmd_id=0x49, message=message
+        return await self._send_command_packet(
+            dst=0x02,
+            cmd_func=0x02,
+            cmd_id=0x49,
+            message=message,
+            confirm=lambda: self.ac_c20_charging_power == int(watts),
         )
-        return True
 
     @controls.power(ac_5p8_charging_power, min=600, max=7200, step=100)
     async def set_ac_5p8_charging_power(self, watts: float):
@@ -523,10 +550,13 @@ class Device(DeviceBase, ProtobufProps):
         # Current value from pb_app_para_heartbeat.chg_5p8_set_watts
         message = yj751_sys_pb2.ACChgSet(chg_5p8_watts=int(watts))
 
-        await self._send_command_packet(
-            dst=0x02, cmd_func=0x02, cmd_id=0x49, message=message
+        return await self._send_command_packet(
+            dst=0x02,
+            cmd_func=0x02,
+            cmd_id=0x49,
+            message=message,
+            confirm=lambda: self.ac_5p8_charging_power == int(watts),
         )
-        return True
 
     @controls.battery(backup_discharge_limit, min=0, max=30)
     async def set_backup_discharge_limit(self, soc: float):
@@ -536,10 +566,13 @@ class Device(DeviceBase, ProtobufProps):
         # Current value from pb_app_para_heartbeat.dsg_min_soc
         message = yj751_sys_pb2.DsgSocMinSet(min_dsg_soc=int(soc))
 
-        await self._send_command_packet(
-            dst=0x02, cmd_func=0x02, cmd_id=0x58, message=message
+        return await self._send_command_packet(
+            dst=0x02,
+            cmd_func=0x02,
+            cmd_id=0x58,
+            message=message,
+            confirm=lambda: self.backup_discharge_limit == int(soc),
         )
-        return True
 
     @controls.battery(backup_charge_limit, min=50, max=100)
     async def set_backup_charge_limit(self, soc: float):
@@ -549,10 +582,13 @@ class Device(DeviceBase, ProtobufProps):
         # Current value from pb_app_para_heartbeat.chg_max_soc
         message = yj751_sys_pb2.ChgSocMaxSet(max_chg_soc=int(soc))
 
-        await self._send_command_packet(
-            dst=0x02, cmd_func=0x02, cmd_id=0x57, message=message
+        return await self._send_command_packet(
+            dst=0x02,
+            cmd_func=0x02,
+            cmd_id=0x57,
+            message=message,
+            confirm=lambda: self.backup_charge_limit == int(soc),
         )
-        return True
 
     @controls.battery(backup_reserve_level, min=5, max=100)
     async def set_backup_reserve_level(self, soc: float):
@@ -562,10 +598,13 @@ class Device(DeviceBase, ProtobufProps):
         # Current value from pb_app_para_heartbeat.sys_backup_soc
         message = yj751_sys_pb2.ConfigWrite(cfg_backup_reverse_soc=int(soc))
 
-        await self._send_command_packet(
-            dst=0x02, cmd_func=0xFE, cmd_id=0x11, message=message
+        return await self._send_command_packet(
+            dst=0x02,
+            cmd_func=0xFE,
+            cmd_id=0x11,
+            message=message,
+            confirm=lambda: self.backup_reserve_level == int(soc),
         )
-        return True
 
     async def set_power_standby_minutes(self, minutes: int):
         """Send command to set power standby minutes"""
@@ -627,6 +666,10 @@ class Device(DeviceBase, ProtobufProps):
         message = yj751_sys_pb2.SystemParamGet(get_param_type=param_type)
 
         await self._send_command_packet(
-            dst=0x02, cmd_func=0x02, cmd_id=0x67, message=message
+            dst=0x02,
+            cmd_func=0x02,
+            cmd_id=0x67,
+            message=message,
+            priority=Priority.POLL,
         )
         return True
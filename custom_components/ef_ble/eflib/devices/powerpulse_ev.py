@@ -11,7 +11,7 @@ from ..props import ProtobufProps, pb_field, proto_attr_mapper
 from ..props.enums import IntFieldValue
 from ..props.transforms import pround
 
-pb = proto_attr_mapper(cp307_iot_pb2.HeartBeat)
+pb = proto_attr_mapper(lambda: cp307_iot_pb2.HeartBeat)
 
 
 class AcPlugState(IntFieldValue):
@@ -6,8 +6,8 @@ from ..pb import wn511_sys_pb2
 from ..props import Field, ProtobufProps, pb_field, proto_attr_mapper
 from ..props.enums import IntFieldValue
 
-pb = proto_attr_mapper(wn511_sys_pb2.inverter_heartbeat)
-pb_inv2 = proto_attr_mapper(wn511_sys_pb2.inv_heartbeat_type2)
+pb = proto_attr_mapper(lambda: wn511_sys_pb2.inverter_heartbeat)
+pb_inv2 = proto_attr_mapper(lambda: wn511_sys_pb2.inv_heartbeat_type2)
 
 
 def _div10(value):
@@ -27,6 +27,8 @@ class Device(DeviceBase, ProtobufProps):
     SN_PREFIX = (b"HW51",)
     NAME_PREFIX = "EF-HW"
 
+    HEARTBEAT_ROUTES = ((0x35, 0x14, 0x01), (0x35, 0x14, 0x04))
+
     pv_power_1 = pb_field(pb.pv1_input_watts, _div10)
     pv_voltage_1 = pb_field(pb.pv1_input_volt, _div10)
     pv_current_1 = pb_field(pb.pv1_input_cur, _div10)
@@ -36,6 +36,14 @@ class Device(DeviceBase, RawDataProps):
     NAME_PREFIX = "EF-R2"
     SN_PREFIX = (b"R601", b"R603")
 
+    HEARTBEAT_ROUTES = (
+        (0x02, 0x20, 0x02),
+        (0x03, 0x20, 0x02),
+        (0x03, 0x20, 0x32),
+        (0x04, 0x20, 0x02),
+        (0x05, 0x20, 0x02),
+    )
+
     ac_ports = raw_field(pb_mppt.cfg_ac_enabled, lambda x: x == 1)
     dc_12v_port = raw_field(pb_mppt.car_state, lambda x: x == 1)
     dc12v_output_power = raw_field(pb_pd.car_watts)
@@ -8,4 +8,4 @@ pb_mppt = river2.pb_mppt
 class Device(river2.Device):
     """River 2 Max"""
 
-    SN_PREFIX = (b"R611", "R613")
+    SN_PREFIX = (b"R611", b"R613")
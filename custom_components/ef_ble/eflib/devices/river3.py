@@ -17,7 +17,7 @@ from ..props import (
 from ..props.enums import IntFieldValue
 from ..props.transforms import flow_is_on, out_power
 
-pb = proto_attr_mapper(pr705_pb2.DisplayPropertyUpload)
+pb = proto_attr_mapper(lambda: pr705_pb2.DisplayPropertyUpload)
 
 
 class DcChargingType(IntFieldValue):
@@ -35,9 +35,9 @@ class _StatField(
         per_item=True,
     )
 ):
-    stat: pr705_pb2.STATISTICS_OBJECT
+    stat: "pr705_pb2.STATISTICS_OBJECT"
 
-    def get_value(self, item: pr705_pb2.StatisticsRecordItem) -> int | None:
+    def get_value(self, item: "pr705_pb2.StatisticsRecordItem") -> int | None:
         return item.statistics_content if item.statistics_object == self.stat else None
 
 
@@ -20,8 +20,8 @@ from ..props import (
 from ..props.enums import IntFieldValue
 from ..props.protobuf_field import TransformIfMissing
 
-pb_time = proto_attr_mapper(pd303_pb2.ProtoTime)
-pb_push_set = proto_attr_mapper(pd303_pb2.ProtoPushAndSet)
+pb_time = proto_attr_mapper(lambda: pd303_pb2.ProtoTime)
+pb_push_set = proto_attr_mapper(lambda: pd303_pb2.ProtoPushAndSet)
 
 
 class ControlStatus(IntFieldValue):
@@ -98,7 +98,7 @@ class ChannelPowerField(repeated_pb_field_type(list_field=pb_time.watt_info.ch_w
         return round(value[self.idx], 2) if value and len(value) > self.idx else None
 
 
-def _errors(error_codes: pd303_pb2.ErrCode):
+def _errors(error_codes: "pd303_pb2.ErrCode"):
     return [e for e in error_codes.err_code if e != b"\x00\x00\x00\x00\x00\x00\x00\x00"]
 
 
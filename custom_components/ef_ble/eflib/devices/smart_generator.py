@@ -8,7 +8,7 @@ from ..pb import ge305_sys_pb2
 from ..props import ProtobufProps, pb_field, proto_attr_mapper
 from ..props.enums import IntFieldValue
 
-pb = proto_attr_mapper(ge305_sys_pb2.DisplayPropertyUpload)
+pb = proto_attr_mapper(lambda: ge305_sys_pb2.DisplayPropertyUpload)
 
 
 class FuelType(IntFieldValue):
@@ -147,7 +147,7 @@ class Device(DeviceBase, ProtobufProps):
 
         return processed
 
-    async def _send_config_packet(self, message: ge305_sys_pb2.ConfigWrite):
+    async def _send_config_packet(self, message: "ge305_sys_pb2.ConfigWrite"):
         payload = message.SerializeToString()
         packet = Packet(0x20, 0x08, 0xFE, 0x11, payload, 0x01, 0x01, 0x13)
         await self._conn.sendPacket(packet)
@@ -10,7 +10,7 @@ from ..props import (
 )
 from ..props.enums import IntFieldValue
 
-pb = proto_attr_mapper(bk622_common_pb2.DisplayPropertyUpload)
+pb = proto_attr_mapper(lambda: bk622_common_pb2.DisplayPropertyUpload)
 
 
 class GridState(IntFieldValue):
@@ -81,7 +81,7 @@ class Device(DeviceBase, ProtobufProps):
 
         return processed
 
-    async def _send_config_packet(self, message: bk622_common_pb2.ConfigWrite):
+    async def _send_config_packet(self, message: "bk622_common_pb2.ConfigWrite"):
         payload = message.SerializeToString()
         message.cfg_utc_time = round(time.time())
         packet = Packet(0x20, 0x02, 0xFE, 0x11, payload, 0x01, 0x01, 0x13)
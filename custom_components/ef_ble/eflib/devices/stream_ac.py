@@ -14,8 +14,8 @@ from ..props import (
 from ..props.enums import IntFieldValue
 from ..props.protobuf_field import proto_has_attr
 
-pb = proto_attr_mapper(bk_series_pb2.DisplayPropertyUpload)
-pb_time_task = proto_attr_mapper(bk_series_pb2.TimerTask)
+pb = proto_attr_mapper(lambda: bk_series_pb2.DisplayPropertyUpload)
+pb_time_task = proto_attr_mapper(lambda: bk_series_pb2.TimerTask)
 
 
 def _round(value: float):
@@ -24,15 +24,15 @@ def _round(value: float):
 
 class ResidentLoad(repeated_pb_field_type(pb.day_resident_load_list.load)):
     def get_item(
-        self, value: Sequence[bk_series_pb2.ResidentLoad]
-    ) -> bk_series_pb2.ResidentLoad | None:
+        self, value: "Sequence[bk_series_pb2.ResidentLoad]"
+    ) -> "bk_series_pb2.ResidentLoad | None":
         return value[0] if len(value) == 1 else None
 
 
 class ChargingTimerTask(repeated_pb_field_type(pb.all_timer_task.time_task)):
     def get_item(
-        self, value: Sequence[bk_series_pb2.TimerTask]
-    ) -> bk_series_pb2.TimerTask | None:
+        self, value: "Sequence[bk_series_pb2.TimerTask]"
+    ) -> "bk_series_pb2.TimerTask | None":
         if not value:
             return None
 
@@ -55,7 +55,7 @@ class EnergyStrategy(IntFieldValue):
     UNKNOWN = -1
 
     @classmethod
-    def from_pb(cls, strategy: bk_series_pb2.CfgEnergyStrategyOperateMode):
+    def from_pb(cls, strategy: "bk_series_pb2.CfgEnergyStrategyOperateMode"):
         if strategy.operate_self_powered_open:
             return cls.SELF_POWERED
 
@@ -70,7 +70,7 @@ class EnergyStrategy(IntFieldValue):
         return cls.UNKNOWN
 
     def as_pb(
-        self, operate_mode: bk_series_pb2.CfgEnergyStrategyOperateMode | None = None
+        self, operate_mode: "bk_series_pb2.CfgEnergyStrategyOperateMode | None" = None
     ):
         if operate_mode is None:
             operate_mode = bk_series_pb2.CfgEnergyStrategyOperateMode()
@@ -182,7 +182,7 @@ class Device(DeviceBase, ProtobufProps):
 
         return processed
 
-    async def _send_config_packet(self, message: bk_series_pb2.ConfigWrite):
+    async def _send_config_packet(self, message: "bk_series_pb2.ConfigWrite"):
         payload = message.SerializeToString()
         message.cfg_utc_time = round(time.time())
         packet = Packet(0x20, 0x02, 0xFE, 0x11, payload, 0x01, 0x01, 0x13)
@@ -259,19 +259,19 @@ class Device(DeviceBase, ProtobufProps):
         return True
 
     async def set_charging_grid_power_limit(self, limit: int):
-        def set_power_limit(dev_soc: bk_series_pb2.DeviceTargetSoc):
+        def set_power_limit(dev_soc: "bk_series_pb2.DeviceTargetSoc"):
             dev_soc.chg_from_grid_power_limited = limit
 
         return await self._send_charging_task_packet(set_power_limit)
 
     async def set_charging_grid_target_soc(self, soc: int):
-        def set_target_soc(dev_soc: bk_series_pb2.DeviceTargetSoc):
+        def set_target_soc(dev_soc: "bk_series_pb2.DeviceTargetSoc"):
             dev_soc.target_soc = soc
 
         return await self._send_charging_task_packet(set_target_soc)
 
     async def _send_charging_task_packet(
-        self, modify_dev_target_soc: Callable[[bk_series_pb2.DeviceTargetSoc], None]
+        self, modify_dev_target_soc: "Callable[[bk_series_pb2.DeviceTargetSoc], None]"
     ):
         if (
             self._charging_task is None
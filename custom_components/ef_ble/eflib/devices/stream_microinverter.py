@@ -6,7 +6,7 @@ from ..pb import bk_series_pb2
 from ..props import ProtobufProps, pb_field, proto_attr_mapper
 from ..props.enums import IntFieldValue
 
-pb = proto_attr_mapper(bk_series_pb2.DisplayPropertyUpload)
+pb = proto_attr_mapper(lambda: bk_series_pb2.DisplayPropertyUpload)
 
 
 class GridStatus(IntFieldValue):
@@ -70,7 +70,7 @@ class Device(DeviceBase, ProtobufProps):
 
         return processed
 
-    async def _send_config_packet(self, message: bk_series_pb2.ConfigWrite):
+    async def _send_config_packet(self, message: "bk_series_pb2.ConfigWrite"):
         payload = message.SerializeToString()
         message.cfg_utc_time = round(time.time())
         packet = Packet(0x20, 0x02, 0xFE, 0x11, payload, 0x01, 0x01, 0x13)
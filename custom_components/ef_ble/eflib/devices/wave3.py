@@ -9,8 +9,8 @@ from ..props.protobuf_field import proto_attr_mapper
 from ..props.transforms import pround
 
 # Two mappers: Display and Runtime
-pb_disp = proto_attr_mapper(ac517_apl_comm_pb2.DisplayPropertyUpload)
-pb_run = proto_attr_mapper(ac517_apl_comm_pb2.RuntimePropertyUpload)
+pb_disp = proto_attr_mapper(lambda: ac517_apl_comm_pb2.DisplayPropertyUpload)
+pb_run = proto_attr_mapper(lambda: ac517_apl_comm_pb2.RuntimePropertyUpload)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -34,7 +34,7 @@ class TemperatureUnit(IntFieldValue):
     FAHRENHEIT = 2
 
     @classmethod
-    def from_mode(cls, mode: ac517_apl_comm_pb2.USER_TEMP_UNIT_TYPE):
+    def from_mode(cls, mode: "ac517_apl_comm_pb2.USER_TEMP_UNIT_TYPE"):
         try:
             return cls(mode)
         except ValueError:
@@ -122,7 +122,7 @@ class Device(DeviceBase, ProtobufProps):
         self.update_state("power", self.power)
         return processed
 
-    async def _send_config_packet(self, message: ac517_apl_comm_pb2.ConfigWrite):
+    async def _send_config_packet(self, message: "ac517_apl_comm_pb2.ConfigWrite"):
         payload = message.SerializeToString()
         packet = Packet(0x20, 0x42, 0xFE, 0x11, payload, 0x01, 0x01, 0x13)
         await self._conn.sendPacket(packet)
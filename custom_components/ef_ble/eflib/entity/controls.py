@@ -3,6 +3,7 @@ import inspect
 from collections.abc import Awaitable, Callable, Iterable
 from typing import TYPE_CHECKING, Any, cast, get_type_hints
 
+from ..command_queue import coalesce_scope
 from ..props.enums import IntFieldValue
 from . import DynamicValue, EntityType, units
 
@@ -40,7 +41,12 @@ class toggle(ControlType):
         func: Callable[[D, bool], Awaitable[None]],
     ):
         _check_value_param(func, bool, type(self).__name__)
-        self.enable_func = func
+
+        async def _enable(device: D, enabled: bool) -> None:
+            with coalesce_scope(func.__qualname__):
+                await func(device, enabled)
+
+        self.enable_func = _enable
         self._field.sensor(self)
         return func
 
@@ -78,7 +84,8 @@ class NumberType(ControlType):
                 value = max(low, value)
             if (high := _resolve(control.max, device)) is not None:
                 value = min(high, value)
-            return await func(device, value)
+            with coalesce_scope(func.__qualname__):
+                return await func(device, value)
 
         self.set_value_func = _check_limits
 
@@ -147,7 +154,8 @@ class select[E: IntFieldValue](ControlType):
             if isinstance(value, str) and value_type is not None:
                 value = value_type[value.upper()]
 
-            await func(device, value)  # pyright: ignore[reportArgumentType]
+            with coalesce_scope(func.__qualname__):
+                await func(device, value)  # pyright: ignore[reportArgumentType]
 
         self.set_value_func = _func  # pyright: ignore[reportAttributeAccessIssue]
         self._field.sensor(self)
@@ -191,7 +199,8 @@ def for_each(
                 enabled: bool,
                 _id: int = idx,
             ) -> None:
-                await func(device, _id, enabled)
+                with coalesce_scope((func.__qualname__, _id)):
+                    await func(device, _id, enabled)
 
             ctrl.enable_func = _enable
             field.sensor(ctrl)
@@ -1,32 +1,107 @@
 import struct
+import time
 from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
 
 from .crc import crc8, crc16
 from .encpacket import EncPacket
 from .encryption import EncryptionStrategy
 from .exceptions import PacketParseError
+from .instrumentation import Stage, StageTimings
 from .packet import Packet
 
 
-class FrameAssembler(ABC):
-    """Strategy for wire-level frame encoding and decoding"""
+@dataclass
+class FrameCacheStats:
+    hits: int = 0
+    misses: int = 0
+    size: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def as_dict(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": self.size,
+            "hit_rate": round(self.hit_rate, 3),
+        }
 
-    def __init__(self, encryption: EncryptionStrategy) -> None:
+
+class FrameAssembler(ABC):
+    """
+    Strategy for wire-level frame encoding and decoding
+
+    Encoded frames are kept in a small LRU cache keyed by packet fields, so repeated
+    polls and commands are encrypted and framed only once. Encryption is
+    deterministic for a given session key and a new assembler is created on every
+    rekey, so cached frames never outlive the session they were encoded for.
+
+    Parameters
+    ----------
+    encryption
+        Session encryption strategy
+    cache_size, optional
+        Maximum number of encoded frames kept, 0 disables caching
+    """
+
+    def __init__(self, encryption: EncryptionStrategy, cache_size: int = 64) -> None:
         self._buffer = b""
         self._encryption = encryption
+        self._cache: OrderedDict[tuple, bytes] = OrderedDict()
+        self._cache_size = cache_size
+        self.cache_stats = FrameCacheStats()
+        self.timings: StageTimings | None = None
 
     def reset(self) -> None:
         """Discard any buffered partial frame data."""
         self._buffer = b""
 
+    async def _decrypt(self, data: bytes) -> bytes:
+        if (timings := self.timings) is None:
+            return await self._encryption.decrypt(data)
+
+        start = time.perf_counter_ns()
+        decrypted = await self._encryption.decrypt(data)
+        timings.add(Stage.DECRYPT, start)
+        return decrypted
+
+    @property
+    def pending(self) -> bool:
+        """Whether partial frame data is buffered, waiting for next notification"""
+        return bool(self._buffer)
+
     @property
     @abstractmethod
     def write_with_response(self) -> bool:
         """Whether BLE writes should use write-with-response"""
 
-    @abstractmethod
     async def encode(self, packet: Packet) -> bytes:
         """Encode a Packet into wire bytes (encrypted, framed)"""
+        if not self._cache_size:
+            return await self.encode_bytes(packet.toBytes())
+
+        key = packet.cache_key
+        if (frame := self._cache.get(key)) is not None:
+            self._cache.move_to_end(key)
+            self.cache_stats.hits += 1
+            return frame
+
+        self.cache_stats.misses += 1
+        frame = await self.encode_bytes(packet.toBytes())
+        self._cache[key] = frame
+        if len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+        self.cache_stats.size = len(self._cache)
+        return frame
+
+    @abstractmethod
+    async def encode_bytes(self, data: bytes) -> bytes:
+        """Encode already serialized Packet into wire bytes, bypassing frame cache"""
 
     @abstractmethod
     async def reassemble(self, data: bytes) -> list[bytes]:
@@ -40,11 +115,11 @@ class EncPacketAssembler(FrameAssembler):
     def write_with_response(self) -> bool:
         return True
 
-    async def encode(self, packet: Packet) -> bytes:
+    async def encode_bytes(self, data: bytes) -> bytes:
         return EncPacket(
             EncPacket.FRAME_TYPE_PROTOCOL,
             EncPacket.PAYLOAD_TYPE_VX_PROTOCOL,
-            packet.toBytes(),
+            data,
             0,
             0,
             self._encryption.session_key,
@@ -98,7 +173,7 @@ class EncPacketAssembler(FrameAssembler):
                 continue
 
             data = data[data_end:]
-            decrypted = await self._encryption.decrypt(payload_data)
+            decrypted = await self._decrypt(payload_data)
             payloads.append(decrypted)
 
         self._buffer = data
@@ -112,10 +187,9 @@ class RawHeaderAssembler(FrameAssembler):
     def write_with_response(self) -> bool:
         return False
 
-    async def encode(self, packet: Packet) -> bytes:
-        raw = packet.toBytes()
-        header = raw[:5]
-        inner = raw[5:]
+    async def encode_bytes(self, data: bytes) -> bytes:
+        header = data[:5]
+        inner = data[5:]
         encrypted = await self._encryption.encrypt(inner)
         return header + encrypted
 
@@ -156,7 +230,7 @@ class RawHeaderAssembler(FrameAssembler):
             encrypted_body = data[5:frame_len]
             data = data[frame_len:]
 
-            decrypted = await self._encryption.decrypt(encrypted_body)
+            decrypted = await self._decrypt(encrypted_body)
             payloads.append(header + decrypted[:inner_len])
 
         self._buffer = data
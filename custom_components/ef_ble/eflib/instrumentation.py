@@ -0,0 +1,385 @@
+import bisect
+import time
+from collections import defaultdict, deque
+from collections.abc import Sequence
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import Any
+
+DEFAULT_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+STAGE_BUCKETS_US = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+CONNECT_BUCKETS_MS = (250, 500, 1000, 2500, 5000, 10000, 20000, 30000, 60000)
+LATENCY_BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 1000, 10000)
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram of durations, in milliseconds unless buckets say otherwise
+
+    Parameters
+    ----------
+    buckets
+        Sorted upper bounds of buckets, values over the last bound are counted in
+        an overflow bucket
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS_MS) -> None:
+        self._bounds = tuple(buckets)
+        self._counts = [0] * (len(self._bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value: float):
+        self._counts[bisect.bisect_left(self._bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, percent: float) -> float:
+        """Return upper bound of the bucket containing given percentile"""
+        if not self.count:
+            return 0.0
+
+        target = self.count * percent / 100
+        seen = 0
+        for bound, count in zip(self._bounds, self._counts, strict=False):
+            seen += count
+            if seen >= target:
+                return min(bound, self.max)
+        return self.max
+
+    @classmethod
+    def from_dict(
+        cls, data: dict[str, Any], buckets: Sequence[float] = DEFAULT_BUCKETS_MS
+    ) -> "Histogram":
+        """Return histogram restored from output of `as_dict` with the same buckets"""
+        histogram = cls(buckets)
+        counts = data.get("buckets", {})
+        histogram._counts = [int(counts.get(label, 0)) for label in histogram._labels]
+        histogram.count = sum(histogram._counts)
+        histogram.total = float(data.get("mean", 0.0)) * histogram.count
+        histogram.max = float(data.get("max", 0.0))
+        return histogram
+
+    @property
+    def _labels(self) -> list[str]:
+        return [f"<={bound}" for bound in self._bounds] + [f">{self._bounds[-1]}"]
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean": round(self.mean, 3),
+            "max": round(self.max, 3),
+            "p50": round(self.percentile(50), 3),
+            "p95": round(self.percentile(95), 3),
+            "p99": round(self.percentile(99), 3),
+            "buckets": {
+                label: count
+                for label, count in zip(self._labels, self._counts, strict=True)
+                if count
+            },
+        }
+
+
+class ThroughputMeter:
+    """
+    Counts events and their sizes, with rates over a sliding time window
+
+    Parameters
+    ----------
+    window
+        Length of the window in seconds the rates are computed over
+    """
+
+    def __init__(self, window: float = 60.0) -> None:
+        self._window = window
+        self._started = time.monotonic()
+        self._events: deque[tuple[float, int]] = deque()
+        self.count = 0
+        self.total_bytes = 0
+
+    def add(self, size: int):
+        now = time.monotonic()
+        self._events.append((now, size))
+        self.count += 1
+        self.total_bytes += size
+        self._trim(now)
+
+    def rates(self) -> tuple[float, float]:
+        """Return events per second and bytes per second within the window"""
+        now = time.monotonic()
+        self._trim(now)
+        # window is not full yet while the meter is younger than it
+        elapsed = min(self._window, now - self._started)
+        if not self._events or elapsed <= 0:
+            return 0.0, 0.0
+        total = sum(size for _, size in self._events)
+        return len(self._events) / elapsed, total / elapsed
+
+    def as_dict(self) -> dict[str, Any]:
+        per_second, bytes_per_second = self.rates()
+        return {
+            "count": self.count,
+            "bytes": self.total_bytes,
+            "per_second": round(per_second, 3),
+            "bytes_per_second": round(bytes_per_second, 3),
+        }
+
+    def _trim(self, now: float):
+        while self._events and self._events[0][0] < now - self._window:
+            self._events.popleft()
+
+
+class Stage(IntEnum):
+    """Stages of the notification hot path, in the order they run"""
+
+    RECEIVE = 0
+    """Whole notification handler, from raw bytes to packets queued for the device"""
+    REASSEMBLE = 1
+    """Frame reassembly and CRC checks, including decryption"""
+    DECRYPT = 2
+    PARSE = 3
+    """Packet header parsing and CRC check (`Packet.fromBytes`)"""
+    DECODE = 4
+    """Payload decoding into protobuf message or raw data structure"""
+    DIFF = 5
+    """Assigning decoded values to fields, keeping only changed ones"""
+    RECOMPUTE = 6
+    CALLBACKS = 7
+    """Fan-out of update callbacks and state listeners"""
+
+
+@dataclass
+class StageRates:
+    frames_per_second: float
+    mean_decode_us: float
+    errors_per_minute: float
+
+
+class StageTimings:
+    """
+    Per-stage durations of the notification hot path
+
+    Durations are measured with `time.perf_counter_ns` and kept in fixed-bucket
+    histograms in microseconds, so recording never allocates. Owners keep `None`
+    instead of an instance while timing is disabled, leaving a single `is not None`
+    check per stage on the hot path.
+
+    Parameters
+    ----------
+    buckets
+        Sorted upper bounds of histogram buckets in microseconds
+    """
+
+    def __init__(self, buckets: Sequence[float] = STAGE_BUCKETS_US) -> None:
+        self.histograms = tuple(Histogram(buckets) for _ in Stage)
+        self.latencies = FieldLatencies()
+        self.errors = 0
+        self._mark = (time.monotonic(), 0, 0, 0.0, 0)
+
+    def add(self, stage: Stage, start_ns: int) -> int:
+        """Record stage that started at `start_ns`, returns current counter value"""
+        now = time.perf_counter_ns()
+        self.histograms[stage].add((now - start_ns) / 1000)
+        return now
+
+    def rates(self) -> StageRates:
+        """Return rates over the time since previous call (or since creation)"""
+        now = time.monotonic()
+        frames = self.histograms[Stage.PARSE].count
+        decode = self.histograms[Stage.DECODE]
+        then, prev_frames, prev_errors, prev_decode_total, prev_decodes = self._mark
+        self._mark = (now, frames, self.errors, decode.total, decode.count)
+
+        elapsed = max(now - then, 1e-9)
+        decodes = decode.count - prev_decodes
+        return StageRates(
+            frames_per_second=(frames - prev_frames) / elapsed,
+            mean_decode_us=(
+                (decode.total - prev_decode_total) / decodes if decodes else 0.0
+            ),
+            errors_per_minute=(self.errors - prev_errors) * 60 / elapsed,
+        )
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "unit": "us",
+            "errors": self.errors,
+            **{stage.name.lower(): self.histograms[stage].as_dict() for stage in Stage},
+            "latency_ms": self.latencies.as_dict(),
+        }
+
+
+class FieldLatencies:
+    """
+    Latency from receiving a frame to publishing fields updated by it
+
+    Publish latency is measured when subscribers of a field are about to be notified,
+    write latency once all of them returned, which for Home Assistant entities
+    includes writing the new state. Values are in milliseconds, kept per field and
+    for all fields of the device together.
+    """
+
+    def __init__(self) -> None:
+        self.publish = Histogram(LATENCY_BUCKETS_MS)
+        self.write = Histogram(LATENCY_BUCKETS_MS)
+        self.fields: defaultdict[str, tuple[Histogram, Histogram]] = defaultdict(
+            lambda: (Histogram(LATENCY_BUCKETS_MS), Histogram(LATENCY_BUCKETS_MS))
+        )
+
+    def add(self, field: str, publish_ms: float, write_ms: float):
+        publish, write = self.fields[field]
+        publish.add(publish_ms)
+        write.add(write_ms)
+        self.publish.add(publish_ms)
+        self.write.add(write_ms)
+
+    @staticmethod
+    def _percentiles(histogram: Histogram) -> dict[str, Any]:
+        return {
+            "count": histogram.count,
+            "p50": round(histogram.percentile(50), 3),
+            "p95": round(histogram.percentile(95), 3),
+            "p99": round(histogram.percentile(99), 3),
+            "max": round(histogram.max, 3),
+        }
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "publish": self.publish.as_dict(),
+            "write": self.write.as_dict(),
+            "fields": {
+                field: {
+                    "publish": self._percentiles(publish),
+                    "write": self._percentiles(write),
+                }
+                for field, (publish, write) in sorted(self.fields.items())
+            },
+        }
+
+
+class ConnectTimings:
+    """
+    Durations of connection attempts broken down by connection state
+
+    An attempt starts when the connection starts establishing and ends when it
+    authenticates or fails. Time spent in each state of the attempt is added to a
+    per-state histogram, attempts are aggregated over the lifetime of the owner, so
+    one instance can be shared by connections recreated for the same device.
+    """
+
+    def __init__(self) -> None:
+        self.states: dict[str, Histogram] = {}
+        self.attempts = Histogram(CONNECT_BUCKETS_MS)
+        self.establish = Histogram(CONNECT_BUCKETS_MS)
+        self.ble_connects = Histogram()
+        self.reconnect_delays = Histogram(CONNECT_BUCKETS_MS)
+        self.failed_attempts = 0
+        self.last_connect_duration: float | None = None
+        self.last_attempt: dict[str, Any] = {}
+
+        self._attempt_started: float | None = None
+        self._state: str | None = None
+        self._state_started = 0.0
+        self._attempt_states: dict[str, float] = {}
+        self._attempt_ble_connects: list[float] = []
+        self._attempt_establish: float | None = None
+
+    @property
+    def in_progress(self) -> bool:
+        return self._attempt_started is not None
+
+    def start(self, state: str, **context: Any):
+        """Start timing new attempt, `context` is stored with the attempt summary"""
+        if self.in_progress:
+            self.finish("ABANDONED", succeeded=False)
+
+        self._attempt_started = self._state_started = time.monotonic()
+        self._state = state
+        self._attempt_states = {}
+        self._attempt_ble_connects = []
+        self._attempt_establish = None
+        self.last_attempt = {"result": None, **context}
+
+    def transition(self, state: str):
+        """Record time spent in the previous state of the running attempt"""
+        if not self.in_progress:
+            return
+        self._close_state(time.monotonic())
+        self._state = state
+
+    def finish(self, state: str, succeeded: bool):
+        """End the running attempt with a final state"""
+        if (started := self._attempt_started) is None:
+            return
+
+        now = time.monotonic()
+        self._close_state(now)
+        self._attempt_started = None
+        self._state = None
+
+        total_ms = (now - started) * 1000
+        if succeeded:
+            self.attempts.add(total_ms)
+            self.last_connect_duration = total_ms / 1000
+        else:
+            self.failed_attempts += 1
+
+        self.last_attempt |= {
+            "result": state,
+            "total_ms": round(total_ms, 1),
+            "establish_ms": (
+                round(self._attempt_establish, 1)
+                if self._attempt_establish is not None
+                else None
+            ),
+            "ble_connects_ms": [round(ms, 1) for ms in self._attempt_ble_connects],
+            "states_ms": {
+                name: round(ms, 1) for name, ms in self._attempt_states.items()
+            },
+        }
+
+    def add_ble_connect(self, duration: float):
+        """Record single BLE connect call made while establishing connection"""
+        ms = duration * 1000
+        self.ble_connects.add(ms)
+        self._attempt_ble_connects.append(ms)
+
+    def add_establish(self, duration: float):
+        """Record whole establishing of connection, including retries and backoff"""
+        ms = duration * 1000
+        self.establish.add(ms)
+        self._attempt_establish = ms
+
+    def add_reconnect_delay(self, duration: float):
+        self.reconnect_delays.add(duration * 1000)
+
+    def _close_state(self, now: float):
+        if self._state is None:
+            return
+        ms = (now - self._state_started) * 1000
+        self._state_started = now
+        if (histogram := self.states.get(self._state)) is None:
+            histogram = self.states[self._state] = Histogram()
+        histogram.add(ms)
+        self._attempt_states[self._state] = (
+            self._attempt_states.get(self._state, 0) + ms
+        )
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "attempts_ms": self.attempts.as_dict(),
+            "failed_attempts": self.failed_attempts,
+            "establish_ms": self.establish.as_dict(),
+            "ble_connects_ms": self.ble_connects.as_dict(),
+            "reconnect_delays_ms": self.reconnect_delays.as_dict(),
+            "states_ms": {
+                name: histogram.as_dict() for name, histogram in self.states.items()
+            },
+            "last_attempt": self.last_attempt,
+        }
@@ -14,6 +14,8 @@ from typing import TYPE_CHECKING, Any
 import bleak
 
 from .encryption import Session
+from .loop_monitor import LoopStage
+from .memory import device_memory
 from .packet import Packet
 
 if TYPE_CHECKING:
@@ -317,10 +319,18 @@ class DeviceDiagnosticsCollector:
         self._unlisten_callbacks: list[Callable[[], None]] = []
 
         self._start_time = time.time()
+        # last profile captured with the device in scope
+        self.profile: dict[str, Any] | None = None
+        # last comparison of memory allocated by eflib between two points in time
+        self.memory_trace: dict[str, Any] | None = None
 
     def as_dict(self, session: Session | None = None):
         """Get diagnostics data as dictionary"""
-        return self.diagnostics.serialize(session).as_dict()
+        if (holds := self._device.loop_holds) is None:
+            return self.diagnostics.serialize(session).as_dict()
+
+        with holds.hold(LoopStage.DIAGNOSTICS):
+            return self.diagnostics.serialize(session).as_dict()
 
     @property
     def diagnostics(self):
@@ -336,6 +346,28 @@ class DeviceDiagnosticsCollector:
             session_key=self._device._conn._encryption.session_key,
         )
 
+    @property
+    def connect_timings(self) -> dict[str, Any]:
+        """Get durations of connection attempts broken down by connection state"""
+        return self._device.connect_timings.as_dict()
+
+    @property
+    def stage_timings(self) -> dict[str, Any]:
+        """Get hot path stage timings, empty if timing is disabled"""
+        timings = self._device.stage_timings
+        return {} if timings is None else timings.as_dict()
+
+    @property
+    def memory(self) -> dict[str, Any]:
+        """Get approximate memory retained by the device, broken down by component"""
+        return device_memory(self._device)
+
+    @property
+    def loop_monitor(self) -> dict[str, Any]:
+        """Get time the device held the event loop, empty if monitoring is disabled"""
+        holds = self._device.loop_holds
+        return {} if holds is None else holds.stats()
+
     @property
     def is_enabled(self):
         """Return True if diagnostics collection is enabled"""
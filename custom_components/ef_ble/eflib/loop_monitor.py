@@ -0,0 +1,305 @@
+import asyncio
+import contextlib
+import heapq
+import sys
+import threading
+import time
+import traceback
+from collections.abc import Awaitable, Generator, Hashable
+from dataclasses import asdict, dataclass, field
+from enum import StrEnum, auto
+from types import FrameType
+from typing import Any
+from weakref import WeakKeyDictionary
+
+from .instrumentation import Histogram
+
+HOLD_BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 1000)
+LAG_BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+# number of innermost frames kept in stack snippets
+STACK_LIMIT = 8
+_SKIPPED_FILES = frozenset((__file__, contextlib.__file__))
+
+
+class LoopStage(StrEnum):
+    """eflib work running on the event loop"""
+
+    NOTIFICATION = auto()
+    """BLE notification handlers, including authentication handlers"""
+    DATA_PARSE = auto()
+    """Device `data_parse` of a single packet"""
+    CALLBACKS = auto()
+    """Fan-out of update callbacks, including Home Assistant state writes"""
+    ECDH = auto()
+    """Key generation and shared secret computation"""
+    DIAGNOSTICS = auto()
+    """Serialization of diagnostics data"""
+
+
+@dataclass(order=True)
+class LoopHold:
+    """Single continuous hold of the loop that exceeded the threshold"""
+
+    duration_ms: float
+    device: str = field(compare=False)
+    stage: str = field(compare=False)
+    at: float = field(compare=False)
+    stack: list[str] = field(default_factory=list, compare=False)
+
+    def as_dict(self):
+        return asdict(self) | {"duration_ms": round(self.duration_ms, 3)}
+
+
+@dataclass
+class _Active:
+    device: str
+    stage: LoopStage
+    started: float
+    stack: list[str] | None = None
+
+
+class LoopMonitor:
+    """
+    Measures how long eflib work holds the event loop
+
+    Work is attributed to a device and a stage. Synchronous sections are timed with
+    `hold`, coroutines with `timed`, which times every step between suspension points
+    separately, so waiting for I/O is never counted as holding the loop. Stages may
+    nest (e.g. callbacks run inside `data_parse`), nested time is counted in both.
+
+    While any owner is registered, a watchdog thread captures stack of the loop thread
+    when a section runs over the threshold, and a probe measures how late the loop
+    runs scheduled callbacks. Comparing that lag with hold times tells whether slow
+    loop is caused by this integration or by something else.
+
+    Parameters
+    ----------
+    loop
+        Monitored event loop
+    threshold
+        Holds longer than this (in seconds) are kept as offenders with stack snippets
+    worst
+        Number of longest holds kept
+    lag_interval
+        Interval of the loop lag probe in seconds
+    """
+
+    _monitors: "WeakKeyDictionary[asyncio.AbstractEventLoop, LoopMonitor]" = (
+        WeakKeyDictionary()
+    )
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        threshold: float = 0.05,
+        worst: int = 20,
+        lag_interval: float = 1.0,
+    ) -> None:
+        self._loop = loop
+        self.threshold = threshold
+        self._worst = worst
+        self._lag_interval = lag_interval
+
+        self._holds: dict[tuple[str, LoopStage], Histogram] = {}
+        self._offenders: list[LoopHold] = []
+        self._active: list[_Active] = []
+        self.lag = Histogram(LAG_BUCKETS_MS)
+
+        self._owners: set[Hashable] = set()
+        self._loop_thread: int | None = None
+        self._probe: asyncio.TimerHandle | None = None
+        self._probe_deadline = 0.0
+        self._watchdog_stop: threading.Event | None = None
+
+    @classmethod
+    def for_loop(cls, loop: asyncio.AbstractEventLoop | None = None):
+        """Return monitor shared by all devices running on the given (or current) loop"""
+        if loop is None:
+            loop = asyncio.get_running_loop()
+
+        if (monitor := cls._monitors.get(loop)) is None:
+            monitor = cls._monitors[loop] = cls(loop)
+        return monitor
+
+    @property
+    def running(self) -> bool:
+        return bool(self._owners)
+
+    def register(self, owner: Hashable):
+        """Start monitoring for the owner, probes run while any owner is registered"""
+        self._owners.add(owner)
+        if self._probe is None:
+            self._loop_thread = threading.get_ident()
+            self._schedule_probe()
+        if self._watchdog_stop is None:
+            self._watchdog_stop = threading.Event()
+            threading.Thread(
+                target=self._watch,
+                args=(self._watchdog_stop,),
+                name="ef_ble_loop_monitor",
+                daemon=True,
+            ).start()
+
+    def unregister(self, owner: Hashable):
+        self._owners.discard(owner)
+        if self._owners:
+            return
+
+        if self._probe is not None:
+            self._probe.cancel()
+            self._probe = None
+        if self._watchdog_stop is not None:
+            self._watchdog_stop.set()
+            self._watchdog_stop = None
+
+    @contextlib.contextmanager
+    def hold(self, device: str, stage: LoopStage) -> Generator[None]:
+        """Time synchronous section run on the loop"""
+        active = _Active(device, stage, time.perf_counter())
+        self._active.append(active)
+        try:
+            yield
+        finally:
+            self._active.pop()
+            self._record(active, time.perf_counter() - active.started)
+
+    def timed[T](
+        self, device: str, stage: LoopStage, awaitable: Awaitable[T]
+    ) -> Awaitable[T]:
+        """Wrap the awaitable, timing each of its steps as a separate hold"""
+        return _TimedAwaitable(self, device, stage, awaitable)
+
+    def stats(self, device: str | None = None) -> dict[str, Any]:
+        """Return hold times per stage and worst holds, of single device if given"""
+        return {
+            "threshold_ms": self.threshold * 1000,
+            "holds_ms": {
+                stage.value: histogram.as_dict()
+                for (hold_device, stage), histogram in self._holds.items()
+                if device is None or hold_device == device
+            },
+            "worst": [
+                hold.as_dict()
+                for hold in sorted(self._offenders, reverse=True)
+                if device is None or hold.device == device
+            ],
+            "loop_lag_ms": self.lag.as_dict(),
+        }
+
+    def _record(self, active: _Active, duration: float):
+        key = (active.device, active.stage)
+        if (histogram := self._holds.get(key)) is None:
+            histogram = self._holds[key] = Histogram(HOLD_BUCKETS_MS)
+        histogram.add(duration * 1000)
+
+        if duration < self.threshold:
+            return
+        if len(self._offenders) >= self._worst:
+            if duration * 1000 <= self._offenders[0].duration_ms:
+                return
+            heapq.heappop(self._offenders)
+
+        heapq.heappush(
+            self._offenders,
+            LoopHold(
+                duration_ms=duration * 1000,
+                device=active.device,
+                stage=active.stage.value,
+                at=time.time(),
+                # stack sampled while holding shows where the time went, fall back to
+                # the end of the section if the watchdog did not get to it in time
+                stack=active.stack or _stack(),
+            ),
+        )
+
+    def _schedule_probe(self):
+        self._probe_deadline = self._loop.time() + self._lag_interval
+        self._probe = self._loop.call_at(self._probe_deadline, self._run_probe)
+
+    def _run_probe(self):
+        self.lag.add((self._loop.time() - self._probe_deadline) * 1000)
+        self._schedule_probe()
+
+    def _watch(self, stopped: threading.Event):
+        interval = self.threshold / 2
+        while not stopped.wait(interval):
+            try:
+                active = self._active[-1]
+            except IndexError:
+                continue
+            if (
+                active.stack is not None
+                or time.perf_counter() - active.started < self.threshold
+            ):
+                continue
+            if (frame := sys._current_frames().get(self._loop_thread)) is None:
+                continue
+            active.stack = _stack(frame)
+
+
+def _stack(frame: FrameType | None = None) -> list[str]:
+    """Format innermost frames of the stack, leaving out frames of the monitor"""
+    frames = [
+        summary
+        for summary in traceback.extract_stack(frame)
+        if summary.filename not in _SKIPPED_FILES
+    ]
+    return traceback.format_list(frames[-STACK_LIMIT:])
+
+
+class _TimedAwaitable:
+    """Drives wrapped awaitable step by step, timing each step as a hold"""
+
+    def __init__(
+        self,
+        monitor: LoopMonitor,
+        device: str,
+        stage: LoopStage,
+        awaitable: Awaitable,
+    ) -> None:
+        self._monitor = monitor
+        self._device = device
+        self._stage = stage
+        self._awaitable = awaitable
+
+    def __await__(self):
+        monitor = self._monitor
+        iterator = self._awaitable.__await__()
+        send: Any = None
+        throw: BaseException | None = None
+        while True:
+            with monitor.hold(self._device, self._stage):
+                try:
+                    if throw is not None:
+                        yielded = iterator.throw(throw)
+                    else:
+                        yielded = iterator.send(send)
+                except StopIteration as e:
+                    return e.value
+
+            try:
+                send = yield yielded
+                throw = None
+            except BaseException as e:  # noqa: BLE001
+                send = None
+                throw = e
+
+
+class LoopHolds:
+    """Loop monitor bound to a single device"""
+
+    __slots__ = ("device", "monitor")
+
+    def __init__(self, monitor: LoopMonitor, device: str) -> None:
+        self.monitor = monitor
+        self.device = device
+
+    def hold(self, stage: LoopStage):
+        return self.monitor.hold(self.device, stage)
+
+    def timed[T](self, stage: LoopStage, awaitable: Awaitable[T]) -> Awaitable[T]:
+        return self.monitor.timed(self.device, stage, awaitable)
+
+    def stats(self) -> dict[str, Any]:
+        return self.monitor.stats(self.device)
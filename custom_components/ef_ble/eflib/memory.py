@@ -0,0 +1,214 @@
+import asyncio
+import dataclasses
+import sys
+import tracemalloc
+from collections import Counter, deque
+from functools import cached_property
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .devicebase import DeviceBase
+
+EFLIB_ROOT = str(Path(__file__).parent)
+_EFLIB_PACKAGE = __package__ or ""
+
+# frames stored per allocation while tracing, allocations are attributed to the
+# innermost eflib frame so it has to be within this depth
+TRACE_FRAMES = 25
+
+_CONTAINERS = (list, tuple, set, frozenset, deque)
+
+
+def deep_sizeof(obj: Any, seen: set[int] | None = None) -> int:
+    """
+    Approximate memory retained by the object
+
+    Containers and attributes of eflib objects are followed, other objects (e.g. BLE
+    clients, event loops, callables) are counted by their own size only, so
+    references to shared objects outside of eflib do not get attributed to the
+    object. Objects already in `seen` are not counted again, so a shared set can be
+    used to split retained memory between several roots.
+    """
+    if seen is None:
+        seen = set()
+
+    size = 0
+    stack = [obj]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, type):
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, _CONTAINERS):
+            stack.extend(obj)
+        elif type(obj).__module__.startswith(_EFLIB_PACKAGE):
+            if (attrs := getattr(obj, "__dict__", None)) is not None:
+                stack.append(attrs)
+            stack.extend(
+                value
+                for slot in getattr(type(obj), "__slots__", ())
+                if (value := getattr(obj, slot, None)) is not None
+            )
+    return size
+
+
+def _component(value: Any, seen: set[int], items: int | None = None):
+    size = {"bytes": deep_sizeof(value, seen)}
+    return size if items is None else {"items": items, **size}
+
+
+def _total(components: dict[str, Any]) -> int:
+    return sum(
+        component["bytes"] if "bytes" in component else _total(component)
+        for component in components.values()
+    )
+
+
+def device_memory(device: "DeviceBase") -> dict[str, Any]:
+    """
+    Approximate memory retained by the device, broken down by component
+
+    Components are measured in order with shared bookkeeping, so objects referenced
+    from several components are counted only in the first one. Schedulers and
+    monitors shared by all devices on the loop are not counted.
+    """
+    conn = device._conn
+    seen: set[int] = {id(device)}
+    if conn is not None:
+        seen.add(id(conn._timers))
+    if (holds := device.loop_holds) is not None:
+        seen.add(id(holds.monitor))
+
+    cls = type(device)
+    fields = {
+        field.public_name: device.__dict__[field.private_name]
+        for field in getattr(device, "_fields", ())
+        if field.private_name in device.__dict__
+    }
+    cached = {
+        name: value
+        for name, value in device.__dict__.items()
+        if isinstance(getattr(cls, name, None), cached_property)
+    }
+    callbacks = [
+        device._callbacks,
+        device._callbacks_map,
+        device._state_update_callbacks,
+    ]
+    registry = device._listeners
+    listener_count = (
+        len(device._callbacks)
+        + sum(len(group) for group in device._callbacks_map.values())
+        + sum(len(group) for group in device._state_update_callbacks.values())
+        + sum(
+            len(getattr(registry, registry_field.name))
+            for registry_field in dataclasses.fields(registry)
+        )
+    )
+    diagnostics = device.diagnostics
+
+    components = {
+        "fields": _component(fields, seen, len(fields)),
+        "diagnostics": {
+            name: _component(buffer, seen, len(buffer))
+            for name in (
+                "last_packets",
+                "last_errors",
+                "connect_times",
+                "disconnect_times",
+                "raw_data_connection",
+                "raw_data_messages",
+            )
+            if (buffer := getattr(diagnostics, f"_{name}")) is not None
+        },
+        "connection_log": _component(
+            device.connection_log.history,
+            seen,
+            len(device.connection_log.history),
+        ),
+        "cached_properties": _component(cached, seen, len(cached)),
+        "listeners": _component([*callbacks, registry], seen, listener_count),
+        "connection": _component(conn, seen),
+    }
+    components["other"] = {
+        "bytes": deep_sizeof(device.__dict__, seen) + sys.getsizeof(device)
+    }
+    return {"total_bytes": _total(components), **components}
+
+
+async def trace_allocations(duration: float, top: int = 30) -> dict[str, Any]:
+    """
+    Compare memory allocated by eflib at the start and end of `duration` seconds
+
+    Tracing is started with `tracemalloc` if it is not running already and stopped
+    afterwards, only allocations made while tracing are seen. Allocations are
+    grouped by the innermost eflib line on their traceback, so memory allocated by
+    libraries on behalf of eflib is attributed to eflib code.
+    """
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start(TRACE_FRAMES)
+
+    try:
+        filters = [tracemalloc.Filter(True, f"{EFLIB_ROOT}/*", all_frames=True)]
+        before = await asyncio.to_thread(
+            lambda: tracemalloc.take_snapshot().filter_traces(filters)
+        )
+        await asyncio.sleep(duration)
+        after = await asyncio.to_thread(
+            lambda: tracemalloc.take_snapshot().filter_traces(filters)
+        )
+        traced, peak = tracemalloc.get_traced_memory()
+    finally:
+        if started:
+            tracemalloc.stop()
+
+    return {
+        "duration": duration,
+        "traced_bytes": traced,
+        "peak_bytes": peak,
+        **await asyncio.to_thread(_compare, before, after, top),
+    }
+
+
+def _compare(
+    before: tracemalloc.Snapshot, after: tracemalloc.Snapshot, top: int
+) -> dict[str, Any]:
+    size_diff: Counter[str] = Counter()
+    count_diff: Counter[str] = Counter()
+    size: Counter[str] = Counter()
+    for stat in after.compare_to(before, "traceback"):
+        location = _eflib_location(stat.traceback)
+        size_diff[location] += stat.size_diff
+        count_diff[location] += stat.count_diff
+        size[location] += stat.size
+
+    return {
+        "size_diff_bytes": sum(size_diff.values()),
+        "count_diff": sum(count_diff.values()),
+        "top": [
+            {
+                "location": location,
+                "size_diff_bytes": diff,
+                "count_diff": count_diff[location],
+                "size_bytes": size[location],
+            }
+            for location, diff in sorted(
+                size_diff.items(), key=lambda item: abs(item[1]), reverse=True
+            )[:top]
+        ],
+    }
+
+
+def _eflib_location(traceback: tracemalloc.Traceback) -> str:
+    # frames are sorted from the oldest to the most recent one
+    for frame in reversed(traceback):
+        if frame.filename.startswith(EFLIB_ROOT):
+            return f"{Path(frame.filename).relative_to(EFLIB_ROOT)}:{frame.lineno}"
+    return "<outside eflib>"
@@ -1,25 +1,58 @@
+import importlib
+from typing import TYPE_CHECKING
+
 from .base import RawData
-from .direct_bms_heartbeat_pack import DirectBmsMDeltaHeartbeatPack
-from .direct_ems_heartbeat_pack import DirectEmsDeltaHeartbeatPack
-from .direct_inv_heartbeat_pack import (
-    DirectInvDeltaHeartbeatPack,
-    DirectInvDeltaProHeartbeatPack,
-    DirectInvHeartbeatPack,
-    DirectInvRiverHeartbeatPack,
-    DirectInvRiverMiniHeartbeatPack,
-)
-from .direct_mppt_heartbeat_pack import DirectMpptHeartbeatPack
-from .direct_pd_heartbeat_pack import (
-    DirectPdHeartbeatPack,
-)
-from .kit_info import AllKitDetailData
-from .mppt_heart import BaseMpptHeart, Mr330MpptHeart, Mr350MpptHeart
-from .pd_heart import (
-    BasePdHeart,
-    Mr330PdHeart,
-    Mr330PdHeartDelta2,
-    Mr350PdHeartbeatDelta2Max,
-)
+
+if TYPE_CHECKING:
+    from .direct_bms_heartbeat_pack import DirectBmsMDeltaHeartbeatPack
+    from .direct_ems_heartbeat_pack import DirectEmsDeltaHeartbeatPack
+    from .direct_inv_heartbeat_pack import (
+        DirectInvDeltaHeartbeatPack,
+        DirectInvDeltaProHeartbeatPack,
+        DirectInvHeartbeatPack,
+        DirectInvRiverHeartbeatPack,
+        DirectInvRiverMiniHeartbeatPack,
+    )
+    from .direct_mppt_heartbeat_pack import DirectMpptHeartbeatPack
+    from .direct_pd_heartbeat_pack import (
+        DirectPdHeartbeatPack,
+    )
+    from .kit_info import AllKitDetailData
+    from .mppt_heart import BaseMpptHeart, Mr330MpptHeart, Mr350MpptHeart
+    from .pd_heart import (
+        BasePdHeart,
+        Mr330PdHeart,
+        Mr330PdHeartDelta2,
+        Mr350PdHeartbeatDelta2Max,
+    )
+
+# every model is a dataclass built on import, so models are imported only when used
+_MODEL_MODULES = {
+    "AllKitDetailData": "kit_info",
+    "BaseMpptHeart": "mppt_heart",
+    "BasePdHeart": "pd_heart",
+    "DirectBmsMDeltaHeartbeatPack": "direct_bms_heartbeat_pack",
+    "DirectEmsDeltaHeartbeatPack": "direct_ems_heartbeat_pack",
+    "DirectInvDeltaHeartbeatPack": "direct_inv_heartbeat_pack",
+    "DirectInvDeltaProHeartbeatPack": "direct_inv_heartbeat_pack",
+    "DirectInvHeartbeatPack": "direct_inv_heartbeat_pack",
+    "DirectInvRiverHeartbeatPack": "direct_inv_heartbeat_pack",
+    "DirectInvRiverMiniHeartbeatPack": "direct_inv_heartbeat_pack",
+    "DirectMpptHeartbeatPack": "direct_mppt_heartbeat_pack",
+    "DirectPdHeartbeatPack": "direct_pd_heartbeat_pack",
+    "Mr330MpptHeart": "mppt_heart",
+    "Mr330PdHeart": "pd_heart",
+    "Mr330PdHeartDelta2": "pd_heart",
+    "Mr350MpptHeart": "mppt_heart",
+    "Mr350PdHeartbeatDelta2Max": "pd_heart",
+}
+
+
+def __getattr__(name: str):
+    if (module := _MODEL_MODULES.get(name)) is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(f".{module}", __name__), name)
+
 
 __all__ = [
     "AllKitDetailData",
@@ -41,6 +41,11 @@ class Packet:
 
         # For representation
         self._payload_hex = bytearray(self._payload).hex()
+        self._bytes: bytes | None = None
+        # Wire frame this packet was parsed from, if it serializes back unchanged
+        self._frame: bytes | None = None
+        # Monotonic time of the notification completing the frame, inbound only
+        self.received_at: float | None = None
 
     @property
     def src(self):
@@ -134,6 +139,7 @@ class Packet:
             dsrc, ddst, cmd_set, cmd_id = data[14:payload_start]
 
         payload = b""
+        transformed = False
         if payload_length > 0:
             payload = data[payload_start : payload_start + payload_length]
 
@@ -141,11 +147,13 @@ class Packet:
             # real data
             if xor_payload and seq[0] != b"\x00":
                 payload = bytes([c ^ seq[0] for c in payload])
+                transformed = seq[0] != 0
 
             if version == 0x13 and payload[-2:] == b"\xbb\xbb":
                 payload = payload[:-2]
+                transformed = True
 
-        return Packet(
+        packet = Packet(
             src=src,
             dst=dst,
             cmd_set=cmd_set,
@@ -156,9 +164,63 @@ class Packet:
             version=version,
             seq=seq,
         )
+        if (
+            version in [2, 3, 4]
+            and not transformed
+            and len(data) == payload_start + payload_length + 2
+        ):
+            packet._frame = bytes(data)
+        return packet
+
+    def reply_bytes(self) -> bytes | None:
+        """
+        Serialized reply to this packet built directly from its wire frame
+
+        The reply has src and dst swapped and dsrc/ddst set to 1. Header CRC8 only
+        covers prefix, version and length, so it is kept, and only CRC16 is computed
+        again. Returns None if the packet was not parsed from a frame that serializes
+        back unchanged, in which case reply has to be built as a new Packet.
+        """
+        if (frame := self._frame) is None:
+            return None
+
+        reply = bytearray(frame)
+        # product byte and static zeroes are always written as constants
+        reply[5] = self.productByte()[0]
+        reply[10:12] = b"\x00\x00"
+        reply[12] = self._dst
+        reply[13] = self._src
+        if self._version >= 0x03:
+            reply[14] = 0x01
+            reply[15] = 0x01
+        reply[-2:] = struct.pack("<H", crc16(reply[:-2]))
+        return bytes(reply)
+
+    @property
+    def cache_key(self):
+        """Tuple identifying serialized form of this packet"""
+        return (
+            self._src,
+            self._dst,
+            self._cmd_set,
+            self._cmd_id,
+            self._payload,
+            self._dsrc,
+            self._ddst,
+            self._version,
+            self._seq,
+            self._product_id,
+        )
 
     def toBytes(self):
         """Will serialize the internal data to bytes stream"""
+        # packets are never modified after creation, so static packets reused for
+        # repeated commands are serialized only once
+        if self._bytes is None:
+            self._bytes = self._serialize()
+        return self._bytes
+
+    def _serialize(self):
         # Header
         data = Packet.PREFIX
         data += struct.pack("<B", self._version) + struct.pack("<H", len(self._payload))
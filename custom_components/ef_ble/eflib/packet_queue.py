@@ -0,0 +1,148 @@
+import asyncio
+import itertools
+import logging
+from collections.abc import Awaitable, Callable, Collection, Hashable
+from dataclasses import asdict, dataclass
+
+from .packet import Packet
+
+_LOGGER = logging.getLogger(__name__)
+
+type Route = tuple[int, int, int]
+
+
+def packet_route(packet: Packet) -> Route:
+    return packet.src, packet.cmdSet, packet.cmdId
+
+
+@dataclass
+class QueueStats:
+    depth: int = 0
+    max_depth: int = 0
+    processed: int = 0
+    coalesced: int = 0
+    dropped: int = 0
+
+    def as_dict(self):
+        return asdict(self)
+
+
+class InboundPacketQueue:
+    """
+    Bounded queue between packet decoding and device logic
+
+    Packets are processed in order by a single consumer task, so slow device handlers
+    no longer hold up the notification callback. Packets on coalesced routes are
+    replaced in place by newer packets on the same route while they wait in the queue,
+    and when the queue is full the oldest of them is dropped. Packets on other routes
+    are never dropped - the queue is allowed to grow over its size instead.
+
+    Parameters
+    ----------
+    handler
+        Coroutine function processing single packet
+    maxsize
+        Number of queued packets after which coalesced packets start being dropped
+    coalesced_routes
+        `(src, cmdSet, cmdId)` routes carrying full snapshots of their data, where only
+        the latest packet matters
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[Packet], Awaitable[None]],
+        maxsize: int = 32,
+        coalesced_routes: Collection[Route] = (),
+    ) -> None:
+        self._handler = handler
+        self._maxsize = maxsize
+        self._coalesced_routes = frozenset(coalesced_routes)
+        self._pending: dict[Hashable, Packet] = {}
+        self._counter = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._consumer: asyncio.Task | None = None
+        self.stats = QueueStats()
+
+    def __len__(self):
+        return len(self._pending)
+
+    def with_coalesced_routes(self, routes: Collection[Route]):
+        self._coalesced_routes = frozenset(routes)
+        return self
+
+    def put(self, packet: Packet):
+        route = packet_route(packet)
+        stats = self.stats
+
+        if route in self._coalesced_routes:
+            if route in self._pending:
+                # keep the slot (and position) of the older packet, just newer data
+                self._pending[route] = packet
+                stats.coalesced += 1
+                return
+
+            if len(self._pending) >= self._maxsize:
+                self._drop_oldest_coalesced()
+            key = route
+        else:
+            key = next(self._counter)
+
+        self._pending[key] = packet
+        stats.depth = len(self._pending)
+        stats.max_depth = max(stats.max_depth, stats.depth)
+        self._idle.clear()
+        self._wakeup.set()
+
+    def start(self, loop: asyncio.AbstractEventLoop | None = None):
+        if self._consumer is not None and not self._consumer.done():
+            return self._consumer
+
+        if loop is None:
+            loop = asyncio.get_running_loop()
+        self._consumer = loop.create_task(self._consume())
+        return self._consumer
+
+    def stop(self):
+        if self._consumer is not None:
+            self._consumer.cancel()
+            self._consumer = None
+        self.clear()
+
+    def clear(self):
+        self._pending.clear()
+        self.stats.depth = 0
+        self._wakeup.clear()
+        self._idle.set()
+
+    async def join(self):
+        """Wait until all queued packets are processed"""
+        await self._idle.wait()
+
+    def _drop_oldest_coalesced(self):
+        for key in self._pending:
+            if not isinstance(key, int):
+                del self._pending[key]
+                self.stats.dropped += 1
+                return
+
+    async def _consume(self):
+        while True:
+            await self._wakeup.wait()
+
+            while self._pending:
+                key = next(iter(self._pending))
+                packet = self._pending.pop(key)
+                self.stats.depth = len(self._pending)
+
+                try:
+                    await self._handler(packet)
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    _LOGGER.exception("Failed to process packet: %r", packet)
+                self.stats.processed += 1
+
+            self._wakeup.clear()
+            self._idle.set()
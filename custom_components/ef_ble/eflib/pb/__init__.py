@@ -1,5 +1,40 @@
+"""
+Generated protobuf modules
+
+Importing a generated module builds its file descriptor and registers it in the global
+descriptor pool, so modules are handed out as lazy proxies - `from ..pb import x_pb2`
+returns a module that is executed only once one of its attributes is first accessed.
+"""
+
+import importlib.util
 import sys
 from pathlib import Path
+from types import ModuleType
 
 # add this package directory to resolve absolute proto imports at runtime
 sys.path.insert(0, str(Path(__file__).parent))
+
+
+def _lazy_module(fullname: str) -> ModuleType:
+    if (module := sys.modules.get(fullname)) is not None:
+        return module
+
+    spec = importlib.util.find_spec(fullname)
+    if spec is None or spec.loader is None:
+        raise ModuleNotFoundError(f"No module named {fullname!r}", name=fullname)
+
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[fullname] = module
+    loader.exec_module(module)
+    return module
+
+
+def __getattr__(name: str) -> ModuleType:
+    if not name.endswith("_pb2"):
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    module = _lazy_module(f"{__name__}.{name}")
+    globals()[name] = module
+    return module
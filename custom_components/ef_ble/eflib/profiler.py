@@ -0,0 +1,152 @@
+import asyncio
+import sys
+import threading
+import time
+from collections import Counter
+from collections.abc import Collection
+from pathlib import Path
+from types import FrameType
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .devicebase import DeviceBase
+
+EFLIB_ROOT = str(Path(__file__).parent)
+
+# number of functions with most samples reported in profile statistics
+TOP_FUNCTIONS = 50
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler of eflib code running on the event loop
+
+    A background thread periodically captures the stack of the loop thread and keeps
+    only samples with eflib code on the stack. When devices are given, samples are
+    further limited to stacks running methods of those devices or their connections.
+    Stacks are collapsed starting at the outermost eflib frame, so samples of the same
+    handler are grouped regardless of what scheduled it. Code called from eflib (e.g.
+    Home Assistant state writes) is included.
+
+    Nothing is installed into the profiled code, so profiling has no overhead on the
+    loop beyond the cost of the sampling thread holding the GIL briefly.
+
+    Parameters
+    ----------
+    devices
+        Devices to limit samples to, all eflib code is sampled if None
+    interval
+        Sampling interval in seconds
+    """
+
+    def __init__(
+        self,
+        devices: "Collection[DeviceBase] | None" = None,
+        interval: float = 0.005,
+    ) -> None:
+        self._devices = devices
+        self._interval = interval
+        self._stacks: Counter[tuple[str, ...]] = Counter()
+        self.samples = 0
+
+    async def run(self, duration: float) -> dict[str, Any]:
+        """Profile the running loop for `duration` seconds and return the profile"""
+        stop = threading.Event()
+        sampler = threading.Thread(
+            target=self._sample_until,
+            args=(threading.get_ident(), stop),
+            name="ef_ble_profiler",
+            daemon=True,
+        )
+        started = time.monotonic()
+        sampler.start()
+        try:
+            await asyncio.sleep(duration)
+        finally:
+            stop.set()
+            await asyncio.to_thread(sampler.join)
+
+        return self.as_dict(time.monotonic() - started)
+
+    def _sample_until(self, thread_id: int, stop: threading.Event):
+        while not stop.wait(self._interval):
+            if (frame := sys._current_frames().get(thread_id)) is not None:
+                self.add_sample(frame)
+
+    def add_sample(self, frame: FrameType):
+        """Add stack of the frame if it runs profiled code"""
+        self.samples += 1
+
+        frames: list[FrameType] = []
+        while frame is not None:
+            frames.append(frame)
+            frame = frame.f_back
+
+        # outermost eflib frame starts the collapsed stack
+        for start in range(len(frames) - 1, -1, -1):
+            if _is_eflib(frames[start]):
+                break
+        else:
+            return
+
+        stack = frames[start::-1]
+        if self._devices is not None and not self._runs_devices(stack):
+            return
+
+        self._stacks[tuple(_frame_label(f) for f in stack)] += 1
+
+    def _runs_devices(self, stack: list[FrameType]) -> bool:
+        owners = set()
+        for device in self._devices or ():
+            owners.add(id(device))
+            if (conn := device._conn) is not None:
+                owners.add(id(conn))
+
+        return any(
+            id(frame.f_locals.get("self")) in owners
+            for frame in stack
+            if _is_eflib(frame)
+        )
+
+    def collapsed(self) -> list[str]:
+        """Return stacks in collapsed format, one `frame;frame;frame count` per line"""
+        return [
+            f"{';'.join(stack)} {count}" for stack, count in self._stacks.most_common()
+        ]
+
+    def functions(self) -> list[dict[str, Any]]:
+        """Return functions with most samples, where they were on top of the stack"""
+        own: Counter[str] = Counter()
+        total: Counter[str] = Counter()
+        for stack, count in self._stacks.items():
+            own[stack[-1]] += count
+            for label in set(stack):
+                total[label] += count
+
+        return [
+            {"function": label, "own": count, "total": total[label]}
+            for label, count in own.most_common(TOP_FUNCTIONS)
+        ]
+
+    def as_dict(self, duration: float) -> dict[str, Any]:
+        profiled = self._stacks.total()
+        return {
+            "duration": round(duration, 3),
+            "interval_ms": self._interval * 1000,
+            "samples": self.samples,
+            "profiled_samples": profiled,
+            "loop_share": round(profiled / self.samples, 4) if self.samples else 0.0,
+            "functions": self.functions(),
+            "collapsed": self.collapsed(),
+        }
+
+
+def _is_eflib(frame: FrameType):
+    # the profiler itself is left out, its coroutine runs on the profiled loop
+    filename = frame.f_code.co_filename
+    return filename.startswith(EFLIB_ROOT) and filename != __file__
+
+
+def _frame_label(frame: FrameType):
+    code = frame.f_code
+    return f"{Path(code.co_filename).name}:{code.co_qualname}"
@@ -1,3 +1,4 @@
+import functools
 import re
 from collections.abc import Callable
 from dataclasses import dataclass
@@ -11,16 +12,27 @@ if TYPE_CHECKING:
     from .protobuf_props import ProtobufProps
 
 
+type _MessageRef[T: Message] = type[T] | Callable[[], type[T]]
+
+
 class _ProtoAttr:
-    def __init__(self, message_type: type[Message], names: str | list[str]):
+    def __init__(self, message_type: _MessageRef, names: str | list[str]):
         if isinstance(names, list):
             self.attrs = names.copy()
         else:
             self.attrs = [names]
-        self.message_type = message_type
+        self._message_type = message_type
 
     def __getattr__(self, name: str):
-        return _ProtoAttr(self.message_type, [*self.attrs, name])
+        return _ProtoAttr(self._message_type, [*self.attrs, name])
+
+    @property
+    def message_type(self) -> type[Message]:
+        # message type may be passed as a function so the protobuf module is loaded
+        # on first use instead of when fields are declared
+        if not isinstance(self._message_type, type):
+            self._message_type = self._message_type()
+        return self._message_type
 
     def __repr__(self):
         return f"proto_attr({self.attrs})"
@@ -29,25 +41,60 @@ class _ProtoAttr:
     def name(self):
         return ".".join(self.attrs)
 
+    def validate(self):
+        """Raise AttributeError if the path does not exist in the protobuf message"""
+        try:
+            descriptor = _message_descriptor(self.message_type, tuple(self.attrs[:-1]))
+        except ValueError as e:
+            raise AttributeError(str(e)) from e
+        if self.attrs[-1] not in descriptor.fields_by_name:
+            raise AttributeError(
+                f"{self.message_type} does not contain field named '{self.name}'"
+            )
+
 
 @dataclass
 class _ProtoAttrAccessor[T1: Message]:
-    message_type: type[T1]
+    message_type: _MessageRef[T1]
 
     def __getattr__(self, name: str):
-        if name not in self.message_type.DESCRIPTOR.fields_by_name:
-            raise AttributeError(
-                f"{self.message_type} does not contain field named '{name}'"
-            )
+        # paths are not checked against the descriptor here, that would run for every
+        # field of every device class at import - see `_ProtoAttr.validate`
+        if name.startswith("__"):
+            raise AttributeError(name)
         return _ProtoAttr(self.message_type, name)
 
 
-def proto_attr_mapper[T: Message](pb: type[T]) -> type[T]:
+@functools.cache
+def _message_descriptor(message_type: type[Message], path: tuple[str, ...]):
+    descriptor = message_type.DESCRIPTOR
+    for attr_name in path:
+        field_desc = descriptor.fields_by_name.get(attr_name)
+        if field_desc is None or field_desc.message_type is None:
+            raise ValueError(
+                f"Cannot traverse protobuf path at '{attr_name}': "
+                "field not found or not a message type"
+            )
+        descriptor = field_desc.message_type
+    return descriptor
+
+
+@overload
+def proto_attr_mapper[T: Message](pb: Callable[[], type[T]]) -> type[T]: ...
+
+
+@overload
+def proto_attr_mapper[T: Message](pb: type[T]) -> type[T]: ...
+
+
+def proto_attr_mapper[T: Message](pb: _MessageRef[T]) -> type[T]:
     """
     Create proxy object for protobuf class that returns accessed attributes
 
     This function is a convenience function for creating typed fields from protobuf
-    message classes.
+    message classes. Message class can also be given as a function returning it, e.g.
+    `lambda: pr705_pb2.DisplayPropertyUpload`, so that the protobuf module is not
+    loaded until the first message is processed.
 
     Returns
     -------
@@ -174,6 +221,7 @@ def pb_field(
     )
 
 
+@functools.cache
 def _match_to_regex(match: str) -> re.Pattern[str]:
     return re.compile("^" + re.escape(match).replace(r"\{n\}", r"(\d+)") + "$")
 
@@ -188,21 +236,13 @@ def _find_match_segment(
     raise ValueError(f"No segment matching '{regex.pattern}' in path {attr.attrs}")
 
 
+@functools.cache
 def _discover_pb_indices(
-    attr: _ProtoAttr,
+    message_type: type[Message],
+    path: tuple[str, ...],
     pattern: re.Pattern[str],
-    match_idx: int,
 ) -> tuple[int, int]:
-    descriptor = attr.message_type.DESCRIPTOR
-    for attr_name in attr.attrs[:match_idx]:
-        field_desc = descriptor.fields_by_name.get(attr_name)
-        if field_desc is None or field_desc.message_type is None:
-            raise ValueError(
-                f"Cannot traverse protobuf path at '{attr_name}': "
-                "field not found or not a message type"
-            )
-        descriptor = field_desc.message_type
-
+    descriptor = _message_descriptor(message_type, path)
     indices = sorted(
         int(m.group(1))
         for name in descriptor.fields_by_name
@@ -264,9 +304,9 @@ def pb_field_group[T](
 
     if count is None:
         discovered_start, count = _discover_pb_indices(
-            attr,
+            attr.message_type,
+            tuple(attr.attrs[:seg_idx]),
             regex,
-            seg_idx,
         )
         if start is None:
             start = discovered_start
@@ -277,7 +317,7 @@ def pb_field_group[T](
         new_attrs = list(attr.attrs)
         new_attrs[seg_idx] = match.format(n=n)
         return pb_field(
-            _ProtoAttr(attr.message_type, new_attrs),
+            _ProtoAttr(attr._message_type, new_attrs),
             transform,
         )
 
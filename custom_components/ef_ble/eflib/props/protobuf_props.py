@@ -1,3 +1,4 @@
+import time
 from collections import defaultdict
 from collections.abc import Callable
 from functools import cached_property
@@ -5,6 +6,7 @@ from functools import cached_property
 from google.protobuf.message import DecodeError, Message
 
 from .. import devicebase
+from ..instrumentation import Stage
 from ..listeners import ListenerGroup, ListenerRegistry
 from ..logging_util import LogOptions
 from .protobuf_field import ProtobufField
@@ -45,19 +47,10 @@ class ProtobufProps(UpdatableProps):
 
     """
 
-    _repeated_field_map: dict[type[Message], dict[str, list[ProtobufRepeatedField]]] = (
-        defaultdict(lambda: defaultdict(list))
-    )
     _proto_listeners = _Listeners.create()
 
-    @classmethod
-    def add_repeated_field(cls, repeated_field: ProtobufRepeatedField):
-        updated_field_map = cls._repeated_field_map.copy()
-        updated_field_map[repeated_field.pb_field.message_type][
-            repeated_field.pb_field.name
-        ].append(repeated_field)
-        cls._repeated_field_map = updated_field_map
-
+    # fields are grouped by message type on first message, resolving message types
+    # earlier would load protobuf modules while device classes are being declared
     @cached_property
     def message_to_field(self) -> dict[type[Message], list[ProtobufField]]:
         field_map = defaultdict(list)
@@ -71,6 +64,33 @@ class ProtobufProps(UpdatableProps):
             field_map[field.pb_field.message_type].append(field)
         return field_map
 
+    @cached_property
+    def _repeated_field_map(
+        self,
+    ) -> dict[type[Message], dict[str, list[ProtobufRepeatedField]]]:
+        field_map = defaultdict(lambda: defaultdict(list))
+        for field in self._fields:
+            if isinstance(field, ProtobufRepeatedField):
+                field_map[field.pb_field.message_type][field.pb_field.name].append(
+                    field
+                )
+        return field_map
+
+    @classmethod
+    def load_message_types(cls) -> set[type[Message]]:
+        """
+        Return message types the fields are decoded from, loading their modules
+
+        Protobuf modules are executed on first use, which reads them and builds their
+        descriptors. Calling this from an executor keeps that work out of the first
+        `data_parse` running on the event loop.
+        """
+        return {
+            field.pb_field.message_type
+            for field in cls._fields
+            if isinstance(field, ProtobufField)
+        }
+
     def reset_updated(self):
         self._processed_fields = []
         return super().reset_updated()
@@ -126,10 +146,14 @@ class ProtobufProps(UpdatableProps):
         serialized_message: bytes,
         reset: bool = False,
     ) -> T_MSG | None:
+        timings = self._timings
+        start = time.perf_counter_ns() if timings is not None else 0
         msg = message_type()
         try:
             msg.ParseFromString(serialized_message)
         except DecodeError:
+            if timings is not None:
+                timings.errors += 1
             if isinstance(self, devicebase.DeviceBase):
                 self._logger.warning(
                     "Failed to decode %s (%d bytes)",
@@ -137,7 +161,11 @@ class ProtobufProps(UpdatableProps):
                     len(serialized_message),
                 )
             return None
+        if timings is not None:
+            start = timings.add(Stage.DECODE, start)
         self.update_from_message(msg, reset=reset)
+        if timings is not None:
+            timings.add(Stage.DIFF, start)
         self._log_message(msg)
         return msg
 
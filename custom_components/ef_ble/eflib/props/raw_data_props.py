@@ -1,4 +1,5 @@
 import abc
+import time
 from collections import defaultdict
 from collections.abc import Callable
 from functools import cached_property
@@ -6,6 +7,7 @@ from typing import Literal, overload
 
 from .. import devicebase
 from ..connection import LogOptions
+from ..instrumentation import Stage
 from ..listeners import ListenerGroup, ListenerRegistry
 from ..model.base import RawData
 from .raw_data_field import RawDataField
@@ -49,17 +51,23 @@ class RawDataProps(UpdatableProps, abc.ABC):
     def update_from_bytes[T: RawData](
         self, data: type[T], payload: bytes, as_list: bool = False, reset: bool = False
     ) -> T | list[T]:
+        timings = self._timings
+        start = time.perf_counter_ns() if timings is not None else 0
         msgs = (
             data.list_from_bytes(data=payload)
             if as_list
             else [data.from_bytes(data=payload)]
         )
+        if timings is not None:
+            start = timings.add(Stage.DECODE, start)
 
         for msg in msgs:
             self.update_from_data(msg, reset=reset)
             self._log_message(msg)
             self._raw_listeners.on_message_processed(msg)
 
+        if timings is not None:
+            timings.add(Stage.DIFF, start)
         return msgs if as_list else msgs[0]
 
     @cached_property
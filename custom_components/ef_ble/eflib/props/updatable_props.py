@@ -1,8 +1,11 @@
 import inspect
+import time
 from collections.abc import Callable, Iterator
-from functools import cached_property
 from typing import TYPE_CHECKING, Any, ClassVar, Self, overload
 
+from ..instrumentation import Stage, StageTimings
+from ..loop_monitor import LoopHolds, LoopStage
+
 if TYPE_CHECKING:
     from ..entity import controls
     from ..entity.base import EntityKind, EntityType
@@ -25,8 +28,11 @@ class UpdatableProps:
 
     updated: bool = False
     _updated_fields: set[str] | None = None
+    _timings: StageTimings | None = None
+    _loop_holds: LoopHolds | None = None
     _fields: ClassVar[list["Field[Any]"]] = []
     _computed_fields: ClassVar[list["_ComputedField[Any]"]] = []
+    _controls_cache: ClassVar[dict[type, list[Any]]]
 
     @property
     def updated_fields(self):
@@ -71,10 +77,24 @@ class UpdatableProps:
             cf.recompute(self)
 
     def _notify_updated(self):
+        if self._loop_holds is None:
+            self._run_update_callbacks()
+            return
+
+        with self._loop_holds.hold(LoopStage.CALLBACKS):
+            self._run_update_callbacks()
+
+    def _run_update_callbacks(self):
+        timings = self._timings
+        start = time.perf_counter_ns() if timings is not None else 0
         self._recompute()
+        if timings is not None:
+            start = timings.add(Stage.RECOMPUTE, start)
         for field_name in self.updated_fields:
             self.update_callback(field_name)  # type: ignore[attr-defined]
             self.update_state(field_name, getattr(self, field_name))  # type: ignore[attr-defined]
+        if timings is not None:
+            timings.add(Stage.CALLBACKS, start)
 
     def _get_entities[E: "EntityType"](
         self,
@@ -91,16 +111,37 @@ class UpdatableProps:
             if isinstance(item, sensor_type)
         ]
 
-    @cached_property
-    def _controls(self):
-        return [f.sensor_type for f in self._fields if f.sensor_type is not None]
-
+    @classmethod
     def get_controls[E: "controls.ControlType"](
-        self,
+        cls,
         control_type: type[E],
-    ):
-        """Return all registered controls matching the given type"""
-        return [c for c in self._controls if isinstance(c, control_type)]
+    ) -> list[E]:
+        """
+        Return all registered controls matching the given type
+
+        Controls are defined by the class, so they are collected once per class and
+        control type and shared by all instances.
+        """
+        # looked up in class dict, so subclasses do not share parent's cache
+        if (cache := cls.__dict__.get("_controls_cache")) is None:
+            cache = cls._controls_cache = {}
+
+        if (found := cache.get(control_type)) is None:
+            found = cache[control_type] = [
+                f.sensor_type
+                for f in cls._fields
+                if isinstance(f.sensor_type, control_type)
+            ]
+        return found
+
+
+def _own_class_list(owner: type, attr: str) -> list[Any]:
+    # fields are collected while the class body is being set up, base class list is
+    # copied once per class instead of on every field
+    if (own := owner.__dict__.get(attr)) is None:
+        own = list(getattr(owner, attr))
+        setattr(owner, attr, own)
+    return own
 
 
 class Skip:
@@ -122,7 +163,7 @@ class Field[T]:
         self.private_name = (
             f"_{name}" if not hasattr(owner, f"_{name}") else f"__{name}"
         )
-        owner._fields = [*owner._fields, self]
+        _own_class_list(owner, "_fields").append(self)
 
     def __set__(self, instance, value: Any):
         self._set_value(instance, value)
@@ -217,8 +258,10 @@ class _ComputedField[T](Field[T]):
 
     def __set_name__(self, owner: type[UpdatableProps], name: str):
         super().__set_name__(owner, name)
-        existing = [cf for cf in owner._computed_fields if cf.public_name != name]
-        owner._computed_fields = [*existing, self]
+        computed_fields = _own_class_list(owner, "_computed_fields")
+        # computed field overriding one from a base class replaces it
+        computed_fields[:] = [cf for cf in computed_fields if cf.public_name != name]
+        computed_fields.append(self)
 
     @overload
     def __get__(
@@ -0,0 +1,191 @@
+import asyncio
+import json
+import logging
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, ClassVar
+
+from .instrumentation import CONNECT_BUCKETS_MS, Histogram
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ProtocolParams:
+    """Protocol parameters resolved during the last successful authentication"""
+
+    uuid_family: str
+    service_uuid: str
+    notify_handle: int
+    write_handle: int
+    packet_version: int
+    encrypt_type: int
+    auth_header_dst: int
+
+    def matches(self, packet_version: int, encrypt_type: int, auth_header_dst: int):
+        return (
+            self.packet_version == packet_version
+            and self.encrypt_type == encrypt_type
+            and self.auth_header_dst == auth_header_dst
+        )
+
+
+class ProtocolCache:
+    """
+    Per-address cache of GATT layout and protocol parameters
+
+    Entries are shared by all connections to the same address and persisted as json
+    next to the connection logs, so reconnects (including the ones after HA restart)
+    can restrict service discovery to the known service and resolve characteristics by
+    handle instead of probing all known UUID families.
+
+    The file is read and written in a worker thread, `async_load` has to be awaited
+    before the cache is used.
+    """
+
+    _caches: ClassVar[dict[str, "ProtocolCache"]] = {}
+
+    def __init__(self, address: str) -> None:
+        self.address = address
+        self.params: ProtocolParams | None = None
+        self.connect_times: dict[str, Histogram] = {}
+        self._loaded = False
+        self._load_lock = asyncio.Lock()
+        self._save_task: asyncio.Task | None = None
+        self._save_pending = False
+
+    @classmethod
+    def for_address(cls, address: str) -> "ProtocolCache":
+        if (cache := cls._caches.get(address)) is None:
+            cache = cls._caches[address] = cls(address)
+        return cache
+
+    @staticmethod
+    def cache_file_for(address: str):
+        return (
+            Path(__file__).parent
+            / ".cache"
+            / f"{address.replace(':', '_')}_protocol.json"
+        )
+
+    @classmethod
+    async def clean_cache_for(cls, address: str):
+        if (cache := cls._caches.pop(address, None)) is not None:
+            await cache.wait_saved()
+        await asyncio.to_thread(cls.cache_file_for(address).unlink, missing_ok=True)
+
+    def get(
+        self, packet_version: int, encrypt_type: int, auth_header_dst: int
+    ) -> ProtocolParams | None:
+        """Return cached params if they were resolved with the same configuration"""
+        if self.params is None:
+            return None
+
+        if not self.params.matches(packet_version, encrypt_type, auth_header_dst):
+            self.invalidate()
+            return None
+        return self.params
+
+    def store(self, params: ProtocolParams):
+        self.params = params
+        self.save()
+
+    def invalidate(self):
+        if self.params is None:
+            return
+        self.params = None
+        self.save()
+
+    def record_connect_time(self, duration: float, cached: bool):
+        """
+        Record time from start of the connection to authentication
+
+        Parameters
+        ----------
+        duration
+            Connect-to-authenticated time in seconds
+        cached
+            True if the connection used cached protocol params
+        """
+        key = "cached" if cached else "uncached"
+        if (histogram := self.connect_times.get(key)) is None:
+            histogram = self.connect_times[key] = Histogram(CONNECT_BUCKETS_MS)
+        histogram.add(duration * 1000)
+
+    async def async_load(self):
+        """Read persisted entry, only the first call reads the file"""
+        async with self._load_lock:
+            if self._loaded:
+                return
+
+            path = self.cache_file_for(self.address)
+            data = await asyncio.to_thread(self._read, path)
+            self._loaded = True
+            if data is None:
+                return
+
+            try:
+                self.params = (
+                    ProtocolParams(**data["params"])
+                    if data.get("params") is not None
+                    else None
+                )
+                self.connect_times = {
+                    key: Histogram.from_dict(value, CONNECT_BUCKETS_MS)
+                    for key, value in data.get("connect_times_ms", {}).items()
+                }
+            except (TypeError, KeyError, ValueError, AttributeError) as e:
+                _LOGGER.debug("Discarding invalid protocol cache for %s: %s", path, e)
+                self.params = None
+                self.connect_times = {}
+
+    def save(self):
+        """Write entry in a worker thread, saves requested meanwhile are coalesced"""
+        if self._save_task is not None:
+            self._save_pending = True
+            return
+        self._save_task = asyncio.get_running_loop().create_task(self._save())
+
+    async def wait_saved(self):
+        """Wait until pending writes of the entry are finished"""
+        if self._save_task is not None:
+            await asyncio.shield(self._save_task)
+
+    async def _save(self):
+        try:
+            while True:
+                self._save_pending = False
+                await asyncio.to_thread(
+                    self._write, self.cache_file_for(self.address), self.as_dict()
+                )
+                if not self._save_pending:
+                    return
+        finally:
+            self._save_task = None
+
+    @staticmethod
+    def _read(path: Path) -> dict[str, Any] | None:
+        try:
+            return json.loads(path.read_text())
+        except FileNotFoundError:
+            return None
+        except (ValueError, OSError) as e:
+            _LOGGER.debug("Discarding invalid protocol cache for %s: %s", path, e)
+            return None
+
+    @staticmethod
+    def _write(path: Path, data: dict[str, Any]):
+        try:
+            path.parent.mkdir(exist_ok=True)
+            path.write_text(json.dumps(data))
+        except OSError as e:
+            _LOGGER.debug("Could not write protocol cache: %s", e)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "params": asdict(self.params) if self.params is not None else None,
+            "connect_times_ms": {
+                key: histogram.as_dict()
+                for key, histogram in self.connect_times.items()
+            },
+        }
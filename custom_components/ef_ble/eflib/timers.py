@@ -0,0 +1,245 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+from collections.abc import Callable, Coroutine, Hashable
+from dataclasses import dataclass, field
+from typing import Any
+from weakref import WeakKeyDictionary
+
+_LOGGER = logging.getLogger(__name__)
+
+type TimerCallback = Callable[[], Coroutine[Any, Any, Any]]
+
+
+@dataclass
+class TimerStats:
+    """Lag statistics of a single periodic timer"""
+
+    interval: float
+    fired: int = 0
+    skipped: int = 0
+    last_lag: float = 0.0
+    max_lag: float = 0.0
+    total_lag: float = 0.0
+
+    @property
+    def mean_lag(self) -> float:
+        return self.total_lag / self.fired if self.fired else 0.0
+
+    def record(self, lag: float):
+        self.fired += 1
+        self.last_lag = lag
+        self.total_lag += lag
+        self.max_lag = max(self.max_lag, lag)
+
+    def as_dict(self):
+        return {
+            "interval": self.interval,
+            "fired": self.fired,
+            "skipped": self.skipped,
+            "last_lag_ms": round(self.last_lag * 1000, 3),
+            "mean_lag_ms": round(self.mean_lag * 1000, 3),
+            "max_lag_ms": round(self.max_lag * 1000, 3),
+        }
+
+
+@dataclass(eq=False)
+class _Timer:
+    key: Hashable
+    owner: Any
+    callback: TimerCallback
+    interval: float
+    deadline: float
+    stats: TimerStats
+    task: asyncio.Task | None = None
+    cancelled: bool = False
+    name: str = field(default="")
+
+
+class TimerScheduler:
+    """
+    Heap-based scheduler running periodic coroutines for all devices on one loop
+
+    All registered timers share a single loop timer handle armed for the nearest
+    deadline. Deadlines are drift-corrected - the next deadline is always computed from
+    the previous one and not from the time the callback finished, and periods missed
+    because the loop was blocked are skipped instead of being fired in a burst.
+    Registering a timer with a key that is already scheduled replaces the previous
+    registration, so repeated registrations (e.g. after reconnect) never stack.
+    """
+
+    _schedulers: "WeakKeyDictionary[asyncio.AbstractEventLoop, TimerScheduler]" = (
+        WeakKeyDictionary()
+    )
+
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._loop = loop
+        self._heap: list[tuple[float, int, _Timer]] = []
+        self._timers: dict[Hashable, _Timer] = {}
+        self._counter = itertools.count()
+        self._handle: asyncio.TimerHandle | None = None
+        self._armed_at: float | None = None
+
+    @classmethod
+    def for_loop(cls, loop: asyncio.AbstractEventLoop | None = None):
+        """Return scheduler shared by all timers running on the given (or current) loop"""
+        if loop is None:
+            loop = asyncio.get_running_loop()
+
+        if (scheduler := cls._schedulers.get(loop)) is None:
+            scheduler = cls._schedulers[loop] = cls(loop)
+        return scheduler
+
+    def __len__(self):
+        return len(self._timers)
+
+    def __contains__(self, key: Hashable):
+        return key in self._timers
+
+    def schedule(
+        self,
+        key: Hashable,
+        callback: TimerCallback,
+        interval: float,
+        owner: Any = None,
+        delay: float = 0,
+    ) -> Hashable:
+        """
+        Run callback every interval seconds, starting after delay
+
+        Parameters
+        ----------
+        key
+            Unique key of the timer - scheduling with already existing key replaces the
+            previous timer
+        callback
+            Coroutine function to run
+        interval
+            Period in seconds
+        owner, optional
+            Object owning this timer, used for cancelling all its timers at once
+        delay, optional
+            Delay of the first run in seconds
+
+        Returns
+        -------
+        Key of the timer
+        """
+        if interval <= 0:
+            raise ValueError(f"Timer interval has to be positive, got {interval}")
+
+        stats = TimerStats(interval)
+        if (existing := self._timers.get(key)) is not None:
+            stats = existing.stats
+            stats.interval = interval
+            self._cancel_timer(existing)
+
+        timer = _Timer(
+            key=key,
+            owner=owner,
+            callback=callback,
+            interval=interval,
+            deadline=self._loop.time() + delay,
+            stats=stats,
+            name=getattr(callback, "__qualname__", repr(callback)),
+        )
+        self._timers[key] = timer
+        self._push(timer)
+        return key
+
+    def cancel(self, key: Hashable):
+        """Cancel timer with given key, including its running callback"""
+        if (timer := self._timers.pop(key, None)) is not None:
+            self._cancel_timer(timer)
+        self._disarm_if_idle()
+
+    def cancel_owner(self, owner: Any):
+        """Cancel all timers registered by the owner"""
+        for key in [k for k, t in self._timers.items() if t.owner is owner]:
+            self._cancel_timer(self._timers.pop(key))
+        self._disarm_if_idle()
+
+    def stats(self, owner: Any = None) -> dict[str, dict[str, Any]]:
+        """Return lag statistics of all timers, or only of timers owned by owner"""
+        return {
+            timer.name: timer.stats.as_dict()
+            for timer in self._timers.values()
+            if owner is None or timer.owner is owner
+        }
+
+    def _cancel_timer(self, timer: _Timer):
+        timer.cancelled = True
+        if timer.task is not None and not timer.task.done():
+            timer.task.cancel()
+
+    def _push(self, timer: _Timer):
+        heapq.heappush(self._heap, (timer.deadline, next(self._counter), timer))
+        self._arm()
+
+    def _arm(self):
+        # drop cancelled timers from the top so we do not wake up for nothing
+        while self._heap and self._heap[0][2].cancelled:
+            heapq.heappop(self._heap)
+
+        if not self._heap:
+            self._disarm()
+            return
+
+        deadline = self._heap[0][0]
+        if self._armed_at is not None and self._armed_at <= deadline:
+            return
+
+        self._disarm()
+        self._armed_at = deadline
+        self._handle = self._loop.call_at(deadline, self._run_due)
+
+    def _disarm(self):
+        if self._handle is not None:
+            self._handle.cancel()
+        self._handle = None
+        self._armed_at = None
+
+    def _disarm_if_idle(self):
+        if not self._timers:
+            self._heap.clear()
+            self._disarm()
+
+    def _run_due(self):
+        self._handle = None
+        self._armed_at = None
+        now = self._loop.time()
+
+        while self._heap and self._heap[0][0] <= now:
+            deadline, _, timer = heapq.heappop(self._heap)
+            if timer.cancelled or deadline != timer.deadline:
+                continue
+
+            self._fire(timer, now)
+
+            # compute next deadline from the previous one to avoid drift, skipping
+            # periods that were missed while the loop was blocked
+            missed = math.floor((now - timer.deadline) / timer.interval)
+            timer.stats.skipped += missed
+            timer.deadline += (missed + 1) * timer.interval
+            heapq.heappush(self._heap, (timer.deadline, next(self._counter), timer))
+
+        self._arm()
+
+    def _fire(self, timer: _Timer, now: float):
+        timer.stats.record(now - timer.deadline)
+
+        if timer.task is not None and not timer.task.done():
+            # previous run did not finish within the interval
+            timer.stats.skipped += 1
+            return
+
+        timer.task = self._loop.create_task(timer.callback())
+        timer.task.add_done_callback(self._log_failure)
+
+    @staticmethod
+    def _log_failure(task: asyncio.Task):
+        if task.cancelled() or (exc := task.exception()) is None:
+            return
+        _LOGGER.error("Timer task %s failed: %s", task.get_coro(), exc, exc_info=exc)
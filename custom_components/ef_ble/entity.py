@@ -8,15 +8,20 @@ from homeassistant.helpers.entity import Entity, EntityDescription
 
 from .const import DOMAIN, MANUFACTURER
 from .eflib import DeviceBase
+from .eflib.connection import ConnectionState
 from .eflib.device_mappings import battery_name_from_device
 
 
 class EcoflowEntity(Entity):
     _attr_has_entity_name = True
+    # controls send commands to the device, so they are only available once it is
+    # authenticated, restored values are shown only by read-only entities
+    _available_with_restored_state = True
 
     def __init__(self, device: DeviceBase):
         self._device = device
         self._update_callbacks: list[tuple[str, Callable[[Any], None]]] = []
+        self._was_available: bool | None = None
 
     @property
     def device_info(self):
@@ -36,8 +41,22 @@ class EcoflowEntity(Entity):
 
     @property
     def available(self) -> bool:
-        """Return True if device is connected"""
-        return self._device.is_connected
+        """Return True if device is authenticated or its last state is restored"""
+        if self._available_with_restored_state and self._device.state_restored:
+            return True
+        return (
+            self._device.is_connected
+            and self._device.connection_state is ConnectionState.AUTHENTICATED
+        )
+
+    @callback
+    def _connection_state_changed(self, state: ConnectionState):
+        # connection goes through many states during reconnect, only changes of
+        # availability need to be written
+        if (available := self.available) == self._was_available:
+            return
+        self._was_available = available
+        self.async_write_ha_state()
 
     class SkipWrite:
         """Sentinel value for skipping write in update callback"""
@@ -73,6 +92,10 @@ class EcoflowEntity(Entity):
     async def async_added_to_hass(self) -> None:
         for prop, state_callback in self._update_callbacks:
             self._device.register_state_update_callback(state_callback, prop)
+        self._was_available = self.available
+        self.async_on_remove(
+            self._device.on_connection_state_change(self._connection_state_changed)
+        )
         await super().async_added_to_hass()
 
     async def async_will_remove_from_hass(self) -> None:
@@ -116,36 +139,75 @@ class IndexableDescription(Protocol):
     translation_placeholders: Mapping[str, str] | None
 
 
+class ResolvedDescriptions[D: EntityDescription](Mapping[str, D]):
+    """
+    Entity descriptions keyed by resolved key, each built on first access
+
+    Keys are expanded eagerly since platforms iterate them to find matching device
+    attributes, copies of descriptions with filled in keys are only made for
+    descriptions that are actually used.
+    """
+
+    __slots__ = ("_resolved", "_sources")
+
+    def __init__(self, descriptions: dict[str, D]) -> None:
+        self._sources: dict[str, tuple[D, int | None]] = {}
+        self._resolved: dict[str, D] = {}
+        for k, v in descriptions.items():
+            if not (
+                "{n}" in k
+                and isinstance(v, IndexableDescription)
+                and v.indexed_range is not None
+            ):
+                self._sources[k] = (v, None)
+                continue
+
+            for i in v.indexed_range:
+                self._sources[k.replace("{n}", str(i))] = (v, i)
+
+    def __getitem__(self, key: str) -> D:
+        if (description := self._resolved.get(key)) is None:
+            description = self._resolved[key] = self._resolve(key, *self._sources[key])
+        return description
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._sources
+
+    def __iter__(self):
+        return iter(self._sources)
+
+    def __len__(self) -> int:
+        return len(self._sources)
+
+    @staticmethod
+    def _resolve(key: str, description: D, index: int | None) -> D:
+        if index is None:
+            return (
+                dataclasses.replace(description, key=key)
+                if not description.key
+                else description
+            )
+
+        placeholders = description.translation_placeholders
+        if placeholders:
+            placeholders = {pk: pv.format(n=index) for pk, pv in placeholders.items()}
+        return dataclasses.replace(
+            description,
+            key=key,
+            indexed_range=None,
+            translation_placeholders=placeholders,
+        )
+
+
 def resolve_entity_description_keys[D: EntityDescription](
     descriptions: dict[str, D],
-) -> dict[str, D]:
+) -> ResolvedDescriptions[D]:
     """
     Fill in description keys from dict key, and expand indexed ({n}) descriptions.
 
     Descriptions with {n} in their key that are instances of indexed_type with
     indexed_range set are expanded across the range. {n} in translation_placeholder
-    values is also replaced, supporting format specs like {n:02d}.
+    values is also replaced, supporting format specs like {n:02d}. Descriptions are
+    resolved lazily, on first lookup.
     """
-    result: dict[str, D] = {}
-    for k, v in descriptions.items():
-        if not (
-            "{n}" in k
-            and isinstance(v, IndexableDescription)
-            and v.indexed_range is not None
-        ):
-            result[k] = dataclasses.replace(v, key=k) if not v.key else v
-            continue
-
-        for i in v.indexed_range:
-            actual_key = k.replace("{n}", str(i))
-            placeholders = v.translation_placeholders
-            if placeholders:
-                placeholders = {pk: pv.format(n=i) for pk, pv in placeholders.items()}
-            result[actual_key] = dataclasses.replace(
-                v,
-                key=actual_key,
-                indexed_range=None,
-                translation_placeholders=placeholders,
-            )
-
-    return result
+    return ResolvedDescriptions(descriptions)
@@ -0,0 +1,33 @@
+"""Per device class cache of entity descriptions used by platform setup"""
+
+from collections.abc import Callable
+from typing import Any
+
+from .eflib import DeviceBase
+
+_MANIFESTS: dict[tuple[type[DeviceBase], str], list[Any]] = {}
+
+
+def entity_manifest[T](
+    device: DeviceBase, platform: str, build: Callable[[DeviceBase], list[T]]
+) -> list[T]:
+    """
+    Return entity descriptions of a platform for the device class
+
+    Exposed entities depend only on the device class, so descriptions are built once
+    for the first device of each class and reused for every other config entry with
+    the same device model.
+
+    Parameters
+    ----------
+    device
+        Device to create entities for
+    platform
+        Name of the platform the descriptions are built for
+    build
+        Function building descriptions for the device, called only on cache miss
+    """
+    key = (type(device), platform)
+    if (descriptions := _MANIFESTS.get(key)) is None:
+        descriptions = _MANIFESTS[key] = build(device)
+    return descriptions
@@ -1,3 +1,4 @@
+import asyncio
 import dataclasses
 from collections.abc import Awaitable, Callable
 from dataclasses import dataclass
@@ -21,6 +22,7 @@ from .eflib import DeviceBase, controls, get_controls
 from .eflib.devices import smart_generator
 from .eflib.props import Field
 from .entity import EcoflowEntity
+from .entity_manifest import entity_manifest
 
 
 @dataclass(frozen=True, kw_only=True)
@@ -155,6 +157,15 @@ async def async_setup_entry(
 ) -> None:
     device = config_entry.runtime_data
 
+    entities = [
+        EcoflowNumber(device, desc)
+        for desc in entity_manifest(device, "number", _number_descriptions)
+    ]
+    if entities:
+        async_add_entities(entities)
+
+
+def _number_descriptions(device: DeviceBase) -> list[NumberEntityDescription]:
     # New controls system (devices migrated to @controls decorators)
     descriptions = [
         (
@@ -173,13 +184,12 @@ async def async_setup_entry(
     if not descriptions:
         # Deprecated: old hardcoded list (for devices not yet migrated)
         descriptions = [desc for desc in NUMBER_TYPES if hasattr(device, desc.key)]
-
-    entities = [EcoflowNumber(device, desc) for desc in descriptions]
-    if entities:
-        async_add_entities(entities)
+    return descriptions
 
 
 class EcoflowNumber(EcoflowEntity, NumberEntity):
+    _available_with_restored_state = False
+
     def __init__(
         self,
         device: DeviceBase,
@@ -198,6 +208,7 @@ class EcoflowNumber(EcoflowEntity, NumberEntity):
         self._set_native_value = entity_description.async_set_native_value
         self._prop_name = entity_description.key
         self._attr_native_value = getattr(device, self._prop_name)
+        self._set_tasks: set[asyncio.Task] = set()
 
         if entity_description.translation_key is None:
             self._attr_translation_key = self.entity_description.key
@@ -240,9 +251,43 @@ class EcoflowNumber(EcoflowEntity, NumberEntity):
 
         return self._attr_available
 
+    async def async_will_remove_from_hass(self) -> None:
+        for task in self._set_tasks:
+            task.cancel()
+        await super().async_will_remove_from_hass()
+
     async def async_set_native_value(self, value: float) -> None:
         if self._set_native_value is not None:
-            await self._set_native_value(self._device, value)
+            # show new value right away, it is rolled back to the value reported by the
+            # device if the command is rejected or not confirmed in time - waiting for
+            # confirmation does not block the service call
+            self._attr_native_value = value
+            self.async_write_ha_state()
+
+            task = self.hass.async_create_background_task(
+                self._async_set_and_confirm(value),
+                f"{self.entity_id}_set_native_value",
+            )
+            self._set_tasks.add(task)
+            task.add_done_callback(self._set_tasks.discard)
             return
 
         await super().async_set_native_value(value)
+
+    async def _async_set_and_confirm(self, value: float):
+        assert self._set_native_value is not None
+
+        try:
+            confirmed = await self._set_native_value(self._device, value) is not False
+        except Exception:
+            self._roll_back(value)
+            raise
+
+        if not confirmed:
+            self._roll_back(value)
+
+    def _roll_back(self, value: float):
+        # value set later replaces this one, its own command decides the rollback
+        if self._attr_native_value == value:
+            self._attr_native_value = getattr(self._device, self._prop_name)
+            self.async_write_ha_state()
@@ -11,6 +11,7 @@ from .deprecated.selects import SELECT_TYPES
 from .description_builder import EntityDescriptionBuilder
 from .eflib import DeviceBase, controls, get_controls
 from .entity import EcoflowEntity
+from .entity_manifest import entity_manifest
 
 
 @dataclasses.dataclass(kw_only=True, frozen=True)
@@ -72,6 +73,15 @@ async def async_setup_entry(
     """Add select entities for passed config_entry in HA."""
     device = config_entry.runtime_data
 
+    entities = [
+        EcoflowSelect(device, desc)
+        for desc in entity_manifest(device, "select", _select_descriptions)
+    ]
+    if entities:
+        async_add_entities(entities)
+
+
+def _select_descriptions(device: DeviceBase) -> list[SelectEntityDescription]:
     # New controls system (devices migrated to @controls decorators)
     descriptions = [
         (
@@ -88,13 +98,12 @@ async def async_setup_entry(
     if not descriptions:
         # Deprecated: old hardcoded list (for devices not yet migrated)
         descriptions = [desc for desc in SELECT_TYPES if hasattr(device, desc.key)]
-
-    entities = [EcoflowSelect(device, desc) for desc in descriptions]
-    if entities:
-        async_add_entities(entities)
+    return descriptions
 
 
 class EcoflowSelect(EcoflowEntity, SelectEntity):
+    _available_with_restored_state = False
+
     def __init__(
         self,
         device: DeviceBase,
@@ -1,6 +1,6 @@
 """EcoFlow BLE sensor"""
 
-from collections.abc import Callable
+from collections.abc import Callable, Mapping
 from dataclasses import dataclass, field, replace
 from enum import Enum, EnumType
 from typing import Any, Final, TypedDict, Unpack
@@ -24,12 +24,12 @@ from homeassistant.const import (
     UnitOfTemperature,
     UnitOfTime,
 )
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers import device_registry as dr
 from homeassistant.helpers.entity_platform import AddConfigEntryEntitiesCallback
 
 from . import DeviceConfigEntry
-from .const import CONF_EXTRA_BATTERY, DOMAIN
+from .const import CONF_EXTRA_BATTERY, CONF_EXTRA_BATTERY_DESELECTED, DOMAIN
 from .eflib import DeviceBase
 from .eflib.devices import (
     _delta3_base,
@@ -48,6 +48,7 @@ from .entity import (
     EcoflowEntity,
     resolve_entity_description_keys,
 )
+from .entity_manifest import entity_manifest
 
 
 @dataclass(frozen=True, kw_only=True)
@@ -842,9 +843,44 @@ _SENSORS: Final[dict[str, SensorEntityDescription]] = {
         name="Collecting data",
         entity_category=EntityCategory.DIAGNOSTIC,
     ),
+    "last_connect_duration": EcoflowSensorEntityDescription(
+        key="last_connect_duration",
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=1,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+    ),
+    # stage timings, only reported while enabled in diagnostics options
+    "frame_rate": EcoflowSensorEntityDescription(
+        key="frame_rate",
+        native_unit_of_measurement="frames/s",
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=2,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+    ),
+    "mean_decode_time": EcoflowSensorEntityDescription(
+        key="mean_decode_time",
+        native_unit_of_measurement=UnitOfTime.MICROSECONDS,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=0,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+    ),
+    "error_rate": EcoflowSensorEntityDescription(
+        key="error_rate",
+        native_unit_of_measurement="errors/min",
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=1,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+    ),
 }
 
-SENSOR_TYPES: Final[dict[str, SensorEntityDescription]] = (
+SENSOR_TYPES: Final[Mapping[str, SensorEntityDescription]] = (
     resolve_entity_description_keys(_SENSORS)
 )
 
@@ -867,8 +903,7 @@ async def async_setup_entry(
 
     new_sensors = [
         EcoflowSensor(device, sensor)
-        for sensor in SENSOR_TYPES
-        if hasattr(device, sensor)
+        for sensor in entity_manifest(device, "sensor", _sensor_keys)
     ]
 
     if new_sensors:
@@ -879,12 +914,25 @@ async def async_setup_entry(
     ):
         async_add_entities(battery_entities)
 
+    if any(
+        hasattr(device, f"battery_{i}_battery_level")
+        for i in device.EXTRA_BATTERY_SLOTS
+    ):
+        tracker = _ExtraBatteryTracker(hass, config_entry, async_add_entities)
+        config_entry.async_on_unload(device.on_topology_change(tracker.update))
+
+
+def _sensor_keys(device: DeviceBase):
+    return [sensor for sensor in SENSOR_TYPES if hasattr(device, sensor)]
+
 
 def _get_extra_battery_entities(
     hass: HomeAssistant, device: DeviceBase, conf: list[str] | None
 ):
     available_indices = [
-        i for i in range(1, 6) if hasattr(device, f"battery_{i}_battery_level")
+        i
+        for i in device.EXTRA_BATTERY_SLOTS
+        if hasattr(device, f"battery_{i}_battery_level")
     ]
 
     if not available_indices:
@@ -906,28 +954,106 @@ def _get_extra_battery_entities(
             if dev_entry := registry.async_get_device(identifiers={identifier}):
                 registry.async_remove_device(dev_entry.id)
 
+    return [
+        entity
+        for battery_index in enabled_indices
+        if battery_index in available_indices
+        for entity in _battery_addon_sensors(device, battery_index)
+    ]
+
+
+def _battery_addon_sensors(device: DeviceBase, battery_index: int):
     battery_entities: list[EcoflowBatteryAddonSensor] = []
-    for battery_index in enabled_indices:
-        if battery_index not in available_indices:
+    for template_key, desc in _BATTERY_ADDON_SENSORS.items():
+        attr_name = template_key.replace("{n}", str(battery_index))
+        if not hasattr(device, attr_name):
             continue
 
-        for template_key, desc in _BATTERY_ADDON_SENSORS.items():
-            attr_name = template_key.replace("{n}", str(battery_index))
-            if not hasattr(device, attr_name):
-                continue
-
-            battery_entities.append(
-                EcoflowBatteryAddonSensor(
-                    device=device,
-                    sensor=attr_name,
-                    description=replace(desc, key=attr_name),
-                    battery_index=battery_index,
-                )
+        battery_entities.append(
+            EcoflowBatteryAddonSensor(
+                device=device,
+                sensor=attr_name,
+                description=replace(desc, key=attr_name),
+                battery_index=battery_index,
             )
-
+        )
     return battery_entities
 
 
+class _ExtraBatteryTracker:
+    """
+    Add or remove extra battery entities when packs are connected or disconnected
+
+    Batteries in the config entry are exposed on setup. Connected batteries missing
+    from it are added once the device reports them, except the ones deselected in
+    reconfigure flow, so those are not added back on every connect.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        config_entry: DeviceConfigEntry,
+        async_add_entities: AddConfigEntryEntitiesCallback,
+    ) -> None:
+        self._hass = hass
+        self._config_entry = config_entry
+        self._async_add_entities = async_add_entities
+        self._last_reported: frozenset[int] | None = None
+
+    @callback
+    def update(self, batteries: frozenset[int]):
+        last_reported, self._last_reported = self._last_reported, batteries
+
+        device = self._config_entry.runtime_data
+        data = self._config_entry.data
+        conf = data.get(CONF_EXTRA_BATTERY)
+        if conf is not None:
+            enabled = {int(i) for i in conf}
+        else:
+            enabled = set(last_reported if last_reported is not None else batteries)
+        deselected = {int(i) for i in data.get(CONF_EXTRA_BATTERY_DESELECTED, [])}
+
+        # first report adds every connected battery the config entry does not know
+        connected = batteries - (last_reported or frozenset())
+        added = {
+            i
+            for i in connected - enabled - deselected
+            if hasattr(device, f"battery_{i}_battery_level")
+        }
+        removed = (
+            (last_reported - batteries) & enabled
+            if last_reported is not None
+            else set()
+        )
+        if not added and not removed:
+            return
+
+        registry = dr.async_get(self._hass)
+        for battery_index in removed:
+            identifier = (DOMAIN, f"{device.address}_battery_{battery_index}")
+            if dev_entry := registry.async_get_device(identifiers={identifier}):
+                registry.async_remove_device(dev_entry.id)
+
+        if added:
+            self._async_add_entities(
+                [
+                    entity
+                    for battery_index in sorted(added)
+                    for entity in _battery_addon_sensors(device, battery_index)
+                ]
+            )
+
+        self._hass.config_entries.async_update_entry(
+            self._config_entry,
+            data={
+                **data,
+                CONF_EXTRA_BATTERY: [
+                    str(i) for i in sorted((enabled | added) - removed)
+                ],
+            },
+        )
+
+
 class EcoflowSensor(EcoflowEntity, SensorEntity):
     """Base representation of a sensor."""
 
@@ -0,0 +1,132 @@
+"""Services of the EcoFlow BLE integration"""
+
+import asyncio
+
+import voluptuous as vol
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.const import ATTR_DEVICE_ID
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+)
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers import device_registry as dr
+
+from . import eflib
+from .const import DOMAIN
+from .eflib.memory import trace_allocations
+from .eflib.profiler import SamplingProfiler
+
+SERVICE_PROFILE = "profile"
+SERVICE_TRACE_MEMORY = "trace_memory"
+ATTR_DURATION = "duration"
+ATTR_INTERVAL = "interval"
+ATTR_TOP = "top"
+
+PROFILE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_DEVICE_ID): cv.string,
+        vol.Optional(ATTR_DURATION, default=10): vol.All(
+            vol.Coerce(float), vol.Range(min=1, max=300)
+        ),
+        vol.Optional(ATTR_INTERVAL, default=5): vol.All(
+            vol.Coerce(float), vol.Range(min=1, max=100)
+        ),
+    }
+)
+
+TRACE_MEMORY_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_DURATION, default=60): vol.All(
+            vol.Coerce(float), vol.Range(min=1, max=3600)
+        ),
+        vol.Optional(ATTR_TOP, default=30): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=500)
+        ),
+    }
+)
+
+_profile_lock = asyncio.Lock()
+_trace_memory_lock = asyncio.Lock()
+
+
+def async_setup_services(hass: HomeAssistant):
+    """Register services of the integration"""
+
+    async def _profile(call: ServiceCall) -> ServiceResponse:
+        devices = _loaded_devices(hass, call.data.get(ATTR_DEVICE_ID))
+        if _profile_lock.locked():
+            raise ServiceValidationError(
+                translation_domain=DOMAIN, translation_key="profile_running"
+            )
+
+        async with _profile_lock:
+            profiler = SamplingProfiler(
+                devices if ATTR_DEVICE_ID in call.data else None,
+                interval=call.data[ATTR_INTERVAL] / 1000,
+            )
+            profile = await profiler.run(call.data[ATTR_DURATION])
+
+        profile["devices"] = [device.name for device in devices]
+        for device in devices:
+            device.diagnostics.profile = profile
+        return profile
+
+    async def _trace_memory(call: ServiceCall) -> ServiceResponse:
+        if _trace_memory_lock.locked():
+            raise ServiceValidationError(
+                translation_domain=DOMAIN, translation_key="memory_trace_running"
+            )
+
+        async with _trace_memory_lock:
+            trace = await trace_allocations(
+                call.data[ATTR_DURATION], call.data[ATTR_TOP]
+            )
+
+        for device in _loaded_devices(hass, None):
+            device.diagnostics.memory_trace = trace
+        return trace
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_PROFILE,
+        _profile,
+        schema=PROFILE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_TRACE_MEMORY,
+        _trace_memory,
+        schema=TRACE_MEMORY_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+
+def _loaded_devices(
+    hass: HomeAssistant, device_id: str | None
+) -> list[eflib.DeviceBase]:
+    entries = [
+        entry
+        for entry in hass.config_entries.async_entries(DOMAIN)
+        if entry.state is ConfigEntryState.LOADED
+    ]
+    if device_id is not None:
+        device_entry = dr.async_get(hass).async_get(device_id)
+        entries = [
+            entry
+            for entry in entries
+            if device_entry is not None
+            and entry.entry_id in device_entry.config_entries
+        ]
+        if not entries:
+            raise ServiceValidationError(
+                translation_domain=DOMAIN,
+                translation_key="device_not_loaded",
+                translation_placeholders={"device_id": device_id},
+            )
+
+    return [entry.runtime_data for entry in entries]
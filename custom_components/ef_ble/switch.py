@@ -18,6 +18,7 @@ from .description_builder import EntityDescriptionBuilder
 from .eflib import DeviceBase, get_controls
 from .eflib.entity import controls
 from .entity import EcoflowEntity
+from .entity_manifest import entity_manifest
 
 
 @dataclass(frozen=True, kw_only=True)
@@ -79,6 +80,15 @@ async def async_setup_entry(
 ):
     device = entry.runtime_data
 
+    entities = [
+        EcoflowSwitchEntity(device, desc)
+        for desc in entity_manifest(device, "switch", _switch_descriptions)
+    ]
+    if entities:
+        async_add_entities(entities)
+
+
+def _switch_descriptions(device: DeviceBase) -> list[SwitchEntityDescription]:
     # New controls system (devices migrated to @controls decorators)
     descriptions = [
         (
@@ -103,13 +113,12 @@ async def async_setup_entry(
                 )
             )
         ]
-
-    entities = [EcoflowSwitchEntity(device, desc) for desc in descriptions]
-    if entities:
-        async_add_entities(entities)
+    return descriptions
 
 
 class EcoflowSwitchEntity(EcoflowEntity, SwitchEntity):
+    _available_with_restored_state = False
+
     def __init__(
         self, device: DeviceBase, entity_description: SwitchEntityDescription
     ) -> None:
@@ -0,0 +1,93 @@
+import asyncio
+
+from custom_components.ef_ble.eflib.ack_tracker import AckTracker, seq_counter
+from custom_components.ef_ble.eflib.packet import Packet
+
+
+def _command(payload=b"\x01"):
+    return Packet(0x21, 0x02, 0x02, 0x57, payload, version=0x13)
+
+
+def _reply(seq: bytes):
+    return Packet(0x02, 0x21, 0x02, 0x57, b"\x00", version=0x13, seq=seq)
+
+
+async def test_sequence_numbers_keep_xor_byte_zero():
+    tracker = AckTracker()
+
+    first, counter = tracker.with_seq(_command())
+    second, _ = tracker.with_seq(_command())
+
+    assert first.seq[0] == 0
+    assert first.seq != second.seq
+    assert seq_counter(first.seq) == counter
+
+    # sequence survives serialization
+    assert Packet.fromBytes(first.toBytes()).seq == first.seq
+
+
+async def test_reply_with_same_seq_confirms_command():
+    tracker = AckTracker()
+    packet, counter = tracker.with_seq(_command())
+    pending = tracker.track(packet, counter)
+
+    tracker.on_packet(_reply(packet.seq))
+
+    assert await pending.future
+    assert tracker.stats()["confirmed"] == 1
+    assert tracker.latency.count == 1
+
+
+async def test_confirm_function_confirms_command():
+    state = {"value": 50}
+    tracker = AckTracker()
+    packet, counter = tracker.with_seq(_command())
+    pending = tracker.track(packet, counter, confirm=lambda: state["value"] == 80)
+
+    tracker.check_confirmations()
+    assert not pending.future.done()
+
+    state["value"] = 80
+    tracker.check_confirmations()
+    assert await pending.future
+
+
+async def test_reply_does_not_confirm_command_with_confirm_function():
+    state = {"value": 50}
+    tracker = AckTracker()
+    packet, counter = tracker.with_seq(_command())
+    pending = tracker.track(packet, counter, confirm=lambda: state["value"] == 80)
+
+    # device replies to rejected commands too, only the state confirms them
+    tracker.on_packet(_reply(packet.seq))
+    tracker.check_confirmations()
+    assert not pending.future.done()
+
+    state["value"] = 80
+    tracker.check_confirmations()
+    assert await pending.future
+
+
+async def test_unconfirmed_command_times_out():
+    tracker = AckTracker()
+    packet, counter = tracker.with_seq(_command())
+    pending = tracker.track(packet, counter, confirm=lambda: False, timeout=0.01)
+
+    assert await pending.future is False
+    assert tracker.timeouts == 1
+    assert len(tracker) == 0
+
+
+async def test_commands_from_same_scope_share_newest_result():
+    tracker = AckTracker()
+    first, counter = tracker.with_seq(_command(b"\x01"))
+    older = tracker.track(first, counter, confirm=lambda: False, scope="limit")
+    second, counter = tracker.with_seq(_command(b"\x02"))
+    newer = tracker.track(second, counter, scope="limit")
+
+    tracker.on_packet(_reply(second.seq))
+    await asyncio.sleep(0)
+
+    assert await newer.future
+    assert await older.future
+    assert len(tracker) == 0
@@ -0,0 +1,177 @@
+import asyncio
+import itertools
+
+from custom_components.ef_ble.eflib.command_queue import CommandQueue, Priority
+
+
+def _writer(written: list, value, release: asyncio.Event | None = None):
+    async def _write():
+        if release is not None:
+            await release.wait()
+        written.append(value)
+
+    return _write
+
+
+async def test_commands_are_written_by_priority():
+    written = []
+    release = asyncio.Event()
+    queue = CommandQueue()
+
+    first = queue.submit(_writer(written, "first", release))
+    await asyncio.sleep(0)  # first command is being written
+    futures = [
+        queue.submit(_writer(written, "poll"), Priority.POLL),
+        queue.submit(_writer(written, "command"), Priority.COMMAND),
+        queue.submit(_writer(written, "reply"), Priority.REPLY),
+        queue.submit(_writer(written, "auth"), Priority.AUTH),
+    ]
+    release.set()
+
+    assert all(await asyncio.gather(first, *futures))
+    assert written == ["first", "auth", "reply", "command", "poll"]
+    queue.stop()
+
+
+async def test_commands_with_same_key_are_last_write_wins():
+    written = []
+    release = asyncio.Event()
+    queue = CommandQueue()
+
+    busy = queue.submit(_writer(written, "busy", release))
+    await asyncio.sleep(0)
+    futures = [
+        queue.submit(_writer(written, value), key="ac_charging_speed")
+        for value in range(20)
+    ]
+    release.set()
+
+    assert all(await asyncio.gather(busy, *futures))
+    assert written == ["busy", 19]
+    assert queue.stats.coalesced == 19
+    queue.stop()
+
+
+async def test_failed_writes_are_retried_in_queue():
+    attempts = 0
+    errors = []
+
+    async def _flaky():
+        nonlocal attempts
+        attempts += 1
+        if attempts < 3:
+            raise OSError("write failed")
+
+    async def _on_error(exc: Exception):
+        errors.append(exc)
+
+    queue = CommandQueue(on_error=_on_error, retry_delay=0.001)
+
+    assert await queue.submit(_flaky)
+    assert attempts == 3
+    assert queue.stats.retried == 2
+    assert errors == []
+    queue.stop()
+
+
+async def test_command_fails_after_max_attempts():
+    errors = []
+
+    async def _failing():
+        raise OSError("write failed")
+
+    async def _on_error(exc: Exception):
+        errors.append(exc)
+
+    queue = CommandQueue(on_error=_on_error, max_attempts=2, retry_delay=0.001)
+
+    assert not await queue.submit(_failing)
+    assert len(errors) == 1
+    assert queue.stats.failed == 1
+    queue.stop()
+
+
+async def test_writes_are_rate_limited():
+    loop = asyncio.get_running_loop()
+    times = []
+
+    async def _write():
+        times.append(loop.time())
+
+    queue = CommandQueue(min_interval=0.02)
+    await asyncio.gather(*(queue.submit(_write) for _ in range(3)))
+
+    assert all(b - a >= 0.019 for a, b in itertools.pairwise(times))
+    queue.stop()
+
+
+async def test_stop_resolves_pending_commands():
+    release = asyncio.Event()
+    queue = CommandQueue()
+
+    in_flight = queue.submit(_writer([], "in_flight", release))
+    pending = queue.submit(_writer([], "pending"))
+    await asyncio.sleep(0)
+    queue.stop()
+
+    assert await in_flight is False
+    assert await pending is False
+
+
+def _encoder(frame: bytes):
+    async def _encode():
+        return frame
+
+    return _encode
+
+
+async def test_queued_frames_are_batched_up_to_max_size():
+    writes = []
+    release = asyncio.Event()
+
+    async def _batch_write(data: bytes):
+        writes.append(data)
+
+    queue = CommandQueue().with_batching(_batch_write, lambda: 8)
+
+    busy = queue.submit(_writer([], "busy", release))
+    await asyncio.sleep(0)
+    futures = [
+        queue.submit(_writer([], frame), encode=_encoder(frame))
+        for frame in (b"aaa", b"bbb", b"ccc")
+    ]
+    release.set()
+
+    assert all(await asyncio.gather(busy, *futures))
+    assert writes == [b"aaabbb", b"ccc"]
+    assert queue.stats.batched == 2
+    queue.stop()
+
+
+async def test_failed_batch_write_is_reported_once():
+    errors = []
+    release = asyncio.Event()
+
+    async def _batch_write(data: bytes):
+        raise OSError("write failed")
+
+    async def _on_error(exc: Exception):
+        errors.append(exc)
+
+    queue = CommandQueue(on_error=_on_error, max_attempts=1).with_batching(
+        _batch_write, lambda: 64
+    )
+
+    busy = queue.submit(_writer([], "busy", release))
+    await asyncio.sleep(0)
+    futures = [
+        queue.submit(_writer([], frame), encode=_encoder(frame))
+        for frame in (b"aaa", b"bbb", b"ccc")
+    ]
+    release.set()
+
+    assert await busy
+    assert not any(await asyncio.gather(*futures))
+    assert queue.stats.failed == 3
+    assert len(errors) == 1
+    queue.stop()
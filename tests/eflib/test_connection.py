@@ -0,0 +1,152 @@
+import asyncio
+
+import pytest
+
+from benchmarks.fake_peripheral import FakePeripheral
+from custom_components.ef_ble.eflib.connection import Connection, ConnectionState
+from custom_components.ef_ble.eflib.instrumentation import Stage, StageTimings
+from custom_components.ef_ble.eflib.loop_monitor import LoopHolds, LoopMonitor
+from custom_components.ef_ble.eflib.packet import Packet
+from custom_components.ef_ble.eflib.protocol_cache import ProtocolCache
+
+SERIAL_NUMBER = "R351TESTSN000001"
+USER_ID = "1234567890"
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        ProtocolCache,
+        "cache_file_for",
+        staticmethod(lambda address: tmp_path / f"{address}_protocol.json"),
+    )
+    monkeypatch.setattr(ProtocolCache, "_caches", {})
+    return tmp_path
+
+
+def _heartbeat(n: int):
+    return Packet(0x02, 0x21, 0x20, 0x02, bytes([n]) * 200, version=0x03).toBytes()
+
+
+def _connection(peripheral: FakePeripheral, received: list[Packet] | None = None):
+    async def data_parse(packet: Packet):
+        if received is not None:
+            received.append(packet)
+        return True
+
+    async def packet_parse(data: bytes):
+        return Packet.fromBytes(data)
+
+    return Connection(
+        peripheral.ble_device,
+        SERIAL_NUMBER,
+        USER_ID,
+        data_parse,
+        packet_parse,
+        encrypt_type=peripheral.encrypt_type,
+    ).with_client_class(peripheral.client_class)
+
+
+@pytest.mark.parametrize("encrypt_type", [1, 7])
+async def test_connect_authenticates(encrypt_type):
+    peripheral = FakePeripheral(
+        SERIAL_NUMBER, encrypt_type=encrypt_type, user_id=USER_ID, seed=1
+    )
+    connection = _connection(peripheral)
+
+    await connection.connect()
+    state = await asyncio.wait_for(connection.wait_until_authenticated_or_error(), 5)
+
+    assert state is ConnectionState.AUTHENTICATED
+    assert peripheral.authenticated
+    assert ProtocolCache.for_address(peripheral.address).params is not None
+
+    timings = connection._connect_timings
+    assert timings.attempts.count == 1
+    assert timings.ble_connects.count == timings.establish.count == 1
+    assert timings.last_attempt["result"] == "AUTHENTICATED"
+    assert "ESTABLISHING_CONNECTION" in timings.last_attempt["states_ms"]
+    assert "AUTHENTICATING" in timings.states
+
+    await connection.disconnect()
+    assert not peripheral.is_connected
+
+
+async def test_heartbeats_are_reassembled_from_small_notifications():
+    heartbeats = [_heartbeat(1), _heartbeat(2)]
+    peripheral = FakePeripheral(SERIAL_NUMBER, mtu=23, seed=1)
+    connection = _connection(peripheral)
+
+    await connection.connect()
+    await asyncio.wait_for(connection.wait_until_authenticated_or_error(), 5)
+
+    parsed: list[Packet] = []
+    complete = asyncio.get_running_loop().create_future()
+
+    def _on_packet_parsed(packet: Packet):
+        parsed.append(packet)
+        if len(parsed) == len(heartbeats):
+            complete.set_result(None)
+
+    connection.on_packet_parsed(_on_packet_parsed)
+    for heartbeat in heartbeats:
+        peripheral.notify(heartbeat)
+    await asyncio.wait_for(complete, 5)
+    await connection.disconnect()
+
+    assert [packet.toBytes() for packet in parsed] == heartbeats
+
+
+async def test_stage_timings_cover_notification_path():
+    peripheral = FakePeripheral(
+        SERIAL_NUMBER, heartbeats=[_heartbeat(1)], heartbeat_interval=0.01, seed=1
+    )
+    received: list[Packet] = []
+    timings = StageTimings()
+    connection = _connection(peripheral, received).with_stage_timings(timings)
+
+    await connection.connect()
+    await asyncio.wait_for(connection.wait_until_authenticated_or_error(), 5)
+    async with asyncio.timeout(5):
+        while len(received) < 2:
+            await asyncio.sleep(0.01)
+    await connection.disconnect()
+
+    for stage in (Stage.RECEIVE, Stage.REASSEMBLE, Stage.DECRYPT, Stage.PARSE):
+        assert timings.histograms[stage].count >= 2
+    assert timings.rates().frames_per_second > 0
+    assert all(packet.received_at is not None for packet in received)
+
+
+async def test_loop_holds_cover_handshake_and_packets():
+    peripheral = FakePeripheral(
+        SERIAL_NUMBER, heartbeats=[_heartbeat(1)], heartbeat_interval=0.01, seed=1
+    )
+    received: list[Packet] = []
+    monitor = LoopMonitor(asyncio.get_running_loop())
+    holds = LoopHolds(monitor, peripheral.address)
+    connection = _connection(peripheral, received).with_loop_holds(holds)
+
+    await connection.connect()
+    await asyncio.wait_for(connection.wait_until_authenticated_or_error(), 5)
+    async with asyncio.timeout(5):
+        while len(received) < 2:
+            await asyncio.sleep(0.01)
+    await connection.disconnect()
+
+    assert set(holds.stats()["holds_ms"]) >= {"notification", "data_parse", "ecdh"}
+
+
+async def test_wrong_user_id_fails_authentication():
+    peripheral = FakePeripheral(SERIAL_NUMBER, user_id="42", seed=1)
+    connection = _connection(peripheral)
+
+    await connection.connect()
+    state = await asyncio.wait_for(connection.wait_until_authenticated_or_error(), 5)
+
+    assert state is ConnectionState.ERROR_AUTH_FAILED
+    assert not peripheral.is_connected
+    assert connection._connect_timings.failed_attempts == 1
+    assert connection._connect_timings.last_connect_duration is None
+
+    await connection.disconnect()
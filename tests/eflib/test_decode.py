@@ -0,0 +1,67 @@
+import json
+
+from benchmarks.decode import (
+    DecodeBenchmark,
+    captured_corpora,
+    compare,
+    generated_corpus,
+    main,
+)
+
+
+async def test_captured_packets_are_decoded_without_errors():
+    corpus = captured_corpora()["river3"]
+    stats = await DecodeBenchmark(corpus).run(repeat=2, runs=2)
+
+    assert stats.frames == 2 * len(corpus.packets)
+    assert stats.processed == stats.frames
+    assert stats.errors == 0
+    assert stats.callbacks > 0
+    assert stats.frames_per_second > 0
+    assert stats.peak_bytes > 0
+
+
+async def test_generated_corpus_is_deterministic():
+    first = await generated_corpus("wave2")
+    second = await generated_corpus("wave2")
+
+    assert first.source == "generated"
+    assert first.digest == second.digest
+
+
+def test_regressions_beyond_threshold_are_reported():
+    baseline = {
+        "river3": {
+            "corpus": "abc",
+            "frames_per_second": 1000.0,
+            "peak_bytes": 1000,
+            "retained_blocks": 0,
+        }
+    }
+    slower = {"river3": {**baseline["river3"], "frames_per_second": 700.0}}
+    within = {"river3": {**baseline["river3"], "peak_bytes": 1100}}
+    changed = {"river3": {**slower["river3"], "corpus": "def"}}
+
+    assert compare(slower, baseline, 0.2) == [
+        "river3: frames_per_second 1000.0 -> 700.0"
+    ]
+    assert compare(within, baseline, 0.2) == []
+    assert compare(changed, baseline, 0.2) == []
+
+
+def test_modules_missing_from_baseline_fail_check(tmp_path):
+    result = {
+        "corpus": "abc",
+        "source": "generated",
+        "frames_per_second": 1000.0,
+        "peak_bytes": 1000,
+        "retained_blocks": 0,
+        "errors": 0,
+    }
+    old = tmp_path / "old.json"
+    new = tmp_path / "new.json"
+    old.write_text(json.dumps({"river3": result}))
+    new.write_text(json.dumps({"river3": result, "wave2": result}))
+
+    assert main(["--compare", str(old), str(old)]) == 0
+    assert main(["--compare", str(old), str(new)]) == 1
@@ -1,7 +1,9 @@
 import pytest
 from pytest_mock import MockerFixture
 
+from custom_components.ef_ble.eflib.connection import ConnectionState
 from custom_components.ef_ble.eflib.devices.delta2_plus import Device
+from custom_components.ef_ble.eflib.entity import controls
 
 
 @pytest.fixture
@@ -247,3 +249,31 @@ async def test_delta2_plus_exact_values_from_known_packets(device, packet_sequen
         assert actual_value == expected_value, (
             f"{field_name}: expected {expected_value}, got {actual_value}"
         )
+
+
+async def test_delta2_plus_state_snapshot_restores_values(
+    device, packet_sequence, mocker: MockerFixture
+):
+    for hex_packet in packet_sequence:
+        packet = await device.packet_parse(bytes.fromhex(hex_packet))
+        await device.data_parse(packet)
+
+    snapshot = device.state_snapshot()
+    restored = Device(device._ble_dev, mocker.MagicMock(), "D361TEST1234")
+    restored.restore_state(snapshot)
+
+    assert restored.state_restored
+    assert restored.battery_level == device.battery_level
+    assert restored.input_power == device.input_power
+
+    restored._clear_restored_state(ConnectionState.AUTHENTICATED)
+    assert not restored.state_restored
+
+
+def test_delta2_plus_controls_are_shared_by_instances(device, mocker: MockerFixture):
+    other = Device(device._ble_dev, mocker.MagicMock(), "D361TEST5678")
+
+    switches = device.get_controls(controls.toggle)
+
+    assert switches
+    assert other.get_controls(controls.toggle) is switches
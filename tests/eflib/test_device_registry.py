@@ -0,0 +1,62 @@
+import pytest
+
+from custom_components.ef_ble.eflib import devices
+from custom_components.ef_ble.eflib.devices import unsupported
+from custom_components.ef_ble.eflib.props.protobuf_field import ProtobufField
+
+
+@pytest.mark.parametrize("module_name", sorted(devices.SN_PREFIXES))
+def test_prefix_table_matches_device_modules(module_name):
+    module = devices.load_module(module_name)
+    sn_prefix = module.Device.SN_PREFIX
+    if isinstance(sn_prefix, bytes):
+        sn_prefix = (sn_prefix,)
+
+    assert set(devices.SN_PREFIXES[module_name]) == set(sn_prefix)
+
+
+def test_every_device_module_is_registered():
+    assert set(devices.__all__) == {*devices.SN_PREFIXES, devices.FALLBACK_MODULE}
+
+
+@pytest.mark.parametrize(
+    ("sn", "module_name"),
+    [
+        (b"DCABZ5ZE1234567", "delta_pro"),
+        (b"Z1AB1234567890", "delta_pro"),
+        (b"R5111234567890", "delta_pro"),
+        (b"R6111234567890", "river2_max"),
+        (b"R6131234567890", "river2_max"),
+        (b"BK011234567890", "stream_microinverter"),
+        (b"DC011234567890", "alternator_charger"),
+        (b"XX011234567890", "unsupported"),
+        (b"R6", "unsupported"),
+    ],
+)
+def test_module_resolved_by_serial_prefix(sn, module_name):
+    assert devices.module_name_for(sn) == module_name
+
+
+def test_device_class_matches_check():
+    sn = b"HW511234567890"
+
+    device_class = devices.device_class_for(sn)
+
+    assert device_class.check(sn)
+    assert devices.device_class_for(b"XX01") is unsupported.UnsupportedDevice
+
+
+def test_model_is_known_without_creating_device():
+    device_class = devices.device_class_for(b"R6541234567890")
+
+    assert device_class.model_for("R6541234567890") == "River 3 UPS (230Wh)"
+    assert device_class.default_name_for("R6541234567890") == "EF-R37890"
+
+
+@pytest.mark.parametrize("module_name", sorted(devices.SN_PREFIXES))
+def test_protobuf_field_paths_exist(module_name):
+    device_class = devices.load_module(module_name).Device
+
+    for field in device_class._fields:
+        if isinstance(field, ProtobufField):
+            field.pb_field.validate()
@@ -2,6 +2,7 @@ import pytest
 from pytest_mock import MockerFixture
 
 from custom_components.ef_ble.eflib.devices.dpu import Device
+from custom_components.ef_ble.eflib.pb import yj751_sys_pb2
 
 
 @pytest.fixture
@@ -182,3 +183,25 @@ async def test_dpu_exact_values_from_known_packets(device, packet_sequence):
         assert actual_value == expected_value, (
             f"{field_name}: expected {expected_value}, got {actual_value}"
         )
+
+
+async def test_dpu_reports_battery_topology_changes(device, packet_sequence):
+    topologies = []
+    device.on_topology_change(topologies.append)
+
+    for _ in range(2):
+        packet = await device.packet_parse(bytes.fromhex(packet_sequence[0]))
+        await device.data_parse(packet)
+
+    assert topologies == [frozenset({1, 2, 3})]
+    assert device.battery_1_enabled is True
+    assert device.battery_4_enabled is False
+
+    device.update_from_message(
+        yj751_sys_pb2.BpInfoReport(bp_info=[yj751_sys_pb2.BPInfo(bp_no=1)])
+    )
+    device._update_extra_battery_topology()
+
+    assert topologies[-1] == frozenset({1})
+    assert device.extra_batteries == frozenset({1})
+    assert device.battery_3_enabled is False
@@ -0,0 +1,46 @@
+from custom_components.ef_ble.eflib.encryption import Type1Encryption, Type7Encryption
+from custom_components.ef_ble.eflib.frame_assembler import (
+    EncPacketAssembler,
+    RawHeaderAssembler,
+)
+from custom_components.ef_ble.eflib.packet import Packet
+
+KEY = bytes(range(16))
+IV = bytes(range(16, 32))
+
+
+def _poll():
+    return Packet(0x21, 0x02, 0x20, 0x02, b"\x01", version=0x02)
+
+
+async def test_repeated_packets_are_encoded_once():
+    assembler = EncPacketAssembler(Type7Encryption(KEY, IV))
+
+    first = await assembler.encode(_poll())
+    second = await assembler.encode(_poll())
+
+    assert first == second
+    assert assembler.cache_stats.hits == 1
+    assert assembler.cache_stats.misses == 1
+    assert assembler.cache_stats.hit_rate == 0.5
+
+
+async def test_cached_frames_decode_to_original_packet():
+    assembler = RawHeaderAssembler(Type1Encryption(KEY, IV))
+
+    await assembler.encode(_poll())
+    frame = await assembler.encode(_poll())
+    [payload] = await assembler.reassemble(frame)
+
+    assert payload == _poll().toBytes()
+
+
+async def test_cache_is_bounded():
+    assembler = EncPacketAssembler(Type7Encryption(KEY, IV), cache_size=2)
+
+    for value in range(3):
+        await assembler.encode(Packet(0x21, 0x02, 0x20, 0x02, bytes([value])))
+    await assembler.encode(Packet(0x21, 0x02, 0x20, 0x02, b"\x00"))
+
+    assert assembler.cache_stats.size == 2
+    assert assembler.cache_stats.hits == 0
@@ -0,0 +1,32 @@
+import pytest
+from pytest_mock import MockerFixture
+
+from benchmarks.generators import (
+    HeartbeatGenerator,
+    create_device,
+    serial_number_for,
+)
+
+
+@pytest.mark.parametrize("model", ["delta2_max", "river3", "dpu", "shp2", "wave2"])
+async def test_generated_heartbeats_are_processed(model, mocker: MockerFixture):
+    generator = await HeartbeatGenerator.create(model, change_rate=0.5, seed=1)
+    device = create_device(serial_number_for(model))
+    device._conn = mocker.AsyncMock()
+    device._conn._add_task = mocker.Mock(side_effect=lambda coro: coro.close())
+
+    for _ in range(3 * len(generator.routes)):
+        assert await device.data_parse(next(generator)) is not False
+
+    values = [getattr(device, field.public_name, None) for field in device._fields]
+    assert sum(value is not None for value in values) > len(values) // 2
+
+
+async def test_change_rate_controls_drift():
+    steady = await HeartbeatGenerator.create("river3", change_rate=0.0, seed=1)
+    drifting = await HeartbeatGenerator.create("river3", change_rate=1.0, seed=1)
+
+    assert next(steady).payload == next(steady).payload
+    assert not steady.changed
+    assert next(drifting).payload != next(drifting).payload
+    assert drifting.changed
@@ -0,0 +1,20 @@
+import pytest
+from pytest_mock import MockerFixture
+
+from custom_components.ef_ble.eflib.instrumentation import ThroughputMeter
+
+
+def test_rates_of_young_meter_cover_its_lifetime(mocker: MockerFixture):
+    clock = mocker.patch(
+        "custom_components.ef_ble.eflib.instrumentation.time.monotonic",
+        return_value=100.0,
+    )
+    meter = ThroughputMeter(window=60)
+
+    clock.return_value = 105.0
+    meter.add(100)
+    meter.add(100)
+    assert meter.rates() == pytest.approx((0.4, 40.0))
+
+    clock.return_value = 160.0
+    assert meter.rates() == pytest.approx((2 / 60, 200 / 60))
@@ -0,0 +1,79 @@
+import asyncio
+import time
+
+import pytest
+
+from custom_components.ef_ble.eflib.loop_monitor import LoopMonitor, LoopStage
+
+
+@pytest.fixture
+async def monitor():
+    monitor = LoopMonitor(asyncio.get_running_loop(), threshold=0.02, worst=2)
+    monitor.register("test")
+    yield monitor
+    monitor.unregister("test")
+
+
+def _block(seconds: float):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+async def test_hold_is_attributed_to_device_and_stage(monitor):
+    with monitor.hold("dev", LoopStage.CALLBACKS):
+        _block(0.001)
+
+    stats = monitor.stats("dev")
+    assert stats["holds_ms"]["callbacks"]["count"] == 1
+    assert stats["worst"] == []
+    assert monitor.stats("other")["holds_ms"] == {}
+
+
+async def test_timed_excludes_time_spent_suspended(monitor):
+    async def _handler():
+        _block(0.001)
+        await asyncio.sleep(0.05)
+        _block(0.001)
+        return 42
+
+    assert await monitor.timed("dev", LoopStage.DATA_PARSE, _handler()) == 42
+
+    holds = monitor.stats("dev")["holds_ms"]["data_parse"]
+    assert holds["count"] >= 2
+    assert holds["max"] < 25
+
+
+async def test_timed_propagates_exceptions(monitor):
+    async def _handler():
+        await asyncio.sleep(0)
+        raise ValueError
+
+    with pytest.raises(ValueError):
+        await monitor.timed("dev", LoopStage.NOTIFICATION, _handler())
+
+    assert monitor.stats("dev")["holds_ms"]["notification"]["count"] == 2
+
+
+async def test_longest_holds_are_kept_with_stack(monitor):
+    for duration in (0.03, 0.05, 0.04):
+        with monitor.hold("dev", LoopStage.ECDH):
+            _block(duration)
+
+    worst = monitor.stats("dev")["worst"]
+    assert len(worst) == 2
+    assert worst[0]["duration_ms"] >= 50 > worst[1]["duration_ms"] >= 40
+    assert all(hold["stage"] == "ecdh" for hold in worst)
+    assert any("_block" in line for line in worst[0]["stack"])
+
+
+async def test_probe_measures_loop_lag():
+    monitor = LoopMonitor(asyncio.get_running_loop(), lag_interval=0.01)
+    monitor.register("test")
+    await asyncio.sleep(0.015)
+    _block(0.03)
+    await asyncio.sleep(0.02)
+    monitor.unregister("test")
+
+    assert monitor.lag.max >= 10
+    assert not monitor.running
@@ -0,0 +1,38 @@
+import asyncio
+import sys
+
+from custom_components.ef_ble.eflib.memory import deep_sizeof, trace_allocations
+from custom_components.ef_ble.eflib.packet import Packet
+
+
+def test_deep_sizeof_counts_shared_objects_once():
+    payload = b"x" * 1000
+    seen: set[int] = set()
+
+    first = deep_sizeof([payload], seen)
+    second = deep_sizeof([payload], seen)
+
+    assert first >= sys.getsizeof(payload)
+    assert second < sys.getsizeof(payload)
+
+
+def test_deep_sizeof_follows_eflib_objects():
+    packet = Packet(0x02, 0x21, 0x20, 0x02, b"x" * 1000)
+
+    assert deep_sizeof(packet) > 1000
+
+
+async def test_trace_allocations_attributes_growth_to_eflib_lines():
+    kept: list[bytes] = []
+
+    async def _allocate():
+        while True:
+            kept.append(Packet(0x02, 0x21, 0x20, 0x02, b"x" * 100).toBytes())
+            await asyncio.sleep(0)
+
+    task = asyncio.create_task(_allocate())
+    trace = await trace_allocations(0.05)
+    task.cancel()
+
+    assert trace["size_diff_bytes"] > 0
+    assert any(entry["location"].startswith("packet.py") for entry in trace["top"])
@@ -0,0 +1,43 @@
+import pytest
+
+from custom_components.ef_ble.eflib.packet import Packet
+
+
+def _slow_reply(packet: Packet):
+    return Packet(
+        packet.dst,
+        packet.src,
+        packet.cmdSet,
+        packet.cmdId,
+        packet.payload,
+        0x01,
+        0x01,
+        packet.version,
+        packet.seq,
+        packet.productId,
+    ).toBytes()
+
+
+@pytest.mark.parametrize("version", [0x02, 0x03])
+def test_reply_bytes_match_rebuilt_reply(version):
+    received = Packet(
+        0x0B,
+        0x21,
+        0x0C,
+        0x20,
+        b"\x01\x02\x03",
+        dsrc=0x00,
+        ddst=0x00,
+        version=version,
+        seq=b"\x12\x00\x00\x00",
+    )
+    packet = Packet.fromBytes(received.toBytes())
+
+    assert packet.reply_bytes() == _slow_reply(packet)
+
+
+def test_reply_bytes_unavailable_for_xored_payload():
+    received = Packet(0x02, 0x21, 0xFE, 0x15, b"\x01", seq=b"\x12\x00\x00\x00")
+    packet = Packet.fromBytes(received.toBytes(), xor_payload=True)
+
+    assert packet.reply_bytes() is None
@@ -0,0 +1,71 @@
+import asyncio
+
+from custom_components.ef_ble.eflib.packet import Packet
+from custom_components.ef_ble.eflib.packet_queue import InboundPacketQueue
+
+HEARTBEAT = (0x02, 0x20, 0x02)
+
+
+def _packet(src, cmd_set, cmd_id, payload=b"\x00"):
+    return Packet(src, 0x21, cmd_set, cmd_id, payload)
+
+
+async def test_packets_are_processed_in_order():
+    processed = []
+
+    async def _handler(packet: Packet):
+        processed.append(packet.payload)
+
+    queue = InboundPacketQueue(_handler)
+    queue.start()
+    for i in range(5):
+        queue.put(_packet(0x02, 0x20, 0x10, bytes([i])))
+    await queue.join()
+    queue.stop()
+
+    assert processed == [bytes([i]) for i in range(5)]
+    assert queue.stats.processed == 5
+
+
+async def test_heartbeats_are_coalesced_while_handler_is_busy():
+    processed = []
+    release = asyncio.Event()
+
+    async def _handler(packet: Packet):
+        await release.wait()
+        processed.append(packet.payload)
+
+    queue = InboundPacketQueue(_handler, coalesced_routes=[HEARTBEAT])
+    queue.start()
+
+    queue.put(_packet(*HEARTBEAT, b"\x00"))
+    await asyncio.sleep(0)  # first packet is being processed
+    queue.put(_packet(*HEARTBEAT, b"\x01"))
+    queue.put(_packet(0x02, 0x20, 0x10, b"\x10"))
+    queue.put(_packet(*HEARTBEAT, b"\x02"))
+    queue.put(_packet(*HEARTBEAT, b"\x03"))
+
+    release.set()
+    await queue.join()
+    queue.stop()
+
+    assert processed == [b"\x00", b"\x03", b"\x10"]
+    assert queue.stats.coalesced == 2
+
+
+async def test_full_queue_drops_only_coalesced_packets():
+    async def _handler(packet: Packet):
+        pass
+
+    queue = InboundPacketQueue(
+        _handler, maxsize=2, coalesced_routes=[HEARTBEAT, (0x03, 0x20, 0x02)]
+    )
+    queue.put(_packet(*HEARTBEAT))
+    queue.put(_packet(0x02, 0x20, 0x10))
+    queue.put(_packet(0x03, 0x20, 0x02))
+    queue.put(_packet(0x02, 0x20, 0x11))
+    queue.put(_packet(0x02, 0x20, 0x12))
+
+    assert queue.stats.dropped == 1
+    assert len(queue) == 4
+    assert queue.stats.max_depth == 4
@@ -0,0 +1,35 @@
+import asyncio
+import time
+
+from custom_components.ef_ble.eflib.crc import crc16
+from custom_components.ef_ble.eflib.profiler import SamplingProfiler
+
+
+async def _busy(duration: float):
+    end = time.monotonic() + duration
+    data = bytes(range(256)) * 16
+    while time.monotonic() < end:
+        crc16(data)
+        await asyncio.sleep(0)
+
+
+async def test_samples_of_eflib_code_are_collapsed():
+    profiler = SamplingProfiler(interval=0.001)
+    busy = asyncio.create_task(_busy(0.2))
+    profile = await profiler.run(0.2)
+    await busy
+
+    assert profile["samples"] > 0
+    assert profile["profiled_samples"] > 0
+    assert all(line.startswith("crc.py:crc16") for line in profile["collapsed"])
+    assert profile["functions"]
+
+
+async def test_samples_are_limited_to_given_devices():
+    profiler = SamplingProfiler(devices=[], interval=0.001)
+    busy = asyncio.create_task(_busy(0.1))
+    profile = await profiler.run(0.1)
+    await busy
+
+    assert profile["samples"] > 0
+    assert profile["profiled_samples"] == 0
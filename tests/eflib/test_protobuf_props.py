@@ -0,0 +1,65 @@
+from custom_components.ef_ble.eflib.instrumentation import Stage, StageTimings
+from custom_components.ef_ble.eflib.pb import utc_sys_pb2
+from custom_components.ef_ble.eflib.props import (
+    ProtobufProps,
+    pb_field,
+    proto_attr_mapper,
+)
+
+resolved = []
+
+
+def _rtc_info():
+    resolved.append(utc_sys_pb2.SysRTCInfoGetACK)
+    return utc_sys_pb2.SysRTCInfoGetACK
+
+
+pb = proto_attr_mapper(_rtc_info)
+
+
+class _RtcInfo(ProtobufProps):
+    utc_time = pb_field(pb.sys_utc_time)
+    timezone = pb_field(pb.sys_timezone, lambda x: x / 60)
+
+
+def test_lazy_message_type_is_resolved_on_first_message():
+    assert resolved == []
+
+    props = _RtcInfo()
+    props.update_from_bytes(
+        utc_sys_pb2.SysRTCInfoGetACK,
+        utc_sys_pb2.SysRTCInfoGetACK(
+            sys_utc_time=1700000000, sys_timezone=120
+        ).SerializeToString(),
+    )
+
+    assert resolved
+    assert props.utc_time == 1700000000
+    assert props.timezone == 2
+
+
+def test_stage_timings_record_decode_and_diff():
+    props = _RtcInfo()
+    props._timings = timings = StageTimings()
+    message = utc_sys_pb2.SysRTCInfoGetACK(sys_utc_time=1700000000)
+
+    props.update_from_bytes(utc_sys_pb2.SysRTCInfoGetACK, message.SerializeToString())
+    props.update_from_bytes(utc_sys_pb2.SysRTCInfoGetACK, b"\xff")
+
+    assert timings.histograms[Stage.DECODE].count == 1
+    assert timings.histograms[Stage.DIFF].count == 1
+    assert timings.errors == 1
+
+
+def test_message_types_are_loaded_ahead_of_first_message():
+    loaded = []
+
+    def _rtc_ack():
+        loaded.append(utc_sys_pb2.SysRTCInfoGetACK)
+        return utc_sys_pb2.SysRTCInfoGetACK
+
+    class _Preloaded(ProtobufProps):
+        utc_time = pb_field(proto_attr_mapper(_rtc_ack).sys_utc_time)
+
+    assert _Preloaded.load_message_types() == {utc_sys_pb2.SysRTCInfoGetACK}
+    assert loaded == [utc_sys_pb2.SysRTCInfoGetACK]
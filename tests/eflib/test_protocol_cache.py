@@ -0,0 +1,93 @@
+import json
+
+import pytest
+
+from custom_components.ef_ble.eflib.protocol_cache import ProtocolCache, ProtocolParams
+
+ADDRESS = "AA:BB:CC:DD:EE:FF"
+
+PARAMS = ProtocolParams(
+    uuid_family="nordic_uart",
+    service_uuid="6e400001-b5a3-f393-e0a9-e50e24dcca9e",
+    notify_handle=14,
+    write_handle=11,
+    packet_version=0x03,
+    encrypt_type=7,
+    auth_header_dst=0x35,
+)
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        ProtocolCache,
+        "cache_file_for",
+        staticmethod(lambda address: tmp_path / f"{address}_protocol.json"),
+    )
+    monkeypatch.setattr(ProtocolCache, "_caches", {})
+    return tmp_path
+
+
+async def test_params_are_persisted_per_address():
+    cache = ProtocolCache.for_address(ADDRESS)
+    await cache.async_load()
+    cache.record_connect_time(4.2, cached=False)
+    cache.record_connect_time(1.8, cached=False)
+    cache.store(PARAMS)
+    await cache.wait_saved()
+
+    ProtocolCache._caches.clear()
+    restored = ProtocolCache.for_address(ADDRESS)
+    await restored.async_load()
+
+    assert restored is not cache
+    assert restored.get(0x03, 7, 0x35) == PARAMS
+    assert restored.connect_times.keys() == {"uncached"}
+    assert restored.connect_times["uncached"].as_dict() == (
+        cache.connect_times["uncached"].as_dict()
+    )
+    assert restored.connect_times["uncached"].count == 2
+    assert restored.connect_times["uncached"].mean == 3000
+
+
+async def test_saves_requested_during_write_are_coalesced(cache_dir, mocker):
+    write = mocker.spy(ProtocolCache, "_write")
+    cache = ProtocolCache.for_address(ADDRESS)
+    await cache.async_load()
+
+    cache.store(PARAMS)
+    cache.invalidate()
+    cache.store(PARAMS)
+    await cache.wait_saved()
+
+    assert write.call_count == 1
+    assert json.loads((cache_dir / f"{ADDRESS}_protocol.json").read_text())["params"]
+
+
+async def test_params_are_invalidated_on_configuration_change():
+    cache = ProtocolCache.for_address(ADDRESS)
+    await cache.async_load()
+    cache.store(PARAMS)
+
+    assert cache.get(0x02, 7, 0x35) is None
+    assert cache.get(0x03, 7, 0x35) is None
+    await cache.wait_saved()
+
+
+async def test_invalid_cache_file_is_ignored(cache_dir):
+    (cache_dir / f"{ADDRESS}_protocol.json").write_text("{not json")
+    cache = ProtocolCache.for_address(ADDRESS)
+    await cache.async_load()
+
+    assert cache.params is None
+
+
+async def test_cache_file_is_removed(cache_dir):
+    cache = ProtocolCache.for_address(ADDRESS)
+    await cache.async_load()
+    cache.store(PARAMS)
+
+    await ProtocolCache.clean_cache_for(ADDRESS)
+
+    assert not (cache_dir / f"{ADDRESS}_protocol.json").exists()
+    assert ADDRESS not in ProtocolCache._caches
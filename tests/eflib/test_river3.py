@@ -2,6 +2,7 @@ import pytest
 from pytest_mock import MockerFixture
 
 from custom_components.ef_ble.eflib.devices.river3 import Device
+from custom_components.ef_ble.eflib.memory import device_memory
 
 
 @pytest.fixture
@@ -223,3 +224,19 @@ async def test_river3_exact_values_from_known_packets(device, packet_sequence):
         assert actual_value == expected_value, (
             f"{field_name}: expected {expected_value}, got {actual_value}"
         )
+
+
+async def test_river3_memory_accounts_fields(device, packet_sequence):
+    for hex_packet in packet_sequence:
+        await device.data_parse(await device.packet_parse(bytes.fromhex(hex_packet)))
+
+    listeners = device_memory(device)["listeners"]["items"]
+    device.register_callback(lambda: None, Device.battery_level.public_name)
+    device.register_callback(lambda: None, Device.battery_level.public_name)
+    memory = device_memory(device)
+
+    assert memory["fields"]["items"] > 0
+    assert memory["listeners"]["items"] == listeners + 2
+    assert memory["fields"]["bytes"] > 0
+    assert memory["diagnostics"]["raw_data_messages"]["items"] == 0
+    assert memory["total_bytes"] >= memory["fields"]["bytes"] + memory["other"]["bytes"]
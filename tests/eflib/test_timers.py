@@ -0,0 +1,117 @@
+import asyncio
+
+import pytest
+
+from custom_components.ef_ble.eflib.timers import TimerScheduler
+
+
+@pytest.fixture
+def make_scheduler():
+    schedulers = []
+
+    def _create():
+        scheduler = TimerScheduler(asyncio.get_running_loop())
+        schedulers.append(scheduler)
+        return scheduler
+
+    yield _create
+    for scheduler in schedulers:
+        for key in list(scheduler._timers):
+            scheduler.cancel(key)
+
+
+async def test_timer_runs_periodically(make_scheduler):
+    scheduler = make_scheduler()
+    calls = 0
+
+    async def _tick():
+        nonlocal calls
+        calls += 1
+
+    scheduler.schedule("tick", _tick, interval=0.01)
+    await asyncio.sleep(0.055)
+
+    assert 4 <= calls <= 7
+    stats = scheduler.stats()["test_timer_runs_periodically.<locals>._tick"]
+    assert stats["fired"] == calls
+
+
+async def test_scheduling_same_key_replaces_timer(make_scheduler):
+    scheduler = make_scheduler()
+    calls = []
+
+    async def _first():
+        calls.append("first")
+
+    async def _second():
+        calls.append("second")
+
+    scheduler.schedule("key", _first, interval=0.01)
+    scheduler.schedule("key", _second, interval=0.01)
+    await asyncio.sleep(0.035)
+
+    assert len(scheduler) == 1
+    assert "first" not in calls
+    assert "second" in calls
+
+
+async def test_cancel_owner_cancels_only_owned_timers(make_scheduler):
+    scheduler = make_scheduler()
+    owner = object()
+
+    async def _noop():
+        pass
+
+    scheduler.schedule("a", _noop, interval=1, owner=owner)
+    scheduler.schedule("b", _noop, interval=1, owner=owner)
+    scheduler.schedule("c", _noop, interval=1)
+
+    scheduler.cancel_owner(owner)
+
+    assert "a" not in scheduler
+    assert "b" not in scheduler
+    assert "c" in scheduler
+
+
+async def test_overrunning_timer_is_skipped(make_scheduler):
+    scheduler = make_scheduler()
+    started = 0
+
+    async def _slow():
+        nonlocal started
+        started += 1
+        await asyncio.sleep(1)
+
+    scheduler.schedule("slow", _slow, interval=0.01)
+    await asyncio.sleep(0.055)
+
+    assert started == 1
+    stats = scheduler.stats()["test_overrunning_timer_is_skipped.<locals>._slow"]
+    assert stats["skipped"] >= 3
+
+
+async def test_blocked_loop_does_not_burst_missed_periods(make_scheduler):
+    scheduler = make_scheduler()
+    calls = 0
+
+    async def _tick():
+        nonlocal calls
+        calls += 1
+
+    scheduler.schedule("tick", _tick, interval=0.01)
+    await asyncio.sleep(0)
+
+    # block the loop for several periods
+    loop = asyncio.get_running_loop()
+    end = loop.time() + 0.05
+    while loop.time() < end:
+        pass
+
+    await asyncio.sleep(0.005)
+    assert calls <= 2
+
+    stats = scheduler.stats()[
+        "test_blocked_loop_does_not_burst_missed_periods.<locals>._tick"
+    ]
+    assert stats["skipped"] >= 3
+    assert stats["max_lag_ms"] >= 30